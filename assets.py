@@ -0,0 +1,476 @@
+import glob
+import hashlib
+import io
+import json
+import math
+import os
+import re
+
+from jinja2 import pass_context
+from markupsafe import Markup
+
+import clientgen
+import foods
+
+
+# -------------------------
+# Static asset pipeline (build step: `python assets.py`)
+# -------------------------
+# Writes content-hashed files into static/dist/ plus a manifest mapping
+# logical names ("logo-64.webp") to them ("dist/logo-64.1a2b3c4d5e.webp").
+# Hashed URLs never change content, so they are served as immutable. At
+# runtime only the manifest is read; Pillow is needed for the images only.
+# The CSS/JS bundles need nothing beyond the stdlib and are rebuilt at
+# import by ensure_built() when a source is newer than the manifest; files
+# the new manifest no longer names are removed from static/dist/.
+# Without a build, asset_url() falls back to the given original file.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+TEMPLATE_DIR = os.path.join(ROOT_DIR, "templates")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+CRITICAL_PATH = os.path.join(DIST_DIR, "critical.json")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Bootstrap is vendored (static/vendor/) and purged down to the selectors our
+# templates and scripts can produce; shared scripts become one bundle.
+VENDOR_CSS = "vendor/bootstrap.min.css"
+CSS_BUNDLE = ("app.css", [VENDOR_CSS])
+JS_BUNDLE = ("app.js", ["food_search.js", "fragments.js"])
+
+# logical name -> (source file under static/, {variant: square size in px});
+# favicon and 256 (apple-touch icon) are linked in partials/icons.html, 64
+# with 192 as its high-DPI source by picture(), 192/512 in the web manifest
+IMAGES = {
+    "logo": ("logo_circle_greenaurlean.png", {"favicon": 32, "64": 64, "192": 192, "256": 256, "512": 512}),
+}
+# (extension, Pillow format, save options), most compact first; formats
+# Pillow cannot write are skipped. The last one is the <img> fallback.
+IMAGE_FORMATS = (
+    ("avif", "AVIF", {"quality": 50}),
+    ("webp", "WEBP", {"quality": 80, "method": 6}),
+    ("png", "PNG", {"optimize": True}),
+)
+ICO_SIZES = [(16, 16), (32, 32), (48, 48)]
+# critical CSS covers the markup up to the page's form (header, layout and
+# form shell), or this much of the body on pages without one
+FOLD_CHARS = 3000
+
+
+def fingerprint(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def write_asset(manifest, name, data):
+    hashed = fingerprint(name, data)
+    path = os.path.join(DIST_DIR, hashed)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    manifest[name] = f"dist/{hashed}"
+    return hashed
+
+
+def build_images(manifest):
+    from PIL import Image
+
+    Image.init()
+    for name in [name for name in manifest if name.split("-")[0].split(".")[0] in IMAGES]:
+        del manifest[name]  # variants or formats no longer built
+    for name, (source, sizes) in IMAGES.items():
+        with Image.open(os.path.join(STATIC_DIR, source)) as original:
+            image = original.convert("RGBA")
+
+        for variant, px in sizes.items():
+            resized = image.copy()
+            resized.thumbnail((px, px), Image.LANCZOS)
+            for ext, fmt, options in IMAGE_FORMATS:
+                if fmt not in Image.SAVE:
+                    continue
+                buf = io.BytesIO()
+                resized.save(buf, fmt, **options)
+                write_asset(manifest, f"{name}-{variant}.{ext}", buf.getvalue())
+
+        buf = io.BytesIO()
+        image.save(buf, "ICO", sizes=ICO_SIZES)
+        write_asset(manifest, f"{name}.ico", buf.getvalue())
+
+
+# --- CSS purge & critical CSS ---
+_COMMENT_RE = re.compile(r"/\*(?!!).*?\*/", re.S)  # keeps /*! license */ banners
+_CLASS_RE = re.compile(r"\.(-?[_a-zA-Z][\w-]*)")
+_ATTR_RE = re.compile(r"\[([\w-]+)")
+_NOT_RE = re.compile(r":not\([^()]*\)")
+_TOKEN_RE = re.compile(r"[A-Za-z_][\w-]*")
+_INCLUDE_RE = re.compile(r"{%\s*include\s+[\"']([^\"']+)[\"']")
+_NESTED_AT_RULES = ("@media", "@supports", "@container", "@layer")
+# selectors that only match after user interaction, left to the full bundle
+_STATE_RE = re.compile(
+    r":(?:hover|focus|focus-visible|focus-within|active|disabled|checked|indeterminate|valid|invalid|autofill)\b"
+    r"|::?-webkit-autofill|file-upload-button|file-selector-button|datetime-edit"
+)
+_VAR_RE = re.compile(r"var\((--[\w-]+)")
+_TYPE_RE = re.compile(r"(?:^|[\s>+~(])([a-z][a-z0-9]*)\b(?!-)")
+_BRACKETS_RE = re.compile(r"\[[^\]]*\]")
+
+
+def _rules(css):
+    # top-level (prelude, body) pairs; statements like @charset are dropped
+    pos = 0
+    while True:
+        start = css.find("{", pos)
+        if start < 0:
+            return
+        prelude = css[pos:start].rsplit(";", 1)[-1].strip()
+        depth, end = 1, start + 1
+        while depth:
+            depth += {"{": 1, "}": -1}.get(css[end], 0)
+            end += 1
+        yield prelude, css[start + 1:end - 1]
+        pos = end
+
+
+def _split_selectors(prelude):
+    parts, depth, current = [], 0, []
+    for ch in prelude:
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += {"(": 1, ")": -1}.get(ch, 0)
+        current.append(ch)
+    parts.append("".join(current).strip())
+    return parts
+
+
+def _selector_used(selector, used):
+    # every class and attribute name it requires can occur in our markup
+    selector = _NOT_RE.sub("", selector)
+    return all(name in used for name in _CLASS_RE.findall(selector) + _ATTR_RE.findall(selector))
+
+
+def purge_css(css, used):
+    out = []
+    for prelude, body in _rules(css):
+        if prelude.startswith(_NESTED_AT_RULES):
+            inner = purge_css(body, used)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{body}}}")  # @keyframes, @font-face, ...
+        else:
+            selectors = [sel for sel in _split_selectors(prelude) if _selector_used(sel, used)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body}}}")
+    return "".join(out)
+
+
+def _read_template(name):
+    with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _tokens(text, seen):
+    tokens = set(_TOKEN_RE.findall(text))
+    for included in _INCLUDE_RE.findall(text):
+        tokens |= _template_tokens(included, seen)
+    return tokens
+
+
+def _paints(selector, tokens):
+    # no interaction state, and every element name it requires is in the markup
+    if _STATE_RE.search(selector):
+        return False
+    return all(name in tokens for name in _TYPE_RE.findall(_BRACKETS_RE.sub("", selector)))
+
+
+def _first_paint(css, tokens):
+    out = []
+    for prelude, body in _rules(css):
+        if prelude.startswith(_NESTED_AT_RULES):
+            inner = _first_paint(body, tokens)
+            if inner:
+                out.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            out.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = [sel for sel in _split_selectors(prelude) if _paints(sel, tokens)]
+            if selectors:
+                out.append(f"{','.join(selectors)}{{{body}}}")
+    return "".join(out)
+
+
+def _prune_vars(css):
+    # :root custom properties that nothing left in css reads, directly or
+    # through another custom property
+    rules = list(_rules(css))
+    roots = [[decl for decl in body.split(";") if decl.strip()] for prelude, body in rules if prelude == ":root"]
+    used = set(_VAR_RE.findall("".join(body for prelude, body in rules if prelude != ":root")))
+    while True:
+        kept = [decl for decls in roots for decl in decls if not decl.startswith("--") or decl.split(":", 1)[0] in used]
+        more = used | set(_VAR_RE.findall(";".join(kept)))
+        if more == used:
+            break
+        used = more
+    out, root = [], iter(roots)
+    for prelude, body in rules:
+        if prelude == ":root":
+            decls = [decl for decl in next(root) if not decl.startswith("--") or decl.split(":", 1)[0] in used]
+            if decls:
+                out.append(f":root{{{';'.join(decls)}}}")
+        else:
+            out.append(f"{prelude}{{{body}}}")
+    return "".join(out)
+
+
+def critical_css(site_css, tokens):
+    # the first screen's rules: used by its markup, not interaction states,
+    # and only the custom properties those rules read
+    return _prune_vars(_first_paint(purge_css(site_css, tokens), tokens | {"html"}))
+
+
+def _template_tokens(name, seen=None):
+    # every identifier-like token in a template and the partials it includes;
+    # a superset of the class names it can render, Jinja branches included
+    seen = set() if seen is None else seen
+    if name in seen:
+        return set()
+    seen.add(name)
+    return _tokens(_read_template(name), seen)
+
+
+def _above_fold_tokens(name):
+    # the same, for the first screen only: <body> up to the end of the form
+    text = _read_template(name)
+    start = max(text.find("<body"), 0)
+    end = text.find("</form>", start)
+    end = start + FOLD_CHARS if end < 0 else end
+    return _tokens(text[start:end], {name})
+
+
+def _read_static(name):
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def minify_js(source):
+    # conservative: drops comment-only lines and indentation, keeps line breaks
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//")) + "\n"
+
+
+def build_bundles(manifest):
+    pages = sorted(os.path.relpath(p, TEMPLATE_DIR) for p in glob.glob(os.path.join(TEMPLATE_DIR, "*.html")))
+    script_tokens = set()
+    for name in JS_BUNDLE[1]:
+        script_tokens |= set(_TOKEN_RE.findall(_read_static(name)))
+    page_tokens = {page: _template_tokens(page) | script_tokens for page in pages}
+
+    name, sources = CSS_BUNDLE
+    vendor_css = _COMMENT_RE.sub("", "".join(_read_static(src) for src in sources))
+    banner = "".join(re.findall(r"/\*!.*?\*/", vendor_css, re.S))
+    vendor_css = re.sub(r"/\*!.*?\*/", "", vendor_css, flags=re.S)
+    site_css = purge_css(vendor_css, set().union(*page_tokens.values()))
+    write_asset(manifest, name, f"{banner}\n{site_css}\n".encode("utf-8"))
+    critical = {page: critical_css(site_css, _above_fold_tokens(page)) for page in pages}
+
+    name, sources = JS_BUNDLE
+    write_asset(manifest, name, "".join(minify_js(_read_static(src)) for src in sources).encode("utf-8"))
+    return critical
+
+
+def build_client(manifest):
+    # browser calculators from clientgen.py; a tool module imports the runtime
+    # by its hashed name, so the runtime is written first
+    for name in [name for name in manifest if name.startswith("calc-")]:
+        del manifest[name]
+    runtime = write_asset(manifest, clientgen.RUNTIME_MODULE, minify_js(clientgen.runtime_module()).encode("utf-8"))
+    modules, _ = clientgen.tool_modules(f"./{runtime}")
+    for tool, source in modules.items():
+        write_asset(manifest, clientgen.TOOL_MODULE.format(tool), minify_js(source).encode("utf-8"))
+
+
+def build_foods(manifest):
+    # each calculator's food list as versioned JSON for the service worker's
+    # offline search; ids match foods.FoodIndex (store rows with a value)
+    store = foods.get_store()
+    for table in foods.TABLES:
+        values = store.column(table)
+        rows = [r for r in range(len(store)) if not math.isnan(values[r])]
+        data = {
+            "nutrient": table,
+            "foods": [
+                {
+                    "id": i,
+                    "name": store.names[r],
+                    "aliases": store.aliases[r],
+                    table: float(values[r]),
+                    "unit": store.units[r],
+                }
+                for i, r in enumerate(rows)
+            ],
+        }
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        write_asset(manifest, f"foods-{table}.json", body)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def prune(manifest):
+    # drops superseded fingerprinted files; .tmp files may be another
+    # worker's build in progress
+    keep = {os.path.basename(path) for path in manifest.values()}
+    keep |= {os.path.basename(MANIFEST_PATH), os.path.basename(CRITICAL_PATH)}
+    for name in os.listdir(DIST_DIR):
+        if name not in keep and not name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(DIST_DIR, name))
+            except OSError:
+                pass
+
+
+def build(images=True):
+    global _manifest, _critical
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = dict(_load_json(MANIFEST_PATH))  # keeps image entries on a bundles-only build
+    critical = build_bundles(manifest)
+    build_client(manifest)
+    build_foods(manifest)
+    if images:
+        build_images(manifest)
+    _write_json(CRITICAL_PATH, critical)
+    _write_json(MANIFEST_PATH, manifest)
+    prune(manifest)
+    _manifest, _critical = manifest, critical
+    return manifest
+
+
+def _sources():
+    yield from glob.glob(os.path.join(TEMPLATE_DIR, "**", "*.html"), recursive=True)
+    yield from (os.path.join(STATIC_DIR, src) for src in CSS_BUNDLE[1] + JS_BUNDLE[1])
+    yield from clientgen.SOURCES
+    yield foods.SOURCE_PATH
+
+
+def ensure_built():
+    try:
+        built = min(os.path.getmtime(MANIFEST_PATH), os.path.getmtime(CRITICAL_PATH))
+    except OSError:
+        built = None
+    if built is None or any(os.path.getmtime(src) > built for src in _sources()):
+        build(images=False)
+
+
+# -------------------------
+# Runtime lookup (template helpers)
+# -------------------------
+_manifest = None
+_critical = None
+
+
+def _load_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def manifest():
+    global _manifest
+    if _manifest is None:
+        _manifest = _load_json(MANIFEST_PATH)
+    return _manifest
+
+
+def asset_url(name, fallback=None):
+    path = manifest().get(name)
+    if path is None:
+        path = fallback or name
+    return f"/static/{path}"
+
+
+@pass_context
+def stylesheets(context):
+    # inline the page's critical CSS and load the full bundle without blocking
+    # render; with no build, link the vendored stylesheet as before
+    global _critical
+    if _critical is None:
+        _critical = _load_json(CRITICAL_PATH)
+    css = _critical.get(context.name)
+    if css is None or "app.css" not in manifest():
+        return Markup(f'<link href="{asset_url(VENDOR_CSS)}" rel="stylesheet">')
+    href = asset_url("app.css")
+    return Markup(
+        f"<style>{css}</style>\n"
+        f'<link href="{href}" rel="stylesheet" media="print" onload="this.media=\'all\'">'
+        f'<noscript><link href="{href}" rel="stylesheet"></noscript>'
+    )
+
+
+def calculator_script(tool):
+    # the tool's generated module, if it has one; without it the form is
+    # evaluated by the server as before
+    path = manifest().get(clientgen.TOOL_MODULE.format(tool))
+    if path is None:
+        return Markup("")
+    return Markup(
+        f'<link rel="modulepreload" href="{asset_url(clientgen.RUNTIME_MODULE)}">'
+        f'<script type="module" src="/static/{path}"></script>'
+    )
+
+
+def picture(name, variant, hidpi, alt, fallback):
+    # <picture> for a built IMAGES entry: one <source> per modern format that
+    # was built, the PNG as <img>; with no image build, just the fallback file
+    px = IMAGES[name][1][variant]
+    *modern, (last, _, _) = IMAGE_FORMATS
+    sources = []
+    for ext, _, _ in modern:
+        small, large = f"{name}-{variant}.{ext}", f"{name}-{hidpi}.{ext}"
+        if small in manifest() and large in manifest():
+            sources.append(
+                f'<source type="image/{ext}" srcset="{asset_url(small)} 1x, {asset_url(large)} 3x">'
+            )
+    src = asset_url(f"{name}-{variant}.{last}", fallback)
+    return Markup(
+        f"<picture>{''.join(sources)}"
+        f'<img src="{src}" width="{px}" height="{px}" alt="{Markup.escape(alt)}"></picture>'
+    )
+
+
+def version():
+    # changes with any built asset or template; names the service worker cache
+    digest = hashlib.sha256(json.dumps(manifest(), sort_keys=True).encode("utf-8"))
+    for path in sorted(glob.glob(os.path.join(TEMPLATE_DIR, "**", "*.html"), recursive=True)):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:10]
+
+
+def preload_links():
+    links = []
+    for name, kind in (("app.css", "style"), ("app.js", "script")):
+        if name in manifest():
+            links.append(f"<{asset_url(name)}>; rel=preload; as={kind}")
+    return ", ".join(links)
+
+
+if __name__ == "__main__":
+    try:
+        built = build()
+    except ImportError:
+        print("Pillow is not installed; building CSS/JS bundles only")
+        built = build(images=False)
+    for name, path in sorted(built.items()):
+        size = os.path.getsize(os.path.join(STATIC_DIR, path))
+        print(f"{name:24} -> static/{path} ({size} bytes)")
@@ -0,0 +1,610 @@
+import csv
+import functools
+import io
+import itertools
+import json
+
+import numpy as np
+
+import calculators
+from calculators import (
+    ACTIVITY_FACTORS, BP_ORDER, IDEAL_WEIGHT_COEFFS, MACRO_GOAL_ADJUST, MACRO_SPLIT, METS, WATER_ACTIVITY_ML,
+)
+
+
+# -------------------------
+# Vectorized batch kernels (columnar JSON -> NumPy arrays)
+# -------------------------
+# Each kernel mirrors the single-profile route in app.py, but evaluates a
+# whole column of profiles at once. Invalid rows are reported through a
+# per-row error column instead of failing the whole request.
+
+MAX_ROWS = 200_000
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _to_float(value):
+    if isinstance(value, bool):
+        return np.nan  # JSON true/false is not a number, as in the single-profile parser
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class Columns:
+    def __init__(self, tool, data, n):
+        self.fields = {f.name: f for f in calculators.TOOLS[tool].fields}
+        self.data = data
+        self.n = n
+        self.error = np.full(n, None, dtype=object)
+
+    def fail(self, mask, message):
+        # first error per row wins
+        self.error[mask & (self.error == None)] = message  # noqa: E711
+
+    def _raw(self, name):
+        value = self.data.get(name)
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return value
+        return [value] * self.n
+
+    def num(self, name, default=None, optional=False, positive=False, integer=False):
+        raw = self._raw(name)
+        if raw is None:
+            if default is not None:
+                return np.full(self.n, float(default))
+            if optional:
+                return np.full(self.n, np.nan)
+            raise BatchError(f"Missing column '{name}'")
+        arr = None
+        if bool not in set(map(type, raw)):
+            try:
+                arr = np.asarray(raw, dtype=np.float64)
+            except (TypeError, ValueError):
+                pass
+        if arr is None or arr.ndim != 1:
+            # per cell: strings, bools and nested lists become NaN (not a number)
+            arr = np.fromiter((_to_float(v) for v in raw), dtype=np.float64, count=self.n)
+        if integer:
+            arr = np.trunc(arr)
+        missing = ~np.isfinite(arr)
+        if default is not None:
+            arr[missing] = default
+        elif not optional:
+            self.fail(missing, f"'{name}' must be a number")
+        if positive:
+            self.fail(np.isfinite(arr) & (arr <= 0), f"'{name}' must be positive")
+        return arr
+
+    def cat(self, name):
+        # choices and default come from the calculator's schema, as in the
+        # single-profile parser; values are compared stripped, like there
+        field = self.fields[name]
+        raw = self._raw(name)
+        if raw is None:
+            if field.required:
+                raise BatchError(f"Missing column '{name}'")
+            return np.full(self.n, field.default, dtype=object)
+        arr = np.empty(self.n, dtype=object)
+        arr[:] = [None if v is None or v == "" else str(v).strip() for v in raw]
+        missing = arr == None  # noqa: E711
+        if field.required:
+            self.fail(missing, f"'{name}' is required")
+        else:
+            arr[missing] = field.default
+        if field.choices:
+            self.fail(~missing & ~np.isin(arr, field.choices), f"'{name}' must be one of: {', '.join(field.choices)}")
+        return arr
+
+    def height_cm(self):
+        # height_to_cm, by row: height_cm, or height_ft/height_in when unit is imperial
+        imperial = self.cat("unit") == "imperial"
+        feet = np.nan_to_num(self.num("height_ft", optional=True))
+        inches = np.nan_to_num(self.num("height_in", optional=True))
+        height = np.where(imperial, _round((feet * 12 + inches) * 2.54, 2), self.num("height_cm", optional=True))
+        bad = ~(height > 0)
+        self.fail(bad & ~imperial, "'height_cm' must be a positive number")
+        self.fail(bad & imperial, "'height_ft' and 'height_in' must give a positive height")
+        return height
+
+    def length_cm(self, name, imperial):
+        # an optional circumference: <name>_cm, or <name>_in when unit is imperial
+        return np.where(imperial, self.num(f"{name}_in", optional=True) * 2.54, self.num(f"{name}_cm", optional=True))
+
+
+def _round(values, decimals=0):
+    # Python's round() on the exact binary value, as the single-profile
+    # calculators do; np.round scales first, which can flip a value that
+    # sits next to a half step (304.05 -> 304.1)
+    values = np.asarray(values, dtype=np.float64)
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near.any():
+        rounded[near] = [round(v, decimals) for v in values[near].tolist()]
+    return rounded
+
+
+def _lookup(values, table, default):
+    out = np.full(values.shape, float(default))
+    for key, factor in table.items():
+        out[values == key] = factor
+    return out
+
+
+def _label(conditions, labels, default):
+    return np.select(conditions, labels, default=default).astype(object)
+
+
+def _pointer(value, low, high, decimals=2):
+    return np.clip(_round((value - low) / (high - low) * 100, decimals), 0, 100)
+
+
+def _bmr(weight, height, age, gender):
+    # Mifflin-St Jeor
+    return 10 * weight + 6.25 * height - 5 * age + np.where(gender == "male", 5, -161)
+
+
+# --- TDEE ---
+def tdee(c):
+    weight = c.num("weight")
+    height = c.num("height")
+    age = c.num("age", integer=True)
+    gender = c.cat("gender")
+    activity = c.cat("activity")
+    bmr = _bmr(weight, height, age, gender)
+    return {
+        "bmr": _round(bmr, 1),
+        "tdee": _round(bmr * _lookup(activity, ACTIVITY_FACTORS, 1.2), 0),
+    }
+
+
+# --- Macro Split ---
+def macro(c):
+    weight = c.num("weight")
+    height = c.num("height")
+    age = c.num("age", integer=True)
+    gender = c.cat("gender")
+    activity = c.cat("activity")
+    goal = c.cat("goal")
+    tdee_val = _bmr(weight, height, age, gender) * _lookup(activity, ACTIVITY_FACTORS, 1.2)
+    calories = tdee_val + _lookup(goal, MACRO_GOAL_ADJUST, 0)
+    return {
+        "calories": _round(calories),
+        "protein": _round(calories * MACRO_SPLIT["protein"] / 4, 1),
+        "carbs": _round(calories * MACRO_SPLIT["carbs"] / 4, 1),
+        "fat": _round(calories * MACRO_SPLIT["fat"] / 9, 1),
+    }
+
+
+# --- Water Intake ---
+def water(c):
+    weight = c.num("weight")
+    activity = c.cat("activity")
+    climate = c.cat("climate")
+    coffee = c.num("coffee", default=0, integer=True)
+    alcohol = c.num("alcohol", default=0, integer=True)
+    water_ml = weight * _lookup(activity, WATER_ACTIVITY_ML, 35)
+    water_ml += _lookup(climate, {"hot": 500, "cool": -250}, 0)
+    water_ml += coffee * 100
+    water_ml += alcohol * 150
+    liters = _round(water_ml / 1000, 2)
+    return {
+        "liters": liters,
+        "advice": _label([liters < 2, liters <= 3.5], ["low", "good"], "high"),
+    }
+
+
+# --- BMI ---
+def bmi(c):
+    weight = c.num("weight", positive=True)
+    height_m = c.height_cm() / 100.0
+    bmi_val = _round(weight / height_m ** 2, 1)
+    return {
+        "bmi": bmi_val,
+        "category": _label(
+            [bmi_val < 18.5, bmi_val < 25, bmi_val < 30],
+            ["Underweight", "Normal", "Overweight"],
+            "Obese",
+        ),
+        "pointer_pct": _pointer(bmi_val, 15, 40),
+    }
+
+
+# --- Body Fat % (Deurenberg + US Navy) ---
+def bodyfat(c):
+    age = c.num("age", integer=True)
+    gender = c.cat("gender")
+    weight = c.num("weight")
+    height_cm = c.height_cm()
+    imperial = c.cat("unit") == "imperial"
+    waist, neck, hip = (c.length_cm(name, imperial) for name in ("waist", "neck", "hip"))
+    male = gender == "male"
+    female = gender == "female"
+
+    bmi_val = weight / (height_cm / 100.0) ** 2
+    bf_bmi = _round(1.20 * bmi_val + 0.23 * age - 10.8 * male - 5.4, 1)
+
+    # US Navy only where the circumferences for that gender are present
+    has_tape = (waist > 0) & (neck > 0)
+    use_male = male & has_tape
+    use_female = female & has_tape & (hip > 0)
+    span = np.where(use_male, waist - neck, waist + hip - neck)
+    use_navy = use_male | use_female
+    c.fail(use_navy & ~(span > 0), "circumferences out of range for US Navy method")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_span = np.log10(np.where(span > 0, span, np.nan))
+        log_height = np.log10(height_cm)
+        navy = np.where(
+            use_male,
+            495 / (1.0324 - 0.19077 * log_span + 0.15456 * log_height) - 450,
+            495 / (1.29579 - 0.35004 * log_span + 0.22100 * log_height) - 450,
+        )
+    bf_navy = np.where(use_navy, _round(navy, 1), np.nan)
+    bf_final = np.where(use_navy & (bf_navy != 0), bf_navy, bf_bmi)
+
+    limits = np.where(male[:, None], [6, 13, 17, 24], [14, 20, 24, 31])
+    category = _label(
+        [bf_final < limits[:, 0], bf_final <= limits[:, 1], bf_final <= limits[:, 2], bf_final <= limits[:, 3]],
+        ["Essential Fat", "Athlete", "Fitness", "Average"],
+        "Obese",
+    )
+    fat_mass = _round(weight * bf_final / 100, 1)
+    return {
+        "bf_bmi": bf_bmi,
+        "bf_navy": bf_navy,
+        "bf_final": bf_final,
+        "category": category,
+        "fat_mass": fat_mass,
+        "lean_mass": _round(weight - fat_mass, 1),
+        "pointer_pct": _pointer(bf_final, 5, 50),
+    }
+
+
+# --- Ideal Weight (WHO range + Devine/Hamwi/Miller/Robinson) ---
+def ideal_weight(c):
+    gender = c.cat("gender")
+    height_cm = c.height_cm()
+    weight = c.num("weight", optional=True)
+    male = gender == "male"
+    height_m2 = (height_cm / 100.0) ** 2
+    inches_over = height_cm / 2.54 - 60
+
+    min_weight = _round(18.5 * height_m2, 1)
+    max_weight = _round(24.9 * height_m2, 1)
+    out = {"min_weight": min_weight, "max_weight": max_weight}
+    for name, (mb, ms, fb, fs) in IDEAL_WEIGHT_COEFFS.items():
+        out[name.lower()] = _round(np.where(male, mb + ms * inches_over, fb + fs * inches_over), 1)
+
+    min_display = 15.0 * height_m2
+    out["pointer_pct"] = np.where(np.isnan(weight), np.nan, _pointer(weight, min_display, 40.0 * height_m2))
+    out["status"] = np.where(
+        np.isnan(weight) | (weight == 0),
+        None,
+        _label([weight < min_weight, weight > max_weight], ["below", "above"], "within"),
+    )
+    return out
+
+
+# --- Calories Burned ---
+def calories_burned(c):
+    weight = c.num("weight")
+    duration = c.num("duration")
+    exercise = c.cat("exercise")
+    calories = _round(_lookup(exercise, METS, 6) * 3.5 * weight / 200 * duration, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_min = np.where(duration > 0, _round(calories / duration, 1), 0.0)
+    return {
+        "calories": calories,
+        "cal_per_min": per_min,
+        "pointer_pct": _pointer(calories, 0, 1000),
+    }
+
+
+# --- Stress / Relaxation Score ---
+def stress(c):
+    work, sleep, screen, exercise, meditation, social = (
+        c.num(name, integer=True) for name in ("work", "sleep", "screen", "exercise", "meditation", "social")
+    )
+    stress_total = work + screen + (10 - sleep)
+    relax_total = exercise + meditation + social
+    score = np.clip(100 - stress_total * 5 + relax_total * 3, 0, 100)
+    return {
+        "score": score,
+        "stress_total": stress_total,
+        "relax_total": relax_total,
+        "level": _label([score >= 80, score >= 60], ["balanced", "manageable"], "high"),
+    }
+
+
+# --- Blood Pressure ---
+def bp(c):
+    systolic = c.num("systolic", integer=True)
+    diastolic = c.num("diastolic", integer=True)
+    sys_rank = np.select(
+        [systolic >= 180, systolic >= 140, systolic >= 130, systolic >= 120, systolic < 90],
+        [0, 1, 2, 3, 5], default=4,
+    )
+    dia_rank = np.select(
+        [diastolic >= 120, diastolic >= 90, diastolic >= 80, diastolic < 60],
+        [0, 1, 2, 5], default=4,
+    )
+    order = np.asarray(BP_ORDER, dtype=object)
+    return {
+        "sys_cat": order[sys_rank],
+        "dia_cat": order[dia_rank],
+        "category": order[np.minimum(sys_rank, dia_rank)],
+    }
+
+
+# --- Diabetes Risk ---
+def diabetes(c):
+    fasting = c.num("fasting")
+    postmeal = c.num("postmeal")
+    age = c.num("age", optional=True, integer=True)
+    bmi_val = c.num("bmi", optional=True)
+    family = c.cat("family")
+    activity = c.cat("activity")
+    diet = c.cat("diet")
+
+    score = np.select([fasting >= 126, fasting >= 100], [40, 20], default=0)
+    score += np.select([postmeal >= 200, postmeal >= 140], [40, 20], default=0)
+    score += 10 * ((age >= 45).astype(int) + (bmi_val >= 25) + (family == "yes")
+                   + (activity == "sedentary") + (diet == "high_sugar"))
+    return {
+        "score": score,
+        "category": _label(
+            [score >= 70, score >= 40],
+            ["High Risk (Possible Diabetes)", "Prediabetes Risk"],
+            "Normal",
+        ),
+    }
+
+
+# --- Sleep Debt ---
+def sleep_debt(c):
+    avg = c.num("avg")
+    age = c.num("age", integer=True)
+    days = c.num("days", default=7, integer=True)
+    ideal = np.select([age < 14, age <= 17, age <= 64], [9, 8.5, 8], default=7.5)
+    total_debt = _round((ideal - avg) * days, 1)
+    return {
+        "ideal": ideal,
+        "total_debt": total_debt,
+        "pointer_pct": _pointer(total_debt, 0, 28, decimals=1),
+    }
+
+
+# --- Alcohol Impact ---
+def alcohol(c):
+    drinks = c.num("drinks", integer=True)
+    gender = c.cat("gender")
+    safe_limit = np.where(gender == "male", 14, 7)
+    ethanol = drinks * 14
+    return {
+        "safe_limit": safe_limit,
+        "ethanol": ethanol,
+        "score": np.where(drinks == 0, 0, np.minimum(100, _round(drinks / (safe_limit * 2) * 100))),
+        "compare_pct": np.minimum(200, _round(ethanol / (safe_limit * 14) * 100)),
+        "category": _label([drinks <= safe_limit, drinks <= safe_limit * 2], ["Low Risk", "Moderate Risk"], "High Risk"),
+    }
+
+
+KERNELS = {
+    "tdee": tdee,
+    "macro": macro,
+    "water": water,
+    "bmi": bmi,
+    "bodyfat": bodyfat,
+    "ideal_weight": ideal_weight,
+    "calories_burned": calories_burned,
+    "stress": stress,
+    "bp": bp,
+    "diabetes": diabetes,
+    "sleep_debt": sleep_debt,
+    "alcohol": alcohol,
+}
+
+
+def _row_count(data):
+    lengths = {len(v) for v in data.values() if isinstance(v, list)}
+    if not lengths:
+        raise BatchError("Payload must contain at least one array column")
+    if len(lengths) > 1:
+        raise BatchError(f"All array columns must have the same length (got {sorted(lengths)})")
+    n = lengths.pop()
+    if n > MAX_ROWS:
+        raise BatchError(f"Too many rows ({n}); limit is {MAX_ROWS}")
+    return n
+
+
+def _column_to_list(values, ok):
+    if values.dtype == object:
+        return np.where(ok, values, None).tolist()
+    if values.dtype.kind in "biu":
+        return np.where(ok, values.astype(object), None).tolist()
+    values = values.astype(np.float64)
+    return np.where(ok & ~np.isnan(values), values, None).tolist()
+
+
+def run(tool, data):
+    if not isinstance(data, dict):
+        raise BatchError("Expected a JSON object of columns")
+    n = _row_count(data)
+    columns = Columns(tool, data, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = KERNELS[tool](columns)
+
+    ok = columns.error == None  # noqa: E711
+    result = {"tool": tool, "count": n, "valid": int(ok.sum()), "ok": ok.tolist(), "error": columns.error.tolist()}
+    for name, values in out.items():
+        result[name] = _column_to_list(np.broadcast_to(np.asarray(values), (n,)), ok)
+    return result
+
+
+# -------------------------
+# Streaming rows (CSV / NDJSON of any length)
+# -------------------------
+# Rows are read lazily from the request body, evaluated CHUNK_ROWS at a time
+# through the kernels above and written back as they complete, so memory
+# depends on the chunk size, not on the upload. Every result row has the same
+# keys (row number, echoed "id" column, ok, error, kernel outputs), so CSV
+# output can write its header before the first chunk is evaluated. Bytes
+# that are not UTF-8 are decoded as U+FFFD and their row is reported as
+# invalid, like a row csv or json cannot parse; only a CSV header that cannot
+# be read fails the request (BatchError, before the response starts).
+
+CHUNK_ROWS = 1000
+PASSTHROUGH = ("id",)
+
+
+NOT_UTF8 = "Row is not valid UTF-8"
+
+
+def _text(stream):
+    return io.TextIOWrapper(io.BufferedReader(stream), encoding="utf-8-sig", errors="replace", newline="")
+
+
+def read_csv(stream):
+    # -> rows: a dict, or the error message of a row that cannot be read
+    reader = csv.DictReader(_text(stream))
+    try:
+        header = reader.fieldnames  # read now, so a bad header is a 400
+    except csv.Error as e:
+        raise BatchError(f"CSV header cannot be read: {e}") from None
+    if header and any("\ufffd" in name for name in header):
+        raise BatchError("CSV header is not valid UTF-8")
+    return _csv_rows(reader)
+
+
+def _csv_rows(reader):
+    # blank cells count as missing, like absent JSON keys
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield f"Row is not valid CSV: {e}"
+            continue
+        if any("\ufffd" in v for v in row.values() if isinstance(v, str)):
+            yield NOT_UTF8
+            continue
+        yield {k: (v if v != "" else None) for k, v in row.items() if k is not None}
+
+
+def read_ndjson(stream):
+    for line in _text(stream):
+        if not line.strip():
+            continue
+        if "\ufffd" in line:
+            yield NOT_UTF8
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else "Row is not a JSON object"
+
+
+class _EmptyColumns(dict):
+    # every column present and zero rows long
+    def get(self, name, default=None):
+        return []
+
+
+@functools.lru_cache(maxsize=None)
+def output_names(tool):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return tuple(KERNELS[tool](Columns(tool, _EmptyColumns(), 0)))
+
+
+def _check_cells(row):
+    # a streamed row is one profile: a list or object cell is that row's
+    # error, not something for the column kernels to broadcast
+    if isinstance(row, dict):
+        for name, value in row.items():
+            if isinstance(value, (list, dict)):
+                return f"'{name}' must be a single value"
+    return row
+
+
+def _evaluate_chunk(tool, rows):
+    rows = [_check_cells(row) for row in rows]
+    valid = [row for row in rows if isinstance(row, dict)]
+    names = dict.fromkeys(name for row in valid for name in row)
+    data = {name: [row.get(name) for row in valid] for name in names}
+    try:
+        result = run(tool, data) if valid else None
+    except BatchError as e:
+        result = {"count": len(valid), "ok": [False] * len(valid), "error": [str(e)] * len(valid)}
+
+    outputs = output_names(tool)
+    i = 0
+    for row in rows:
+        out = dict.fromkeys(PASSTHROUGH)
+        if not isinstance(row, dict):
+            out.update(ok=False, error=row)
+            out.update(dict.fromkeys(outputs))
+        else:
+            out.update({name: row.get(name) for name in PASSTHROUGH})
+            out.update(ok=result["ok"][i], error=result["error"][i])
+            out.update({name: result[name][i] if name in result else None for name in outputs})
+            i += 1
+        yield out
+
+
+def stream(tool, rows, chunk_rows=CHUNK_ROWS):
+    # -> one result dict per input row, numbered from 0
+    n = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            return
+        for out in _evaluate_chunk(tool, chunk):
+            yield {"row": n, **out}
+            n += 1
+
+
+WRITE_BYTES = 16384  # response chunk size
+
+
+def _buffered(pieces):
+    buf = []
+    size = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= WRITE_BYTES:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def write_ndjson(results):
+    return _buffered(json.dumps(out, ensure_ascii=False) + "\n" for out in results)
+
+
+def _csv_lines(results):
+    line = io.StringIO()
+    writer = None
+    for out in results:
+        if writer is None:
+            writer = csv.DictWriter(line, fieldnames=list(out))
+            writer.writeheader()
+        writer.writerow(out)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+
+def write_csv(results):
+    return _buffered(_csv_lines(results))
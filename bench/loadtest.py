@@ -0,0 +1,312 @@
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import cache  # noqa: E402
+import calculators  # noqa: E402
+import foods  # noqa: E402
+
+
+# -------------------------
+# HTTP load test (`python bench/loadtest.py [-c 8] [-d 30] [--json run.json]`)
+# -------------------------
+# Boots the app the way the Procfile does (one gunicorn worker; the Flask dev
+# server when gunicorn is not installed, or an existing server via --url) and
+# replays a weighted mix of page views, form posts, permalinks, fragments,
+# /api/protein, / and /sitemap.xml from concurrent keep-alive clients with
+# realistic, seeded inputs. Reports requests/s, p50/p95/p99 latency and bytes
+# per response for every route; --json writes the same numbers for comparing
+# runs.
+
+MIX = {  # scenario -> share of requests
+    "shell": 30,      # GET /<tool>
+    "post": 15,       # POST /<tool> (303 to the permalink)
+    "permalink": 15,  # GET /<tool>/r/<token>
+    "fragment": 15,   # GET /<tool>/fragment?...
+    "api_protein": 8, # POST /api/protein
+    "index": 12,      # GET /
+    "sitemap": 5,     # GET /sitemap.xml
+}
+HEADERS = {"Accept-Encoding": "gzip, deflate, br", "User-Agent": "fitness-fixe-loadtest"}
+READY_TIMEOUT = 60
+
+# plausible ranges for numeric fields; optional fields not listed are left blank
+RANGES = {
+    "weight": (45, 110, 1), "height": (150, 195, 0), "height_cm": (150, 195, 0), "age": (18, 75, 0),
+    "waist_cm": (65, 115, 0), "neck_cm": (30, 45, 0), "hip_cm": (80, 120, 0), "duration": (10, 90, 0),
+    "coffee": (0, 4, 0), "alcohol": (0, 10, 0), "systolic": (95, 175, 0), "diastolic": (60, 110, 0),
+    "fasting": (70, 160, 0), "postmeal": (90, 240, 0), "avg": (4, 9, 1), "days": (3, 14, 0),
+    "drinks": (0, 25, 0), "work": (0, 10, 0), "sleep": (0, 10, 0), "screen": (0, 10, 0),
+    "exercise": (0, 10, 0), "meditation": (0, 10, 0), "social": (0, 10, 0),
+}
+
+
+# --- Workload ---
+class Workload:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.tools = list(calculators.TOOLS)
+        self.foods = {table: foods.index(table).names for table in foods.TABLES}
+        self.scenarios = list(MIX)
+        self.weights = list(MIX.values())
+
+    def values(self, tool):
+        rng = self.rng
+        values = {}
+        for field in calculators.TOOLS[tool].fields:
+            if field.type is calculators.ITEMS:
+                table = "protein" if tool == "protein" else "sugar"
+                values[field.name] = [
+                    (rng.choice(self.foods[table]), rng.choice([1, 2, 50, 100, 200]))
+                    for _ in range(rng.randint(1, 4))
+                ]
+            elif field.type is calculators.TIME:
+                values[field.name] = f"{rng.choice([21, 22, 23, 0, 6, 7])}:{rng.choice(['00', '15', '30', '45'])}".zfill(5)
+            elif field.choices:
+                values[field.name] = rng.choice(field.choices)
+            elif field.name in RANGES:
+                low, high, places = RANGES[field.name]
+                number = round(rng.uniform(low, high), places)
+                values[field.name] = str(int(number) if places == 0 or field.type is int else number)
+        return values
+
+    @staticmethod
+    def form(values):
+        pairs = []
+        for name, value in values.items():
+            if isinstance(value, list):
+                for item, qty in value:
+                    pairs += [("item", item), ("quantity", str(qty))]
+            else:
+                pairs.append((name, value))
+        return urllib.parse.urlencode(pairs)
+
+    def next(self):
+        # -> (route label, method, path, body, extra headers)
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        tool = self.rng.choice(self.tools)
+        if scenario == "index":
+            return "GET /", "GET", "/", None, {}
+        if scenario == "sitemap":
+            return "GET /sitemap.xml", "GET", "/sitemap.xml", None, {}
+        if scenario == "api_protein":
+            values = self.values("protein")
+            body = dict(values, items=[{"item": item, "quantity": qty} for item, qty in values["items"]])
+            return "POST /api/protein", "POST", "/api/protein", json.dumps(body), {"Content-Type": "application/json"}
+        if scenario == "shell":
+            return f"GET /{tool}", "GET", f"/{tool}", None, {}
+        values = self.values(tool)
+        if scenario == "post":
+            form = {"Content-Type": "application/x-www-form-urlencoded"}
+            return f"POST /{tool}", "POST", f"/{tool}", self.form(values), form
+        if scenario == "fragment":
+            return f"GET /{tool}/fragment", "GET", f"/{tool}/fragment?{self.form(values)}", None, {}
+        source = dict(values, items=[{"item": i, "quantity": q} for i, q in values.get("items", [])])
+        try:
+            token = calculators.encode_token(cache.canonical_record(calculators.TOOLS[tool].parse(source)))
+        except calculators.ValidationError:
+            return f"GET /{tool}", "GET", f"/{tool}", None, {}
+        return f"GET /{tool}/r/<token>", "GET", f"/{tool}/r/{token}", None, {}
+
+
+# --- Clients ---
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}  # route -> list of (latency s, bytes, status)
+        self.failures = 0
+
+    def add(self, route, latency, size, status):
+        with self.lock:
+            self.samples.setdefault(route, []).append((latency, size, status))
+
+    def fail(self):
+        with self.lock:
+            self.failures += 1
+
+
+def _client(host, port, seed, deadline, warmup_until, recorder):
+    workload = Workload(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        route, method, path, body, extra = workload.next()
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers={**HEADERS, **extra})
+            response = conn.getresponse()
+            size = len(response.read())
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            recorder.fail()
+            continue
+        if started >= warmup_until:
+            recorder.add(route, time.perf_counter() - started, size, response.status)
+    conn.close()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1  # nearest rank
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def summarize(recorder, duration):
+    routes = {}
+    for route, samples in sorted(recorder.samples.items()):
+        latencies = sorted(s[0] for s in samples)
+        routes[route] = {
+            "requests": len(samples),
+            "rps": round(len(samples) / duration, 2),
+            "errors": sum(1 for s in samples if s[2] >= 500),
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "bytes": round(sum(s[1] for s in samples) / len(samples)),
+        }
+    everything = sorted(s[0] for samples in recorder.samples.values() for s in samples)
+    total = {
+        "requests": len(everything),
+        "rps": round(len(everything) / duration, 2),
+        "errors": sum(r["errors"] for r in routes.values()) + recorder.failures,
+        "p50_ms": round(_percentile(everything, 50) * 1000, 2),
+        "p95_ms": round(_percentile(everything, 95) * 1000, 2),
+        "p99_ms": round(_percentile(everything, 99) * 1000, 2),
+    }
+    return {"total": total, "routes": routes}
+
+
+# --- Server ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _procfile_command():
+    with open(os.path.join(ROOT_DIR, "Procfile"), encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("web:"):
+                return shlex.split(line[len("web:"):])
+    return ["gunicorn", "app:app"]
+
+
+def start_server(kind, port):
+    if kind == "auto":
+        try:
+            import gunicorn  # noqa: F401
+            kind = "gunicorn"
+        except ImportError:
+            print("gunicorn is not installed; using the Flask dev server (numbers are not comparable)", file=sys.stderr)
+            kind = "flask"
+    if kind == "gunicorn":
+        command = _procfile_command() + ["--bind", f"127.0.0.1:{port}", "--workers", "1"]
+    else:
+        command = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--no-reload", "--no-debugger"]
+    process = subprocess.Popen(command, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return kind, process
+
+
+def wait_ready(host, port, process=None):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/sitemap.xml")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on {host}:{port} did not become ready in {READY_TIMEOUT}s")
+
+
+def _print_table(result, out=sys.stdout):
+    header = f"{'route':34} {'reqs':>7} {'req/s':>8} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'bytes':>8}"
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, r in rows:
+        print(
+            f"{route:34} {r['requests']:>7} {r['rps']:>8.1f} {r['errors']:>5} {r['p50_ms']:>8.2f} "
+            f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r.get('bytes', ''):>8}",
+            file=out,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test every route of the app")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("-d", "--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds discarded at the start")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "flask"), default="auto", help="how to boot the app")
+    parser.add_argument("--url", help="test a running server instead of booting one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.url:
+        parsed = urllib.parse.urlsplit(args.url)
+        host, port, server = parsed.hostname, parsed.port or 80, args.url
+    else:
+        host, port = "127.0.0.1", _free_port()
+        server, process = start_server(args.server, port)
+    try:
+        wait_ready(host, port, process)
+        recorder = Recorder()
+        start = time.perf_counter()
+        warmup_until = start + args.warmup
+        deadline = warmup_until + args.duration
+        threads = [
+            threading.Thread(target=_client, args=(host, port, args.seed + i, deadline, warmup_until, recorder))
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    result = summarize(recorder, args.duration)
+    result["meta"] = {
+        "server": server,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "seed": args.seed,
+        "mix": MIX,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    _print_table(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import calculators  # noqa: E402
+import foods  # noqa: E402
+
+
+# -------------------------
+# Micro-benchmarks (`python bench/micro.py [--check | --save] [-k bodyfat]`)
+# -------------------------
+# Times each calculator's compute core on a fixed input, the shared formulas,
+# the sleep strptime/timedelta paths, the protein/sugar line-item loops at
+# 10/100/1000 items and the Jinja render of every result partial, in
+# isolation from Flask and the network. A kernel runs enough loops for one
+# repeat to take about TARGET_S and is timed REPEAT times per round; ROUNDS
+# passes over all kernels are interleaved, so a burst of load on the machine
+# lands in one round rather than on one kernel.
+#
+# bench/baseline.json holds the committed numbers: per kernel, the median of
+# its round medians. --check exits with status 1 when a kernel is more than
+# --max-regression percent (default 10) above that in every round, i.e. the
+# regression has to repeat; the best single repeat is shown but not gated,
+# as one lucky repeat moves it far more than the median. After an intended
+# change, re-run with --save on the machine the gate runs on: timings from
+# another CPU or Python version are not comparable.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+REPEAT = 5
+ROUNDS = 5
+TARGET_S = 0.02
+MAX_REGRESSION = 10.0  # percent
+ITEM_COUNTS = (10, 100, 1000)
+
+# one representative input per calculator, as a JSON body
+SAMPLES = {
+    "protein": {"weight": 70, "goal": "maintenance", "items": [{"item": "Paneer", "quantity": 200}]},
+    "tdee": {"weight": 70, "height": 175, "age": 30, "gender": "male", "activity": "moderate"},
+    "macro": {"age": 30, "gender": "male", "height": 175, "weight": 70, "activity": "moderate", "goal": "cut"},
+    "water": {"weight": 70, "activity": "moderate", "climate": "hot", "coffee": 2, "alcohol": 1},
+    "sugar": {"age": 30, "gender": "female", "weight": 60, "items": [{"item": "Honey", "quantity": 20}]},
+    "bmi": {"weight": 70, "unit": "cm", "height_cm": 175, "gender": "male"},
+    "bodyfat": {"age": 30, "gender": "male", "weight": 80, "unit": "cm", "height_cm": 178, "waist_cm": 88, "neck_cm": 38},
+    "ideal_weight": {"gender": "female", "unit": "cm", "height_cm": 165, "weight": 62},
+    "calories_burned": {"weight": 70, "duration": 45, "exercise": "Cycling (moderate)"},
+    "stress": {"work": 7, "sleep": 5, "screen": 8, "exercise": 3, "meditation": 2, "social": 4},
+    "bp": {"systolic": 132, "diastolic": 85, "age": 45, "history": "yes"},
+    "diabetes": {"fasting": 105, "postmeal": 150, "age": 45, "bmi": 27.5, "family": "yes", "activity": "moderate"},
+    "sleep": {"bedtime": "23:15", "wakeup": "06:45"},
+    "sleep_debt": {"avg": 6.2, "age": 30, "days": 7},
+    "alcohol": {"drinks": 9, "gender": "male", "weight": 80, "pattern": "binge"},
+}
+
+# extra inputs for branches the samples above do not take
+VARIANTS = {
+    "bodyfat[female]": ("bodyfat", {"age": 30, "gender": "female", "weight": 62, "unit": "cm", "height_cm": 165,
+                                    "waist_cm": 74, "neck_cm": 32, "hip_cm": 98}),
+    "bodyfat[imperial]": ("bodyfat", {"age": 30, "gender": "male", "weight": 80, "unit": "imperial", "height_ft": 5,
+                                      "height_in": 10, "waist_in": 34.5, "neck_in": 15}),
+    "ideal_weight[imperial]": ("ideal_weight", {"gender": "male", "unit": "imperial", "height_ft": 5, "height_in": 10}),
+    "sleep[bedtime]": ("sleep", {"bedtime": "23:15"}),
+    "sleep[wakeup]": ("sleep", {"wakeup": "06:45"}),
+}
+
+
+# --- Kernels ---
+def _record(tool, source):
+    return calculators.TOOLS[tool].parse(source)
+
+
+def _compute(tool, source):
+    compute, record = calculators.TOOLS[tool].compute, _record(tool, source)
+    return lambda: compute(record)
+
+
+def _line_items(table, count):
+    # cycles through the food list so every lookup is a real name
+    names = foods.index(table).names
+    return [{"item": names[i * 7 % len(names)], "quantity": 50 + i % 4 * 50} for i in range(count)]
+
+
+def kernels():
+    # -> {name: zero-argument callable}, in report order
+    import app as webapp  # render kernels use the app's Jinja environment and globals
+
+    found = {"formula/bmr_mifflin": lambda: calculators.bmr_mifflin(70.0, 175.0, 30, "male")}
+    for tool, source in SAMPLES.items():
+        found[f"compute/{tool}"] = _compute(tool, source)
+    for name, (tool, source) in VARIANTS.items():
+        found[f"compute/{name}"] = _compute(tool, source)
+    for tool, base in (("protein", SAMPLES["protein"]), ("sugar", SAMPLES["sugar"])):
+        for count in ITEM_COUNTS:
+            found[f"compute/{tool}[{count} items]"] = _compute(tool, dict(base, items=_line_items(tool, count)))
+    for tool, source in SAMPLES.items():
+        record = _record(tool, source)
+        context = {
+            "result": calculators.TOOLS[tool].compute(record),
+            "permalink": f"/{tool}/r/{calculators.encode_token(record)}",
+        }
+        template = webapp.app.jinja_env.get_template(f"partials/{tool}_result.html")
+        found[f"render/{tool}"] = lambda template=template, context=context: template.render(context)
+    return found
+
+
+# --- Timing ---
+def measure(fn, repeat=REPEAT, target=TARGET_S):
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= target / 10:
+            break
+        number *= 10
+    number = max(1, round(number * target / elapsed))
+    times = sorted(t / number for t in timer.repeat(repeat, number))
+    return {"ns": round(times[0] * 1e9, 1), "median_ns": round(statistics.median(times) * 1e9, 1), "loops": number}
+
+
+def measure_rounds(selected, rounds=ROUNDS, repeat=REPEAT, target=TARGET_S):
+    # -> {name: {"ns": best repeat, "median_ns": median of the round medians,
+    #            "min_median_ns": fastest round median, "loops": ...}}
+    runs = {name: [] for name in selected}
+    for _ in range(rounds):
+        for name, fn in selected.items():
+            runs[name].append(measure(fn, repeat, target))
+    return {
+        name: {
+            "ns": min(r["ns"] for r in results),
+            "median_ns": round(statistics.median(r["median_ns"] for r in results), 1),
+            "min_median_ns": min(r["median_ns"] for r in results),
+            "loops": results[-1]["loops"],
+        }
+        for name, results in runs.items()
+    }
+
+
+def _meta():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = {"meta": _meta(), "kernels": {name: {"ns": r["ns"], "median_ns": r["median_ns"]} for name, r in results.items()}}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def _change(result, base, key="median_ns"):
+    # percent slower (+) or faster (-) than the baseline's median time
+    return (result[key] / base["median_ns"] - 1) * 100 if base and base.get("median_ns") else None
+
+
+def _format_ns(ns):
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def _print_row(name, result, base, limit, out=sys.stdout):
+    change = _change(result, base)
+    if change is None:
+        verdict = "new"
+    else:
+        verdict = f"{change:+.1f}%" + ("  REGRESSED" if _change(result, base, "min_median_ns") > limit else "")
+    baseline = _format_ns(base["median_ns"]) if base and base.get("median_ns") else "-"
+    print(f"{name:34} {_format_ns(result['ns']):>10} {_format_ns(result['median_ns']):>10} {baseline:>10}  {verdict}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the calculator kernels")
+    parser.add_argument("-k", metavar="PATTERN", help="only kernels whose name matches this regex")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed repeats per kernel and round")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="interleaved passes over all kernels")
+    parser.add_argument("--target", type=float, default=TARGET_S, help="seconds per repeat")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="exit 1 when a kernel regressed against the baseline")
+    mode.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=MAX_REGRESSION, metavar="PCT",
+                        help="allowed slowdown in percent for --check")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    selected = kernels()
+    if args.k:
+        pattern = re.compile(args.k)
+        selected = {name: fn for name, fn in selected.items() if pattern.search(name)}
+    if args.save and args.k:
+        parser.error("--save records every kernel; drop -k")
+
+    baseline = None if args.save else load_baseline(args.baseline)
+    if args.check and baseline is None:
+        parser.error(f"no baseline at {args.baseline}; create one with --save")
+    if baseline is not None:
+        base_meta, meta = baseline["meta"], _meta()
+        for key in ("python", "implementation", "machine", "processor"):
+            if base_meta.get(key) != meta[key]:
+                print(f"warning: baseline {key} is {base_meta.get(key)!r}, this run {meta[key]!r}", file=sys.stderr)
+    bases = baseline["kernels"] if baseline else {}
+
+    results = measure_rounds(selected, max(1, args.rounds), args.repeat, args.target)
+    print(f"{'kernel':34} {'best':>10} {'median':>10} {'baseline':>10}  change (median)")
+    print("-" * 80)
+    regressed = []
+    for name, result in results.items():
+        base = bases.get(name)
+        change = _change(result, base, "min_median_ns")  # over the limit in every round
+        if args.check and change is not None and change > args.max_regression:
+            regressed.append(name)
+        _print_row(name, result, base, args.max_regression)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": _meta(), "kernels": results}, f, indent=2)
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+    if regressed:
+        print(f"{len(regressed)} kernel(s) regressed by more than {args.max_regression:g}%: {', '.join(regressed)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
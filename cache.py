@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional; pages are then offered gzip-only
+    brotli = None
+
+
+# -------------------------
+# Content-addressed result cache
+# -------------------------
+# Calculators are pure functions of their input record, so a result can be
+# keyed by a digest of the canonicalized input. Canonicalizing rounds floats
+# to 2 dp, so "70", "70.0" and "70.001" kg all share one entry; the result is
+# always computed from the canonical record, so a hit and a miss for the same
+# key return identical output.
+
+FLOAT_PLACES = 2
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 4096))
+PAGE_CACHE_SIZE = int(os.environ.get("PAGE_CACHE_SIZE", 512))
+
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return value
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+def canonical(value):
+    if isinstance(value, float):
+        return round(value, FLOAT_PLACES) + 0.0  # + 0.0 folds -0.0 into 0.0
+    if isinstance(value, tuple):
+        return tuple(canonical(v) for v in value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def canonical_record(record):
+    return type(record)(**{name: canonical(getattr(record, name)) for name in record.__slots__})
+
+
+def digest(tool, record):
+    return hashlib.blake2b(repr((tool, record.astuple())).encode("utf-8"), digest_size=16).hexdigest()
+
+
+# -------------------------
+# Rendered pages with precompressed variants
+# -------------------------
+# A page is encoded once when it enters the cache, so serving it is a dict
+# lookup whatever the client accepts. Each encoding gets its own strong ETag.
+
+MIN_COMPRESS_BYTES = 512
+
+
+class Page:
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, body, best=False):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.encoded = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body, quality=11 if best else 5)
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+    def select(self, accept_encodings):
+        # -> (content encoding or None, body, etag)
+        for encoding in ("br", "gzip"):
+            data = self.encoded.get(encoding)
+            if data is not None and len(data) < len(self.body) and accept_encodings[encoding]:
+                return encoding, data, f"{self.etag}-{encoding}"
+        return None, self.body, self.etag
+
+
+RESULTS = LRUCache(RESULT_CACHE_SIZE)  # (tool, digest) -> result dict
+PAGES = LRUCache(PAGE_CACHE_SIZE)      # (template, digest) -> Page with a result
+SHELLS = LRUCache(64)                  # template -> Page of a GET page without input
+
+
+def stats():
+    return {"results": RESULTS.stats(), "pages": PAGES.stats(), "shells": SHELLS.stats()}
@@ -0,0 +1,1161 @@
+import base64
+import json
+import math
+import re
+from datetime import datetime, timedelta
+
+import foods
+
+
+# -------------------------
+# Pure compute core shared by the HTML forms and the JSON API
+# -------------------------
+# Every calculator is a side-effect-free function of a typed input record.
+# The records are parsed from either a form/query MultiDict or a JSON dict
+# by a validator compiled once at import from the field list.
+
+
+class ValidationError(ValueError):
+    pass
+
+
+# -------------------------
+# Shared constants
+# -------------------------
+GENDERS = ("male", "female")
+ACTIVITY_FACTORS = {"sedentary": 1.2, "light": 1.375, "moderate": 1.55, "active": 1.725, "very_active": 1.9}
+WATER_ACTIVITY_ML = {"low": 30, "moderate": 35, "high": 40}
+PROTEIN_GOAL_FACTORS = {"fat-loss": 1.6, "maintenance": 1.8, "muscle-gain": 2.0}
+MACRO_GOAL_ADJUST = {"cut": -500, "maintain": 0, "bulk": 300}
+MACRO_SPLIT = {"protein": 0.25, "carbs": 0.50, "fat": 0.25}
+METS = {
+    "Running (6 mph / 10 km/h)": 9.8,
+    "Running (8 mph / 12.8 km/h)": 11.8,
+    "Cycling (moderate)": 7.5,
+    "Cycling (vigorous)": 10,
+    "Swimming (moderate)": 6,
+    "Swimming (vigorous)": 9.5,
+    "Walking (4 km/h)": 3.5,
+    "Walking (6 km/h)": 4.8,
+    "Yoga": 2.5,
+    "HIIT / CrossFit": 8,
+    "Weight Training": 6,
+    "Dancing": 5.5,
+}
+IDEAL_WEIGHT_COEFFS = {
+    # formula: (male base, male slope, female base, female slope) per inch over 5 ft
+    "Devine": (50, 2.3, 45.5, 2.3),
+    "Hamwi": (48.0, 2.7, 45.5, 2.2),
+    "Miller": (56.2, 1.41, 53.1, 1.36),
+    "Robinson": (52, 1.9, 49, 1.7),
+}
+BP_ORDER = ["Hypertensive Crisis", "High BP Stage 2", "High BP Stage 1", "Elevated", "Normal", "Hypotension"]
+
+
+# -------------------------
+# Input records & schema compiler
+# -------------------------
+ITEMS = "items"  # field type: list of (food name, quantity) line items
+TIME = "time"    # field type: "HH:MM" string
+
+_TIME_RE = re.compile(r"^([01]\d|2[0-3]):[0-5]\d$")
+
+
+class Record:
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash((type(self), self.astuple()))
+
+    def __repr__(self):
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({args})"
+
+
+class Field:
+    __slots__ = ("name", "type", "required", "default", "choices")
+
+    def __init__(self, name, type=float, required=True, default=None, choices=None):
+        self.name = name
+        self.type = type
+        self.required = required and default is None
+        self.default = default
+        self.choices = tuple(choices) if choices else None
+
+
+def _coerce_number(name, kind, value):
+    if isinstance(value, bool):
+        raise ValidationError(f"'{name}' must be a number")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"'{name}' must be a number") from None
+    if not math.isfinite(number):
+        raise ValidationError(f"'{name}' must be a number")
+    return int(number) if kind is int else number
+
+
+def _coerce_items(name, source, is_form):
+    if is_form:
+        names = source.getlist("item")
+        quantities = source.getlist("quantity")
+        pairs = [(item, quantities[i] if i < len(quantities) else None) for i, item in enumerate(names)]
+    else:
+        entries = source.get(name) or []
+        if not isinstance(entries, list):
+            raise ValidationError(f"'{name}' must be a list")
+        pairs = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                raise ValidationError(f"'{name}' entries must be objects with 'item' and 'quantity'")
+            pairs.append((entry.get("item"), entry.get("quantity")))
+
+    items = []
+    for item, qty in pairs:
+        qty = _coerce_number("quantity", float, qty) if qty not in (None, "") else 0.0
+        if qty < 0:
+            raise ValidationError("'quantity' must not be negative")
+        if item is None:
+            item = ""
+        elif isinstance(item, bool) or not isinstance(item, int):
+            item = str(item)  # JSON integers stay food ids, everything else is a name
+        items.append((item, qty))
+    return tuple(items)
+
+
+def _compile_field(field):
+    name, kind, required, default, choices = field.name, field.type, field.required, field.default, field.choices
+
+    if kind is ITEMS:
+        return lambda source, is_form: _coerce_items(name, source, is_form)
+
+    def convert(source, is_form):
+        value = source.get(name)
+        if value is None or value == "":
+            if required:
+                raise ValidationError(f"'{name}' is required")
+            return default
+        if kind is float or kind is int:
+            return _coerce_number(name, kind, value)
+        value = str(value).strip()
+        if kind is TIME and not _TIME_RE.match(value):
+            raise ValidationError(f"'{name}' must be a time in HH:MM format")
+        if choices and value not in choices:
+            raise ValidationError(f"'{name}' must be one of: {', '.join(choices)}")
+        return value
+
+    return convert
+
+
+def compile_schema(record_cls, fields):
+    names = tuple(f.name for f in fields)
+    if names != record_cls.__slots__:
+        raise TypeError(f"{record_cls.__name__} slots {record_cls.__slots__} do not match schema {names}")
+    converters = tuple((f.name, _compile_field(f)) for f in fields)
+
+    def parse(source):
+        if source is None:
+            raise ValidationError("No input provided")
+        is_form = hasattr(source, "getlist")
+        return record_cls(**{name: convert(source, is_form) for name, convert in converters})
+
+    return parse
+
+
+class Tool:
+    __slots__ = ("name", "record", "fields", "parse", "compute")
+
+    def __init__(self, name, record, fields, compute):
+        self.name = name
+        self.record = record
+        self.fields = tuple(fields)
+        self.parse = compile_schema(record, self.fields)
+        self.compute = compute
+
+
+TOOLS = {}
+
+
+def tool(name, record, fields):
+    def register(compute):
+        TOOLS[name] = Tool(name, record, fields, compute)
+        return compute
+    return register
+
+
+def run(name, source):
+    calc = TOOLS[name]
+    return calc.compute(calc.parse(source))
+
+
+# -------------------------
+# Permalink tokens
+# -------------------------
+# A record's values in schema order as compact JSON, base64url-encoded without
+# padding, e.g. BmiInput(weight=70, unit="cm", height_cm=175, gender="male")
+# -> [70,"cm",175,null,null,"male"] -> "WzcwLCJjbSIsMTc1LG51bGwsbnVsbCwibWFsZSJd".
+# Decoding goes back through the tool's normal validator.
+
+MAX_TOKEN_LENGTH = 2048
+
+
+def _compact(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, tuple):
+        return [_compact(v) for v in value]
+    return value
+
+
+def encode_token(record):
+    values = [_compact(v) for v in record.astuple()]
+    while values and values[-1] is None:
+        values.pop()
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_token(name, token):
+    calc = TOOLS[name]
+    invalid = ValidationError("Invalid or outdated result link")
+    if len(token) > MAX_TOKEN_LENGTH:
+        raise invalid
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except ValueError:
+        raise invalid from None
+    if not isinstance(values, list) or len(values) > len(calc.fields):
+        raise invalid
+
+    source = {}
+    for field, value in zip(calc.fields, values):
+        if field.type is ITEMS and value is not None:
+            if not isinstance(value, list) or not all(isinstance(p, list) and len(p) == 2 for p in value):
+                raise invalid
+            value = [{"item": item, "quantity": qty} for item, qty in value]
+        source[field.name] = value
+    return calc.parse(source)
+
+
+# -------------------------
+# Shared formulas
+# -------------------------
+def bmr_mifflin(weight, height, age, gender):
+    # Mifflin-St Jeor Equation (BMR)
+    if gender == "male":
+        return 10 * weight + 6.25 * height - 5 * age + 5
+    return 10 * weight + 6.25 * height - 5 * age - 161
+
+
+def height_to_cm(unit, height_cm, height_ft, height_in):
+    if unit == "imperial":
+        return round(((height_ft or 0) * 12 + (height_in or 0)) * 2.54, 2)
+    return height_cm or 0
+
+
+# --- Protein Requirement ---
+class ProteinInput(Record):
+    __slots__ = ("weight", "goal", "items")
+    weight: float
+    goal: str
+    items: tuple
+
+
+@tool("protein", ProteinInput, [
+    Field("weight"),
+    Field("goal", str, default="maintenance", choices=PROTEIN_GOAL_FACTORS),
+    Field("items", ITEMS),
+])
+def compute_protein(inp):
+    total_protein, breakdown, unmatched = foods.index("protein").evaluate(inp.items)
+    target = round(inp.weight * PROTEIN_GOAL_FACTORS.get(inp.goal, 1.8), 1)
+
+    return {
+        "total_protein": round(total_protein, 2),
+        "target": target,
+        "status": "Good" if total_protein >= target else "Low",
+        "breakdown": breakdown,
+        "unmatched": unmatched,
+    }
+
+
+# --- TDEE / Daily Calorie Calculator ---
+class TdeeInput(Record):
+    __slots__ = ("weight", "height", "age", "gender", "activity")
+    weight: float
+    height: float
+    age: int
+    gender: str
+    activity: str
+
+
+@tool("tdee", TdeeInput, [
+    Field("weight"),
+    Field("height"),
+    Field("age", int),
+    Field("gender", str, choices=GENDERS),
+    Field("activity", str, default="sedentary", choices=ACTIVITY_FACTORS),
+])
+def compute_tdee(inp):
+    bmr = bmr_mifflin(inp.weight, inp.height, inp.age, inp.gender)
+    tdee_val = round(bmr * ACTIVITY_FACTORS.get(inp.activity, 1.2), 0)
+    return {
+        "bmr": round(bmr, 1),
+        "tdee": tdee_val,
+        "activity": inp.activity.replace("_", " ").title(),
+    }
+
+
+# --- Macro Split Calculator ---
+class MacroInput(Record):
+    __slots__ = ("age", "gender", "height", "weight", "activity", "goal")
+    age: int
+    gender: str
+    height: float
+    weight: float
+    activity: str
+    goal: str
+
+
+@tool("macro", MacroInput, [
+    Field("age", int),
+    Field("gender", str, choices=GENDERS),
+    Field("height"),
+    Field("weight"),
+    Field("activity", str, default="sedentary", choices=ACTIVITY_FACTORS),
+    Field("goal", str, default="maintain", choices=MACRO_GOAL_ADJUST),
+])
+def compute_macro(inp):
+    bmr = bmr_mifflin(inp.weight, inp.height, inp.age, inp.gender)
+    calories = bmr * ACTIVITY_FACTORS.get(inp.activity, 1.2) + MACRO_GOAL_ADJUST.get(inp.goal, 0)
+
+    # --- Macro split (25/50/25) ---
+    split = MACRO_SPLIT
+    return {
+        "calories": round(calories),
+        "protein": round((calories * split["protein"]) / 4, 1),
+        "carbs": round((calories * split["carbs"]) / 4, 1),
+        "fat": round((calories * split["fat"]) / 9, 1),
+        "protein_pct": int(split["protein"] * 100),
+        "carbs_pct": int(split["carbs"] * 100),
+        "fat_pct": int(split["fat"] * 100),
+    }
+
+
+# --- Water Intake Calculator ---
+class WaterInput(Record):
+    __slots__ = ("weight", "activity", "climate", "coffee", "alcohol")
+    weight: float
+    activity: str
+    climate: str
+    coffee: int
+    alcohol: int
+
+
+@tool("water", WaterInput, [
+    Field("weight"),
+    Field("activity", str, default="moderate", choices=WATER_ACTIVITY_ML),
+    Field("climate", str, default="normal", choices=("normal", "cool", "hot")),
+    Field("coffee", int, default=0),
+    Field("alcohol", int, default=0),
+])
+def compute_water(inp):
+    # --- Base requirement (ml per kg) ---
+    water_ml = inp.weight * WATER_ACTIVITY_ML.get(inp.activity, 35)
+
+    # --- Climate adjustment ---
+    if inp.climate == "hot":
+        water_ml += 500
+    elif inp.climate == "cool":
+        water_ml -= 250
+
+    # --- Coffee & alcohol adjustment ---
+    water_ml += inp.coffee * 100   # +100 ml per cup coffee
+    water_ml += inp.alcohol * 150  # +150 ml per drink
+
+    liters = round(water_ml / 1000, 2)
+
+    if liters < 2:
+        advice = "Hydration is on the lower side. Ensure at least 2 L daily."
+    elif 2 <= liters <= 3.5:
+        advice = "Good hydration target. Spread intake evenly throughout the day."
+    else:
+        advice = "High hydration need — make sure to drink frequently, especially around workouts."
+
+    distribution = [
+        ("Morning", round(liters * 0.25, 2)),
+        ("Midday", round(liters * 0.35, 2)),
+        ("Evening", round(liters * 0.25, 2)),
+        ("Workout", round(liters * 0.15, 2)),
+    ]
+
+    return {
+        "liters": liters,
+        "recommendation": f"{liters} L per day",
+        "advice": advice,
+        "distribution": distribution,
+        "activity": inp.activity,
+        "climate": inp.climate,
+        "coffee": inp.coffee,
+        "alcohol": inp.alcohol,
+    }
+
+
+# --- Sugar Calculator ---
+class SugarInput(Record):
+    __slots__ = ("age", "gender", "weight", "items")
+    age: int
+    gender: str
+    weight: float
+    items: tuple
+
+
+@tool("sugar", SugarInput, [
+    Field("age", int),
+    Field("gender", str, choices=GENDERS),
+    Field("weight"),
+    Field("items", ITEMS),
+])
+def compute_sugar(inp):
+    total_sugar, breakdown, unmatched = foods.index("sugar").evaluate([(item, qty) for item, qty in inp.items if qty > 0])
+
+    # --- WHO guideline ---
+    daily_calories = max(inp.weight * 30, 1500)  # avoid division by zero
+    max_safe = round((0.05 * daily_calories) / 4, 1)
+    max_limit = round((0.10 * daily_calories) / 4, 1)
+
+    if total_sugar <= max_safe:
+        status = "✅ Safe"
+        advice = "Excellent — within WHO ideal limit (<5% of daily calories)."
+    elif total_sugar <= max_limit:
+        status = "⚠️ Moderate"
+        advice = "Within 10% safe upper limit. Try cutting down a little."
+    else:
+        status = "❌ High Risk"
+        advice = "Too much sugar — linked with obesity, diabetes, and heart risk."
+
+    return {
+        "total_sugar": round(total_sugar, 1),
+        "max_safe": max_safe,
+        "max_limit": max_limit,
+        "sugar_pct": round((total_sugar * 4 / daily_calories) * 100, 1),
+        "status": status,
+        "advice": advice,
+        "breakdown": breakdown,
+        "unmatched": unmatched,
+    }
+
+
+# --- BMI Calculator with dynamic scale ---
+class BmiInput(Record):
+    __slots__ = ("weight", "unit", "height_cm", "height_ft", "height_in", "gender")
+    weight: float
+    unit: str
+    height_cm: float
+    height_ft: float
+    height_in: float
+    gender: str
+
+
+@tool("bmi", BmiInput, [
+    Field("weight"),
+    Field("unit", str, default="cm", choices=("cm", "imperial")),
+    Field("height_cm", required=False),
+    Field("height_ft", required=False),
+    Field("height_in", required=False),
+    Field("gender", str, default="male", choices=GENDERS),
+])
+def compute_bmi(inp):
+    height_m = height_to_cm(inp.unit, inp.height_cm, inp.height_ft, inp.height_in) / 100.0
+    bmi_val = round(inp.weight / (height_m ** 2), 1) if height_m > 0 else 0
+
+    # --- Category (WHO) ---
+    if bmi_val < 18.5:
+        category = "Underweight"
+        advice = "You may need to gain some weight for health."
+    elif bmi_val < 25:
+        category = "Normal"
+        advice = "Good job! Maintain your lifestyle."
+    elif bmi_val < 30:
+        category = "Overweight"
+        advice = "Consider balanced diet & exercise."
+    else:
+        category = "Obese"
+        advice = "High risk — take action with structured plan."
+
+    # --- Dynamic scale thresholds ---
+    min_bmi, max_bmi = 15, 40
+    thresholds = [18.5, 24.9, 29.9, max_bmi]
+
+    denom = max_bmi - min_bmi
+    segs = []
+    last = min_bmi
+    for t in thresholds:
+        segs.append(round(max(0, ((t - last) / denom) * 100), 2))
+        last = t
+
+    pointer_pct = max(0, min(100, round(((bmi_val - min_bmi) / denom) * 100, 2)))
+
+    return {
+        "bmi": bmi_val,
+        "category": category,
+        "advice": advice,
+        "scale": {
+            "segments": segs,  # [under, normal, overweight, obese]
+            "pointer_pct": pointer_pct,
+            "min_bmi": min_bmi,
+            "thresholds": thresholds,
+        }
+    }
+
+
+# --- Body Fat % Estimator (with dynamic scale) ---
+class BodyfatInput(Record):
+    __slots__ = ("age", "gender", "weight", "unit", "height_cm", "height_ft", "height_in",
+                 "waist_cm", "neck_cm", "hip_cm", "waist_in", "neck_in", "hip_in")
+    age: int
+    gender: str
+    weight: float
+    unit: str
+    height_cm: float
+    height_ft: float
+    height_in: float
+    waist_cm: float
+    neck_cm: float
+    hip_cm: float
+    waist_in: float
+    neck_in: float
+    hip_in: float
+
+
+@tool("bodyfat", BodyfatInput, [
+    Field("age", int),
+    Field("gender", str, choices=GENDERS),
+    Field("weight"),
+    Field("unit", str, default="cm", choices=("cm", "imperial")),
+    Field("height_cm", required=False),
+    Field("height_ft", required=False),
+    Field("height_in", required=False),
+    Field("waist_cm", required=False),
+    Field("neck_cm", required=False),
+    Field("hip_cm", required=False),
+    Field("waist_in", required=False),
+    Field("neck_in", required=False),
+    Field("hip_in", required=False),
+])
+def compute_bodyfat(inp):
+    gender, weight = inp.gender, inp.weight
+    height_cm = height_to_cm(inp.unit, inp.height_cm, inp.height_ft, inp.height_in)
+    height_m = height_cm / 100.0 if height_cm > 0 else 0
+
+    # --- Circumferences (cm) ---
+    if inp.unit == "imperial":
+        waist, neck, hip = (v * 2.54 if v is not None else None for v in (inp.waist_in, inp.neck_in, inp.hip_in))
+    else:
+        waist, neck, hip = inp.waist_cm, inp.neck_cm, inp.hip_cm
+
+    # --- Method 1: BMI-based (Deurenberg) ---
+    bmi = weight / (height_m ** 2) if height_m > 0 else 0
+    sex = 1 if gender == "male" else 0
+    bf_bmi = round((1.20 * bmi) + (0.23 * inp.age) - (10.8 * sex) - 5.4, 1)
+
+    # --- Method 2: US Navy (if circumferences available) ---
+    bf_navy = None
+    if waist and neck and (gender == "male" or (gender == "female" and hip)):
+        if gender == "male":
+            bf_navy = 495 / (
+                1.0324 - 0.19077 * math.log10(waist - neck) +
+                0.15456 * math.log10(height_cm)
+            ) - 450
+        else:
+            bf_navy = 495 / (
+                1.29579 - 0.35004 * math.log10(waist + hip - neck) +
+                0.22100 * math.log10(height_cm)
+            ) - 450
+        bf_navy = round(bf_navy, 1)
+
+    bf_final = bf_navy if bf_navy else bf_bmi
+
+    # --- Category (ACE Guidelines) ---
+    limits = (6, 13, 17, 24) if gender == "male" else (14, 20, 24, 31)
+    if bf_final < limits[0]:
+        category, advice = "Essential Fat", "Too low, may affect hormones."
+    elif bf_final <= limits[1]:
+        category, advice = "Athlete", "Excellent shape, maintain performance diet."
+    elif bf_final <= limits[2]:
+        category, advice = "Fitness", "Very good range for health and looks."
+    elif bf_final <= limits[3]:
+        category, advice = "Average", "Healthy, but can be improved."
+    else:
+        category, advice = "Obese", "High risk, reduce fat with diet & exercise."
+
+    # --- Lean & Fat Mass ---
+    fat_mass = round(weight * bf_final / 100, 1)
+    lean_mass = round(weight - fat_mass, 1)
+
+    # --- Dynamic Scale Setup ---
+    min_bf, max_bf = 5, 50
+    thresholds = [*limits, max_bf]
+
+    denom = max_bf - min_bf
+    segs, last = [], min_bf
+    for t in thresholds:
+        segs.append(round(((t - last) / denom) * 100, 2))
+        last = t
+
+    pointer_pct = max(0, min(100, round(((bf_final - min_bf) / denom) * 100, 2)))
+
+    return {
+        "bf_bmi": bf_bmi,
+        "bf_navy": bf_navy,
+        "bf_final": bf_final,
+        "category": category,
+        "advice": advice,
+        "fat_mass": fat_mass,
+        "lean_mass": lean_mass,
+        "scale": {
+            "segments": segs,
+            "pointer_pct": pointer_pct,
+            "min_bf": min_bf,
+            "thresholds": thresholds
+        }
+    }
+
+
+# --- Advanced Ideal Weight Calculator (fixed dynamic scale) ---
+class IdealWeightInput(Record):
+    __slots__ = ("gender", "unit", "height_cm", "height_ft", "height_in", "weight")
+    gender: str
+    unit: str
+    height_cm: float
+    height_ft: float
+    height_in: float
+    weight: float
+
+
+@tool("ideal_weight", IdealWeightInput, [
+    Field("gender", str, choices=GENDERS),
+    Field("unit", str, default="cm", choices=("cm", "imperial")),
+    Field("height_cm", required=False),
+    Field("height_ft", required=False),
+    Field("height_in", required=False),
+    Field("weight", required=False),
+])
+def compute_ideal_weight(inp):
+    weight = inp.weight
+    height_cm = height_to_cm(inp.unit, inp.height_cm, inp.height_ft, inp.height_in)
+    height_m2 = (height_cm / 100.0) ** 2
+    height_in = height_cm / 2.54
+
+    # --- WHO BMI-based healthy range (18.5 - 24.9) ---
+    min_weight = round(18.5 * height_m2, 1)
+    max_weight = round(24.9 * height_m2, 1)
+
+    # --- Classic formulas ---
+    formulas = {}
+    for name, (male_base, male_slope, female_base, female_slope) in IDEAL_WEIGHT_COEFFS.items():
+        if inp.gender == "male":
+            formulas[name] = round(male_base + male_slope * (height_in - 60), 1)
+        else:
+            formulas[name] = round(female_base + female_slope * (height_in - 60), 1)
+
+    # --- Dynamic display range for the scale (BMI 15 -> 40) ---
+    min_display_weight = 15.0 * height_m2
+    max_display_weight = 40.0 * height_m2
+
+    # Threshold weights at key BMI breakpoints
+    w_under_end = 18.5 * height_m2
+    w_normal_end = 24.9 * height_m2
+    w_over_end = 29.9 * height_m2
+
+    denom = max_display_weight - min_display_weight
+    if denom <= 0:
+        denom = 1e-6
+
+    segs = [
+        max(0.0, ((end - start) / denom) * 100)
+        for start, end in ((min_display_weight, w_under_end), (w_under_end, w_normal_end),
+                           (w_normal_end, w_over_end), (w_over_end, max_display_weight))
+    ]
+    # ensure they sum to ~100 (minor float correction)
+    total = sum(segs)
+    if total > 0:
+        segs = [s * 100.0 / total for s in segs]
+    seg_under, seg_normal, seg_over, seg_obese = segs
+
+    pointer_pct = None
+    if weight is not None:
+        pointer_pct = round(min(100.0, max(0.0, ((weight - min_display_weight) / denom) * 100)), 2)
+
+    advice = None
+    if weight:
+        if weight < min_weight:
+            advice = f"Your weight {weight} kg is below the WHO healthy range ({min_weight}–{max_weight} kg). Consider gaining weight safely."
+        elif weight > max_weight:
+            advice = f"Your weight {weight} kg is above the WHO healthy range ({min_weight}–{max_weight} kg). Consider a structured plan to reduce."
+        else:
+            advice = f"Your weight {weight} kg is within the WHO healthy range ({min_weight}–{max_weight} kg). Maintain with balanced diet and exercise."
+
+    return {
+        "height_cm": height_cm,
+        "min_weight": min_weight,
+        "max_weight": max_weight,
+        "formulas": formulas,
+        "advice": advice,
+        "current_weight": weight,
+        "scale": {
+            "min_display_weight": round(min_display_weight, 1),
+            "w_under_end": round(w_under_end, 1),
+            "w_normal_end": round(w_normal_end, 1),
+            "w_over_end": round(w_over_end, 1),
+            "max_display_weight": round(max_display_weight, 1),
+            "seg_under": round(seg_under, 2),
+            "seg_normal": round(seg_normal, 2),
+            "seg_over": round(seg_over, 2),
+            "seg_obese": round(seg_obese, 2),
+            "pointer_pct": pointer_pct,
+        }
+    }
+
+
+# --- Calories Burned Calculator (Pro) ---
+class CaloriesBurnedInput(Record):
+    __slots__ = ("weight", "duration", "exercise")
+    weight: float
+    duration: float
+    exercise: str
+
+
+@tool("calories_burned", CaloriesBurnedInput, [
+    Field("weight"),
+    Field("duration"),
+    Field("exercise", str, choices=METS),
+])
+def compute_calories_burned(inp):
+    met = METS.get(inp.exercise, 6)
+    calories = round((met * 3.5 * inp.weight / 200) * inp.duration, 1)
+    cal_per_min = round(calories / inp.duration, 1) if inp.duration > 0 else 0
+
+    # Fun equivalents
+    food_eq = []
+    if calories > 0:
+        food_eq.append(f"{round(calories/285,1)} 🍕 slices (285 kcal each)")
+        food_eq.append(f"{round(calories/250,1)} 🍫 bars (250 kcal each)")
+        food_eq.append(f"{round(calories/150,1)} 🍺 beers (150 kcal each)")
+
+    # Dynamic scale
+    min_cal, max_cal = 0, 1000
+    pointer_pct = max(0, min(100, round((calories - min_cal) / (max_cal - min_cal) * 100, 2)))
+
+    return {
+        "exercise": inp.exercise,
+        "calories": calories,
+        "cal_per_min": cal_per_min,
+        "food_eq": food_eq,
+        "scale": {
+            "pointer_pct": pointer_pct,
+            "milestones": [200, 500, 1000],
+            "max_cal": max_cal
+        }
+    }
+
+
+# --- Stress / Relaxation Score Calculator ---
+class StressInput(Record):
+    __slots__ = ("work", "sleep", "screen", "exercise", "meditation", "social")
+    work: int
+    sleep: int
+    screen: int
+    exercise: int
+    meditation: int
+    social: int
+
+
+@tool("stress", StressInput, [Field(name, int) for name in StressInput.__slots__])
+def compute_stress(inp):
+    stress_total = inp.work + inp.screen + (10 - inp.sleep)   # higher sleep = less stress
+    relax_total = inp.exercise + inp.meditation + inp.social
+
+    # Normalize (scale 0–100)
+    score = max(0, min(100, 100 - (stress_total * 5) + (relax_total * 3)))
+
+    if score >= 80:
+        advice = "Great balance 🟢 — keep up your routine!"
+    elif score >= 60:
+        advice = "Manageable 🟡 — focus on better relaxation."
+    else:
+        advice = "High Stress 🔴 — consider lifestyle adjustments."
+
+    return {
+        "score": score,
+        "stress_total": stress_total,
+        "relax_total": relax_total,
+        "advice": advice
+    }
+
+
+# --- Blood Pressure Risk Calculator (Dual Gauges) ---
+class BpInput(Record):
+    __slots__ = ("systolic", "diastolic", "age", "history")
+    systolic: int
+    diastolic: int
+    age: int
+    history: str
+
+
+def classify_systolic(s):
+    if s >= 180: return "Hypertensive Crisis"
+    if s >= 140: return "High BP Stage 2"
+    if s >= 130: return "High BP Stage 1"
+    if s >= 120: return "Elevated"
+    if s < 90:    return "Hypotension"
+    return "Normal"
+
+
+def classify_diastolic(d):
+    if d >= 120: return "Hypertensive Crisis"
+    if d >= 90:  return "High BP Stage 2"
+    if d >= 80:  return "High BP Stage 1"
+    if d < 60:   return "Hypotension"
+    return "Normal"
+
+
+BP_ADVICE = {
+    "Hypertensive Crisis": "Hypertensive crisis — seek immediate medical attention!",
+    "High BP Stage 2": "High BP Stage 2 — consult a doctor; risk of complications.",
+    "High BP Stage 1": "High BP Stage 1 — monitor regularly & adopt a low-salt, active lifestyle.",
+    "Elevated": "Elevated BP — lifestyle improvements (diet, exercise) recommended.",
+    "Hypotension": "Low BP detected — if symptomatic (dizziness, fainting), consult a doctor.",
+    "Normal": "Normal — maintain healthy habits.",
+}
+
+
+@tool("bp", BpInput, [
+    Field("systolic", int),
+    Field("diastolic", int),
+    Field("age", int, required=False),
+    Field("history", str, default="no", choices=("no", "yes")),
+])
+def compute_bp(inp):
+    sys_cat = classify_systolic(inp.systolic)
+    dia_cat = classify_diastolic(inp.diastolic)
+
+    # Final category = worst of systolic/diastolic
+    final_cat = BP_ORDER[min(BP_ORDER.index(sys_cat), BP_ORDER.index(dia_cat))]
+
+    advice = BP_ADVICE[final_cat]
+    if inp.age and inp.age > 50:
+        advice += " (Over 50 — regular checkups recommended.)"
+    if inp.history == "yes":
+        advice += " Family history increases risk — stay proactive."
+
+    return {
+        "systolic": inp.systolic,
+        "diastolic": inp.diastolic,
+        "sys_cat": sys_cat,
+        "dia_cat": dia_cat,
+        "category": final_cat,
+        "advice": advice
+    }
+
+
+# --- Diabetes Risk Calculator (with Lifestyle Tips) ---
+class DiabetesInput(Record):
+    __slots__ = ("fasting", "postmeal", "age", "bmi", "family", "activity", "diet")
+    fasting: float
+    postmeal: float
+    age: int
+    bmi: float
+    family: str
+    activity: str
+    diet: str
+
+
+DIABETES_TIPS = {
+    "High Risk (Possible Diabetes)": [
+        "Adopt a low-carb, high-fiber diet (vegetables, legumes, whole grains).",
+        "Avoid sugary drinks and processed foods.",
+        "Exercise at least 30 minutes daily (walking, jogging, yoga).",
+        "Get regular HbA1c and blood sugar tests.",
+        "Maintain a healthy sleep schedule (7–8 hrs)."
+    ],
+    "Prediabetes Risk": [
+        "Reduce portion sizes and refined carbs.",
+        "Include 20–30 min of brisk walking most days.",
+        "Cut down on late-night snacking.",
+        "Track weight and waist circumference.",
+        "Increase water intake and avoid excess alcohol."
+    ],
+    "Normal": [
+        "Continue balanced meals with fruits & veggies.",
+        "Exercise at least 3–4 times a week.",
+        "Limit fried/junk food to occasional treats.",
+        "Get annual blood sugar screening.",
+        "Stay hydrated and stress-free."
+    ],
+}
+
+
+@tool("diabetes", DiabetesInput, [
+    Field("fasting"),
+    Field("postmeal"),
+    Field("age", int, required=False),
+    Field("bmi", required=False),
+    Field("family", str, default="no", choices=("no", "yes")),
+    Field("activity", str, default="sedentary", choices=("sedentary", "moderate", "active")),
+    Field("diet", str, default="balanced", choices=("balanced", "high_sugar", "high_fat")),
+])
+def compute_diabetes(inp):
+    # --- Risk Scoring ---
+    score = 0
+    if inp.fasting >= 126: score += 40
+    elif inp.fasting >= 100: score += 20
+
+    if inp.postmeal >= 200: score += 40
+    elif inp.postmeal >= 140: score += 20
+
+    if inp.age and inp.age >= 45: score += 10
+    if inp.bmi and inp.bmi >= 25: score += 10
+    if inp.family == "yes": score += 10
+    if inp.activity == "sedentary": score += 10
+    if inp.diet == "high_sugar": score += 10
+
+    # --- Category & Advice ---
+    if score >= 70:
+        category = "High Risk (Possible Diabetes)"
+        advice = "High diabetes risk — consult a doctor for blood tests and adopt strict lifestyle changes."
+    elif score >= 40:
+        category = "Prediabetes Risk"
+        advice = "Prediabetes risk — improve diet, increase activity, and monitor regularly."
+    else:
+        category = "Normal"
+        advice = "Normal range — maintain healthy habits."
+
+    if inp.age and inp.age > 50:
+        advice += " (Age above 50: regular annual screening recommended.)"
+
+    return {
+        "fasting": inp.fasting,
+        "postmeal": inp.postmeal,
+        "age": inp.age,
+        "bmi": inp.bmi,
+        "score": score,
+        "category": category,
+        "advice": advice,
+        "tips": list(DIABETES_TIPS[category])
+    }
+
+
+# --- Sleep Calculator ---
+class SleepInput(Record):
+    __slots__ = ("bedtime", "wakeup")
+    bedtime: str
+    wakeup: str
+
+
+SLEEP_CYCLE_MIN = 90
+FALL_ASLEEP_MIN = 15
+
+
+@tool("sleep", SleepInput, [
+    Field("bedtime", TIME, required=False),
+    Field("wakeup", TIME, required=False),
+])
+def compute_sleep(inp):
+    bedtime, wakeup = inp.bedtime, inp.wakeup
+    suggestions = []
+
+    if bedtime and not wakeup:
+        bt = datetime.strptime(bedtime, "%H:%M")
+        for cycles in range(3, 7):  # 4.5–9 hrs
+            wake = bt + timedelta(minutes=FALL_ASLEEP_MIN + cycles * SLEEP_CYCLE_MIN)
+            suggestions.append(wake.strftime("%I:%M %p"))
+        advice = "Aim for 5–6 cycles (~7.5–9 hrs). Pick a wake time that fits your lifestyle."
+        return {"mode": "bedtime", "bedtime": bedtime, "suggestions": suggestions, "advice": advice}
+
+    if wakeup and not bedtime:
+        wu = datetime.strptime(wakeup, "%H:%M")
+        for cycles in range(6, 2, -1):
+            bed = wu - timedelta(minutes=FALL_ASLEEP_MIN + cycles * SLEEP_CYCLE_MIN)
+            suggestions.append(bed.strftime("%I:%M %p"))
+        advice = "Going to bed at these times ensures you complete healthy sleep cycles."
+        return {"mode": "wakeup", "wakeup": wakeup, "suggestions": suggestions, "advice": advice}
+
+    if not (bedtime and wakeup):
+        raise ValidationError("Please provide at least bedtime or wake-up time.")
+
+    bt = datetime.strptime(bedtime, "%H:%M")
+    wu = datetime.strptime(wakeup, "%H:%M")
+    if wu < bt:
+        wu += timedelta(days=1)  # handle overnight
+    duration = (wu - bt).total_seconds() / 3600
+    cycles = round(duration * 60 / SLEEP_CYCLE_MIN, 1)
+
+    if duration < 6:
+        advice = "❌ Too short — linked with fatigue, poor focus, and health risk."
+    elif 6 <= duration < 7.5:
+        advice = "⚠️ Slightly short — try extending to 7.5 hrs for full recovery."
+    elif 7.5 <= duration <= 9:
+        advice = "✅ Optimal — excellent range for health and performance."
+    else:
+        advice = "⚠️ Oversleeping — too much sleep may signal fatigue or imbalance."
+
+    # For gauge scale (target = 8 hrs)
+    min_hr, max_hr, target_hr = 4, 12, 8
+    pointer_pct = max(0, min(100, round((duration - min_hr) / (max_hr - min_hr) * 100, 2)))
+
+    return {
+        "mode": "both",
+        "bedtime": bedtime,
+        "wakeup": wakeup,
+        "duration": round(duration, 2),
+        "cycles": cycles,
+        "advice": advice,
+        "scale": {
+            "min_hr": min_hr,
+            "max_hr": max_hr,
+            "target_hr": target_hr,
+            "pointer_pct": pointer_pct,
+        }
+    }
+
+
+# --- Sleep Debt Calculator ---
+class SleepDebtInput(Record):
+    __slots__ = ("avg", "age", "days")
+    avg: float
+    age: int
+    days: int
+
+
+@tool("sleep_debt", SleepDebtInput, [
+    Field("avg"),
+    Field("age", int),
+    Field("days", int, default=7),
+])
+def compute_sleep_debt(inp):
+    # Ideal sleep based on NSF guidelines
+    if inp.age < 14:
+        ideal = 9
+    elif inp.age <= 17:
+        ideal = 8.5
+    elif inp.age <= 64:
+        ideal = 8
+    else:
+        ideal = 7.5
+
+    total_debt = round((ideal - inp.avg) * inp.days, 1)
+
+    if total_debt <= 0:
+        advice = "✅ No sleep debt — you’re meeting or exceeding your ideal sleep."
+    elif total_debt <= 5:
+        advice = "⚠️ Mild sleep debt — try going to bed earlier or adding naps."
+    elif total_debt <= 14:
+        advice = "❌ Moderate debt — recovery sleep needed. Aim for a few nights of 8–9 hrs."
+    else:
+        advice = "🚨 Severe debt — linked to major fatigue, mood issues, and health risks."
+
+    # Scale for UI
+    max_debt = 28
+    pointer_pct = max(0, min(100, round((total_debt / max_debt) * 100, 1)))
+
+    return {
+        "avg": inp.avg,
+        "ideal": ideal,
+        "days": inp.days,
+        "total_debt": total_debt,
+        "advice": advice,
+        "scale": {
+            "pointer_pct": pointer_pct,
+            "thresholds": [5, 14, 21],
+            "max_debt": max_debt,
+        }
+    }
+
+
+# --- Alcohol Impact Calculator ---
+class AlcoholInput(Record):
+    __slots__ = ("drinks", "gender", "weight", "pattern")
+    drinks: int
+    gender: str
+    weight: float
+    pattern: str
+
+
+ETHANOL_PER_DRINK = 14  # grams pure alcohol
+
+
+@tool("alcohol", AlcoholInput, [
+    Field("drinks", int),
+    Field("gender", str, default="male", choices=GENDERS),
+    Field("weight", required=False),
+    Field("pattern", str, default="spread", choices=("spread", "binge")),
+])
+def compute_alcohol(inp):
+    drinks = inp.drinks
+
+    # --- Safe Limits (WHO/CDC) ---
+    safe_limit = 14 if inp.gender == "male" else 7  # drinks/week
+    total_ethanol = drinks * ETHANOL_PER_DRINK
+    safe_ethanol = safe_limit * ETHANOL_PER_DRINK
+
+    # Risk score for gauge
+    score = 0 if drinks == 0 else min(100, round((drinks / (safe_limit * 2)) * 100))
+
+    # Comparison %
+    compare_pct = min(200, round((total_ethanol / safe_ethanol) * 100)) if safe_ethanol > 0 else 0
+
+    if drinks <= safe_limit:
+        category = "Low Risk"
+        advice = "Within safe limits — maintain moderation."
+        tips = [
+            "Keep alcohol-free days during the week.",
+            "Stay hydrated and avoid drinking on an empty stomach.",
+            "Continue moderate, social drinking only."
+        ]
+    elif drinks <= safe_limit * 2:
+        category = "Moderate Risk"
+        advice = "Above recommended weekly limit — cut back gradually."
+        tips = [
+            "Replace alcohol with non-alcoholic alternatives sometimes.",
+            "Avoid binge drinking — spread consumption over the week.",
+            "Include liver-friendly foods (leafy greens, fruits, nuts)."
+        ]
+    else:
+        category = "High Risk"
+        advice = "High alcohol intake — risk of liver, heart & sleep issues. Strongly advised to reduce."
+        tips = [
+            "Seek medical advice if finding it difficult to cut down.",
+            "Join support groups or track consumption with an app.",
+            "Avoid alcohol before sleep — improves rest & recovery.",
+            "Focus on exercise, hydration, and balanced diet."
+        ]
+
+    if inp.pattern == "binge" and category == "Low Risk":
+        advice = "Your weekly intake is within safe limits, but binge drinking is harmful. Spread drinks across the week."
+        tips.insert(0, "Avoid binge sessions — spread your drinks across multiple days.")
+
+    return {
+        "drinks": drinks,
+        "gender": inp.gender.title(),
+        "weight": inp.weight,
+        "pattern": inp.pattern,
+        "category": category,
+        "advice": advice,
+        "tips": tips,
+        "score": score,
+        "safe_limit": safe_limit,
+        "ethanol": total_ethanol,
+        "safe_ethanol": safe_ethanol,
+        "compare_pct": compare_pct
+    }
@@ -0,0 +1,904 @@
+import ast
+import builtins
+import datetime
+import inspect
+import json
+import math
+import os
+import re
+import sys
+import textwrap
+
+from jinja2 import Environment, FileSystemLoader, nodes
+from markupsafe import Markup, escape
+
+import calculators
+import gauges
+
+
+# -------------------------
+# Browser calculators generated from the Python source
+# -------------------------
+# The compute functions in calculators.py (with the helpers and constants they
+# use), the gauges in gauges.py and the result partials in templates/partials/
+# are translated from their Python and Jinja ASTs into ES modules, so a form
+# can be evaluated and its result rendered in the browser, with the same HTML
+# the server would send. static/calculators_runtime.js supplies the Python
+# semantics the translation relies on. Only a small subset of Python is
+# supported; a tool that needs anything else (protein and sugar look their
+# items up in the server-side food store) stays server-only.
+#
+# assets.py writes the modules to static/dist/: calc-runtime.js (runtime and
+# gauges) plus one calc-<tool>.js per tool, loaded by that tool's page.
+# `python clientgen.py` is the parity check: it runs the same input vectors
+# through the Flask app and, with node, through the generated modules, and
+# compares the result JSON, permalink and rendered partial.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNTIME_PATH = os.path.join(ROOT_DIR, "static", "calculators_runtime.js")
+TEMPLATE_DIR = os.path.join(ROOT_DIR, "templates")
+RUNTIME_MODULE = "calc-runtime.js"
+TOOL_MODULE = "calc-{}.js"
+RESULT_TEMPLATE = "partials/{}_result.html"
+SOURCES = (calculators.__file__, gauges.__file__, __file__, RUNTIME_PATH)
+
+
+class TranslationError(Exception):
+    pass
+
+
+FIELD_TYPES = {float: "float", int: "int", str: "str", calculators.TIME: "time"}
+
+# Python objects the runtime provides, by identity
+RUNTIME_OBJECTS = (
+    (math, "py.math"),
+    (datetime.datetime, "py.datetime"),
+    (datetime.timedelta, "py.timedelta"),
+    (calculators.ValidationError, "py.ValidationError"),
+    (Markup, "py.markup"),
+    (escape, "py.escape"),
+)
+RUNTIME_ATTRIBUTES = {"py.math": {"pi", "e", "log10", "log", "sqrt", "cos", "sin"}, "py.datetime": {"strptime"}}
+BUILTINS = {"abs", "enumerate", "float", "int", "len", "list", "max", "min", "range", "repr", "round", "str",
+            "sum", "tuple", "zip", "ValueError"}
+METHODS = {"append", "capitalize", "get", "index", "insert", "items", "join", "keys", "lower", "replace",
+           "strftime", "strip", "title", "total_seconds", "upper", "values"}
+FILTERS = {"capitalize", "title"}
+
+BINOPS = {ast.Add: "add", ast.Sub: "sub", ast.Mult: "mul", ast.Div: "div", ast.FloorDiv: "floordiv",
+          ast.Mod: "mod", ast.Pow: "pow"}
+COMPARISONS = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+JINJA_BINOPS = {nodes.Add: "add", nodes.Sub: "sub", nodes.Mul: "mul", nodes.Div: "div",
+                nodes.FloorDiv: "floordiv", nodes.Mod: "mod", nodes.Pow: "pow"}
+JINJA_COMPARISONS = {"lt": "<", "lteq": "<=", "gt": ">", "gteq": ">="}
+
+JS_RESERVED = {
+    "arguments", "await", "break", "case", "catch", "class", "const", "continue", "debugger", "default",
+    "delete", "do", "else", "enum", "eval", "export", "extends", "false", "finally", "for", "function", "if",
+    "implements", "import", "in", "instanceof", "interface", "let", "new", "null", "package", "private",
+    "protected", "public", "return", "static", "super", "switch", "this", "throw", "true", "try", "typeof",
+    "var", "void", "while", "with", "yield", "undefined", "NaN", "Infinity",
+    # names the generated code itself uses
+    "py", "M", "F", "ctx", "out", "gauges", "register",
+}
+
+
+def _ident(name):
+    return f"{name}_" if name in JS_RESERVED else name
+
+
+def js_value(value):
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        if abs(value) > 2 ** 53:
+            raise TranslationError(f"integer {value} does not fit a JavaScript number")
+        return str(value)
+    if isinstance(value, float):
+        if math.isfinite(value):
+            return f"F({value!r})"
+        return f"F({'NaN' if math.isnan(value) else '-Infinity' if value < 0 else 'Infinity'})"
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(js_value(v) for v in value)}]"
+    if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        return "{" + ", ".join(f"{json.dumps(k, ensure_ascii=False)}: {js_value(v)}" for k, v in value.items()) + "}"
+    raise TranslationError(f"cannot translate value {value!r}")
+
+
+def _bind(func, args, kwargs):
+    # positional JS arguments for a call to a translated Python function;
+    # parameters left to their default are passed as undefined
+    params = list(inspect.signature(func).parameters.values())
+    if len(args) > len(params):
+        raise TranslationError(f"too many arguments for {func.__name__}()")
+    values = list(args)
+    for param in params[len(args):]:
+        value = kwargs.pop(param.name, None)
+        if value is None and param.default is inspect.Parameter.empty:
+            raise TranslationError(f"missing argument '{param.name}' for {func.__name__}()")
+        values.append(value)
+    if kwargs:
+        raise TranslationError(f"unexpected arguments {sorted(kwargs)} for {func.__name__}()")
+    while values and values[-1] is None:
+        values.pop()
+    return ", ".join("undefined" if v is None else v for v in values)
+
+
+def _assigned_names(body):
+    # names a function body binds, in order; comprehension variables are local
+    # to their comprehension
+    names = {}
+
+    def visit(node):
+        if isinstance(node, (ast.ListComp, ast.GeneratorExp, ast.SetComp, ast.DictComp, ast.Lambda)):
+            return
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.setdefault(node.id)
+        for child in ast.iter_child_nodes(node):
+            visit(child)
+
+    for stmt in body:
+        visit(stmt)
+    return list(names)
+
+
+# -------------------------
+# ES module under construction
+# -------------------------
+class Module:
+    def __init__(self, reserved=()):
+        self.reserved = set(reserved)
+        self.names = {}  # (module, name) or ("template", name) -> JS name
+        self.code = {}   # JS name -> definition, in dependency order
+
+    def _name(self, key, name):
+        js_name = _ident(name)
+        if js_name in self.reserved or js_name in self.code or js_name in self.names.values():
+            js_name = f"{key[0]}_{name}".replace(".", "_").replace("/", "_")
+        self.names[key] = js_name
+        return js_name
+
+    def function(self, func):
+        key = (func.__module__, func.__qualname__)
+        if key not in self.names:
+            js_name = self._name(key, func.__name__)
+            self.code[js_name] = FunctionTranslator(self, func, js_name).translate()
+        return self.names[key]
+
+    def constant(self, module, name, value):
+        key = (module, name)
+        if key not in self.names:
+            js_name = self._name(key, name)
+            self.code[js_name] = f"const {js_name} = {js_value(value)};"
+        return self.names[key]
+
+    def template(self, env, name):
+        key = ("template", name)
+        if key not in self.names:
+            js_name = self._name(key, "tpl_" + re.sub(r"\W", "_", os.path.splitext(name)[0]))
+            self.code[js_name] = TemplateTranslator(self, env, name, js_name).translate()
+        return self.names[key]
+
+    def source(self):
+        return "\n\n".join(self.code.values()) + "\n"
+
+
+# -------------------------
+# Python functions -> JavaScript
+# -------------------------
+class FunctionTranslator:
+    def __init__(self, module, func, js_name):
+        self.module = module
+        self.func = func
+        self.js_name = js_name
+        self.globals = func.__globals__
+        lines, self.first_line = inspect.getsourcelines(func)
+        self.node = ast.parse(textwrap.dedent("".join(lines))).body[0]
+        self.scopes = [{}]
+
+    def fail(self, node, message):
+        line = self.first_line + getattr(node, "lineno", 1) - 1
+        raise TranslationError(f"{self.func.__module__}.{self.func.__name__} (line {line}): {message}")
+
+    def translate(self):
+        args = self.node.args
+        if args.vararg or args.kwarg or args.kwonlyargs or args.posonlyargs:
+            self.fail(self.node, "only plain positional parameters are supported")
+        params = [a.arg for a in args.args]
+        defaults = [None] * (len(params) - len(args.defaults)) + list(args.defaults)
+        local = self.scopes[0]
+        for name in params:
+            local[name] = _ident(name)
+        assigned = [name for name in _assigned_names(self.node.body) if name not in local]
+        for name in assigned:
+            local[name] = _ident(name)
+
+        signature = ", ".join(
+            local[name] + (f" = {self.expr(default)}" if default is not None else "")
+            for name, default in zip(params, defaults)
+        )
+        lines = [f"function {self.js_name}({signature}) {{"]
+        if assigned:
+            lines.append(f"  let {', '.join(local[name] for name in assigned)};")
+        lines += self.block(self.node.body, 1)
+        lines.append("}")
+        return "\n".join(lines)
+
+    # --- statements ---
+    def block(self, body, depth):
+        lines = []
+        for stmt in body:
+            lines += self.stmt(stmt, depth)
+        return lines
+
+    def stmt(self, node, depth):
+        pad = "  " * depth
+        if isinstance(node, ast.Expr):
+            if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                return []  # docstring
+            return [f"{pad}{self.expr(node.value)};"]
+        if isinstance(node, ast.Assign):
+            if len(node.targets) != 1:
+                self.fail(node, "chained assignment is not supported")
+            return [f"{pad}{self.assign(node.targets[0], self.expr(node.value))};"]
+        if isinstance(node, ast.AugAssign):
+            op = BINOPS.get(type(node.op))
+            if not isinstance(node.target, ast.Name) or op is None:
+                self.fail(node, "unsupported augmented assignment")
+            name = self.name(node.target)
+            return [f"{pad}{name} = py.{op}({name}, {self.expr(node.value)});"]
+        if isinstance(node, ast.Return):
+            return [f"{pad}return {self.expr(node.value) if node.value else 'null'};"]
+        if isinstance(node, ast.If):
+            lines = [f"{pad}if ({self.test(node.test)}) {{", *self.block(node.body, depth + 1)]
+            orelse = node.orelse
+            while len(orelse) == 1 and isinstance(orelse[0], ast.If):
+                lines += [f"{pad}}} else if ({self.test(orelse[0].test)}) {{", *self.block(orelse[0].body, depth + 1)]
+                orelse = orelse[0].orelse
+            if orelse:
+                lines += [f"{pad}}} else {{", *self.block(orelse, depth + 1)]
+            return lines + [f"{pad}}}"]
+        if isinstance(node, ast.For):
+            if node.orelse:
+                self.fail(node, "for/else is not supported")
+            head = f"for ({self.target(node.target)} of py.iter({self.expr(node.iter)}))"
+            return [f"{pad}{head} {{", *self.block(node.body, depth + 1), f"{pad}}}"]
+        if isinstance(node, ast.While):
+            if node.orelse:
+                self.fail(node, "while/else is not supported")
+            return [f"{pad}while ({self.test(node.test)}) {{", *self.block(node.body, depth + 1), f"{pad}}}"]
+        if isinstance(node, ast.Raise):
+            if node.exc is None or node.cause is not None:
+                self.fail(node, "only 'raise Error(...)' is supported")
+            return [f"{pad}throw {self.expr(node.exc)};"]
+        if isinstance(node, ast.Pass):
+            return []
+        if isinstance(node, (ast.Break, ast.Continue)):
+            return [f"{pad}{type(node).__name__.lower()};"]
+        self.fail(node, f"unsupported statement {type(node).__name__}")
+
+    def assign(self, target, value):
+        if isinstance(target, ast.Name):
+            return f"{self.name(target)} = {value}"
+        if isinstance(target, (ast.Tuple, ast.List)):
+            return f"{self.target(target)} = py.unpack({value}, {len(target.elts)})"
+        if isinstance(target, ast.Subscript) and not isinstance(target.slice, ast.Slice):
+            return f"py.setitem({self.expr(target.value)}, {self.expr(target.slice)}, {value})"
+        self.fail(target, f"unsupported assignment target {type(target).__name__}")
+
+    def target(self, node):
+        # destructuring pattern for assignment, for loops and comprehensions
+        if isinstance(node, ast.Name):
+            return self.name(node)
+        if isinstance(node, (ast.Tuple, ast.List)) and not any(isinstance(e, ast.Starred) for e in node.elts):
+            return f"[{', '.join(self.target(e) for e in node.elts)}]"
+        self.fail(node, f"unsupported target {type(node).__name__}")
+
+    # --- names ---
+    def local(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def name(self, node):
+        local = self.local(node.id)
+        if local is not None:
+            return local
+        if not isinstance(node.ctx, ast.Load):
+            self.fail(node, f"assignment to global '{node.id}'")
+        return self.global_ref(node, node.id)
+
+    def resolve(self, node, name):
+        # -> the Python object a global name refers to
+        if name in self.globals:
+            return inspect.unwrap(self.globals[name])  # caching decorators do not matter here
+        if name in BUILTINS:
+            return getattr(builtins, name)
+        self.fail(node, f"unsupported name '{name}'")
+
+    def global_ref(self, node, name):
+        value = self.resolve(node, name)
+        for obj, js in RUNTIME_OBJECTS:
+            if value is obj:
+                return js
+        if name in BUILTINS and value is getattr(builtins, name):
+            return f"py.{name}"
+        if inspect.isfunction(value):
+            return self.module.function(value)
+        if inspect.ismodule(value) or inspect.isclass(value) or callable(value):
+            self.fail(node, f"'{name}' is not available in the browser")
+        try:
+            return self.module.constant(self.func.__module__, name, value)
+        except TranslationError as e:
+            self.fail(node, str(e))
+
+    def runtime_ref(self, node):
+        if isinstance(node, ast.Name) and self.local(node.id) is None:
+            ref = self.global_ref(node, node.id)
+            if ref in RUNTIME_ATTRIBUTES:
+                return ref
+        return None
+
+    # --- expressions ---
+    def test(self, node):
+        # expression in a boolean context -> JS boolean
+        if isinstance(node, ast.BoolOp):
+            joiner = " && " if isinstance(node.op, ast.And) else " || "
+            return f"({joiner.join(self.test(v) for v in node.values)})"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return f"!{self.test(node.operand)}"
+        if isinstance(node, ast.Compare):
+            return self.compare(node)
+        return f"py.truth({self.expr(node)})"
+
+    def compare(self, node):
+        parts, left = [], node.left
+        for op, right in zip(node.ops, node.comparators):
+            a, b = self.expr(left), self.expr(right)
+            if type(op) in COMPARISONS:
+                parts.append(f"({a} {COMPARISONS[type(op)]} {b})")
+            elif isinstance(op, (ast.Eq, ast.NotEq)):
+                parts.append(f"{'!' if isinstance(op, ast.NotEq) else ''}py.eq({a}, {b})")
+            elif isinstance(op, (ast.In, ast.NotIn)):
+                parts.append(f"{'!' if isinstance(op, ast.NotIn) else ''}py.contains({b}, {a})")
+            elif isinstance(op, (ast.Is, ast.IsNot)) and isinstance(right, ast.Constant) and right.value is None:
+                parts.append(f"({a} {'===' if isinstance(op, ast.Is) else '!=='} null)")
+            else:
+                self.fail(node, f"unsupported comparison {type(op).__name__}")
+            left = right
+        return parts[0] if len(parts) == 1 else f"({' && '.join(parts)})"
+
+    def expr(self, node):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, (list, tuple, dict)):
+                self.fail(node, "unsupported constant")
+            return js_value(node.value)
+        if isinstance(node, ast.Name):
+            return self.name(node)
+        if isinstance(node, ast.BinOp):
+            op = BINOPS.get(type(node.op))
+            if op is None:
+                self.fail(node, f"unsupported operator {type(node.op).__name__}")
+            return f"py.{op}({self.expr(node.left)}, {self.expr(node.right)})"
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.Not):
+                return f"!{self.test(node.operand)}"
+            if isinstance(node.op, ast.USub):
+                return f"py.neg({self.expr(node.operand)})"
+            if isinstance(node.op, ast.UAdd):
+                return self.expr(node.operand)
+            self.fail(node, f"unsupported operator {type(node.op).__name__}")
+        if isinstance(node, ast.BoolOp):
+            fn = "and" if isinstance(node.op, ast.And) else "or"
+            result = self.expr(node.values[-1])
+            for value in reversed(node.values[:-1]):
+                result = f"py.{fn}({self.expr(value)}, () => {result})"
+            return result
+        if isinstance(node, ast.Compare):
+            return self.compare(node)
+        if isinstance(node, ast.IfExp):
+            return f"({self.test(node.test)} ? {self.expr(node.body)} : {self.expr(node.orelse)})"
+        if isinstance(node, ast.Call):
+            return self.call(node)
+        if isinstance(node, ast.Attribute):
+            runtime = self.runtime_ref(node.value)
+            if runtime is not None:
+                if node.attr not in RUNTIME_ATTRIBUTES[runtime]:
+                    self.fail(node, f"'{node.attr}' is not available in the browser")
+                return f"{runtime}.{node.attr}"
+            return f"{self.expr(node.value)}.{node.attr}"  # input record fields
+        if isinstance(node, ast.Subscript):
+            value = self.expr(node.value)
+            if isinstance(node.slice, ast.Slice):
+                if node.slice.step is not None:
+                    self.fail(node, "slice steps are not supported")
+                lower = self.expr(node.slice.lower) if node.slice.lower else "null"
+                upper = self.expr(node.slice.upper) if node.slice.upper else "null"
+                return f"py.slice({value}, {lower}, {upper})"
+            return f"py.getitem({value}, {self.expr(node.slice)})"
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [
+                f"...py.iter({self.expr(e.value)})" if isinstance(e, ast.Starred) else self.expr(e)
+                for e in node.elts
+            ]
+            return f"[{', '.join(items)}]"
+        if isinstance(node, ast.Dict):
+            if not all(isinstance(k, ast.Constant) and isinstance(k.value, str) for k in node.keys):
+                self.fail(node, "only dicts with string keys are supported")
+            pairs = (f"{json.dumps(k.value, ensure_ascii=False)}: {self.expr(v)}" for k, v in zip(node.keys, node.values))
+            return "{" + ", ".join(pairs) + "}"
+        if isinstance(node, ast.JoinedStr):
+            return self.fstring(node)
+        if isinstance(node, (ast.ListComp, ast.GeneratorExp)):
+            return self.comprehension(node)
+        self.fail(node, f"unsupported expression {type(node).__name__}")
+
+    def call(self, node):
+        func = node.func
+        if any(isinstance(a, ast.Starred) for a in node.args) or any(k.arg is None for k in node.keywords):
+            self.fail(node, "*args and **kwargs are not supported")
+        args = [self.expr(a) for a in node.args]
+        kwargs = {k.arg: self.expr(k.value) for k in node.keywords}
+
+        if isinstance(func, ast.Attribute):
+            runtime = self.runtime_ref(func.value)
+            if runtime is not None:
+                if kwargs or func.attr not in RUNTIME_ATTRIBUTES[runtime]:
+                    self.fail(node, f"unsupported call {runtime}.{func.attr}")
+                return f"{runtime}.{func.attr}({', '.join(args)})"
+            if kwargs or func.attr not in METHODS:
+                self.fail(node, f"unsupported method .{func.attr}()")
+            return f"M.{func.attr}({', '.join([self.expr(func.value), *args])})"
+
+        if not isinstance(func, ast.Name) or self.local(func.id) is not None:
+            self.fail(node, "only calls to functions by name are supported")
+        value = self.resolve(func, func.id)
+        callee = self.global_ref(func, func.id)
+        if value is datetime.timedelta:
+            if args:
+                self.fail(node, "timedelta() takes keyword arguments only")
+            return f"{callee}({{{', '.join(f'{k}: {v}' for k, v in kwargs.items())}}})"
+        if inspect.isfunction(value):
+            try:
+                return f"{callee}({_bind(value, args, kwargs)})"
+            except TranslationError as e:
+                self.fail(node, str(e))
+        if kwargs:
+            self.fail(node, f"keyword arguments to {func.id}() are not supported")
+        if inspect.isclass(value) and issubclass(value, BaseException):
+            return f"new {callee}({', '.join(args)})"
+        return f"{callee}({', '.join(args)})"
+
+    def fstring(self, node):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(json.dumps(value.value, ensure_ascii=False))
+                continue
+            inner = self.expr(value.value)
+            if value.conversion == ord("r"):
+                inner = f"py.repr({inner})"
+            elif value.conversion not in (-1, ord("s")):
+                self.fail(value, "unsupported f-string conversion")
+            if value.format_spec is None:
+                parts.append(inner if value.conversion == ord("r") else f"py.str({inner})")
+            elif all(isinstance(v, ast.Constant) for v in value.format_spec.values):
+                spec = "".join(v.value for v in value.format_spec.values)
+                parts.append(f"py.format({inner}, {json.dumps(spec)})")
+            else:
+                self.fail(value, "nested f-string format specs are not supported")
+        return f"({' + '.join(parts)})" if parts else '""'
+
+    def comprehension(self, node):
+        if len(node.generators) != 1 or node.generators[0].is_async:
+            self.fail(node, "only single-loop comprehensions are supported")
+        gen = node.generators[0]
+        source = f"py.iter({self.expr(gen.iter)})"  # evaluated in the enclosing scope
+        scope = {}
+        for name in ast.walk(gen.target):
+            if isinstance(name, ast.Name):
+                scope[name.id] = _ident(name.id)
+        self.scopes.append(scope)
+        pattern = self.target(gen.target)
+        for condition in gen.ifs:
+            source += f".filter(({pattern}) => {self.test(condition)})"
+        element = self.expr(node.elt)
+        self.scopes.pop()
+        return f"{source}.map(({pattern}) => {element})"
+
+
+# -------------------------
+# Jinja templates -> JavaScript
+# -------------------------
+class TemplateTranslator:
+    # Output, if/elif/else, for, set and include; expressions as in the partials.
+    # A template becomes function(ctx) -> HTML string, escaped like autoescape.
+
+    def __init__(self, module, env, name, js_name):
+        self.module = module
+        self.env = env
+        self.name = name
+        self.js_name = js_name
+        source = env.loader.get_source(env, name)[0]
+        self.tree = env.parse(source, name)
+        self.scopes = [{}]
+
+    def fail(self, node, message):
+        raise TranslationError(f"{self.name} (line {getattr(node, 'lineno', '?')}): {message}")
+
+    def translate(self):
+        stored, loaded = {}, {}
+        for node in self.tree.find_all(nodes.Name):
+            (stored if node.ctx in ("store", "param") else loaded).setdefault(node.name)
+        context = [name for name in loaded if name not in stored and name != "gauges"]
+        if "loop" in context:
+            self.fail(self.tree, "the loop variable is not supported")
+
+        top = self.scopes[0]
+        lines = [f"function {self.js_name}(ctx) {{"]
+        for name in context:
+            top[name] = _ident(name)
+            lines.append(f"  const {top[name]} = py.lookup(ctx, {json.dumps(name)});")
+        sets = [n.target.name for n in self.tree.find_all(nodes.Assign) if isinstance(n.target, nodes.Name)]
+        if sets:
+            for name in sets:
+                top[name] = _ident(name)
+            lines.append(f"  let {', '.join(dict.fromkeys(top[name] for name in sets))};")
+        lines.append('  let out = "";')
+        lines += self.block(self.tree.body, 1)
+        lines += ["  return out;", "}"]
+        return "\n".join(lines)
+
+    def block(self, body, depth):
+        lines = []
+        for node in body:
+            lines += self.stmt(node, depth)
+        return lines
+
+    def stmt(self, node, depth):
+        pad = "  " * depth
+        if isinstance(node, nodes.Output):
+            parts = [
+                json.dumps(child.data, ensure_ascii=False) if isinstance(child, nodes.TemplateData)
+                else f"py.html({self.expr(child)})"
+                for child in node.nodes
+            ]
+            return [f"{pad}out += {' + '.join(parts)};"] if parts else []
+        if isinstance(node, nodes.If):
+            lines = [f"{pad}if ({self.test(node.test)}) {{", *self.block(node.body, depth + 1)]
+            for elif_ in node.elif_:
+                lines += [f"{pad}}} else if ({self.test(elif_.test)}) {{", *self.block(elif_.body, depth + 1)]
+            if node.else_:
+                lines += [f"{pad}}} else {{", *self.block(node.else_, depth + 1)]
+            return lines + [f"{pad}}}"]
+        if isinstance(node, nodes.For):
+            if node.else_ or node.test is not None or node.recursive:
+                self.fail(node, "for/else, loop filters and recursive loops are not supported")
+            source = self.expr(node.iter)
+            scope = {n.name: _ident(n.name) for n in node.target.find_all(nodes.Name)}
+            if isinstance(node.target, nodes.Name):
+                scope[node.target.name] = _ident(node.target.name)
+            self.scopes.append(scope)
+            head = f"for (const {self.target(node.target)} of py.iter({source}))"
+            lines = [f"{pad}{head} {{", *self.block(node.body, depth + 1), f"{pad}}}"]
+            self.scopes.pop()
+            return lines
+        if isinstance(node, nodes.Assign):
+            if not isinstance(node.target, nodes.Name):
+                self.fail(node, "only {% set name = ... %} is supported")
+            return [f"{pad}{self.scopes[0][node.target.name]} = {self.expr(node.node)};"]
+        if isinstance(node, nodes.Include):
+            if not isinstance(node.template, nodes.Const) or node.ignore_missing or not node.with_context:
+                self.fail(node, "only {% include \"name\" %} is supported")
+            return [f"{pad}out += {self.module.template(self.env, node.template.value)}(ctx);"]
+        self.fail(node, f"unsupported tag {type(node).__name__}")
+
+    def target(self, node):
+        if isinstance(node, nodes.Name):
+            return self.lookup(node, node.name)
+        if isinstance(node, nodes.Tuple):
+            return f"[{', '.join(self.target(item) for item in node.items)}]"
+        self.fail(node, "unsupported loop target")
+
+    def lookup(self, node, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        self.fail(node, f"unknown name '{name}'")
+
+    def test(self, node):
+        if isinstance(node, (nodes.And, nodes.Or)):
+            joiner = " && " if isinstance(node, nodes.And) else " || "
+            return f"({self.test(node.left)}{joiner}{self.test(node.right)})"
+        if isinstance(node, nodes.Not):
+            return f"!{self.test(node.node)}"
+        if isinstance(node, nodes.Compare):
+            return self.compare(node)
+        return f"py.truth({self.expr(node)})"
+
+    def compare(self, node):
+        parts, left = [], node.expr
+        for operand in node.ops:
+            a, b = self.expr(left), self.expr(operand.expr)
+            if operand.op in JINJA_COMPARISONS:
+                parts.append(f"({a} {JINJA_COMPARISONS[operand.op]} {b})")
+            elif operand.op in ("eq", "ne"):
+                parts.append(f"{'!' if operand.op == 'ne' else ''}py.eq({a}, {b})")
+            elif operand.op in ("in", "notin"):
+                parts.append(f"{'!' if operand.op == 'notin' else ''}py.contains({b}, {a})")
+            else:
+                self.fail(node, f"unsupported comparison '{operand.op}'")
+            left = operand.expr
+        return parts[0] if len(parts) == 1 else f"({' && '.join(parts)})"
+
+    def expr(self, node):
+        if isinstance(node, nodes.Const):
+            try:
+                return js_value(node.value)
+            except TranslationError as e:
+                self.fail(node, str(e))
+        if isinstance(node, nodes.Name):
+            if node.name == "gauges":
+                self.fail(node, "gauges can only be called: gauges.<name>(...)")
+            return self.lookup(node, node.name)
+        if isinstance(node, nodes.Getattr):
+            return f"py.getattr({self.expr(node.node)}, {json.dumps(node.attr)})"
+        if isinstance(node, nodes.Getitem):
+            if isinstance(node.arg, nodes.Slice):
+                if node.arg.step is not None:
+                    self.fail(node, "slice steps are not supported")
+                start = self.expr(node.arg.start) if node.arg.start else "null"
+                stop = self.expr(node.arg.stop) if node.arg.stop else "null"
+                return f"py.slice({self.expr(node.node)}, {start}, {stop})"
+            return f"py.item({self.expr(node.node)}, {self.expr(node.arg)})"
+        if isinstance(node, nodes.Call):
+            return self.call(node)
+        if isinstance(node, nodes.Filter):
+            if node.name not in FILTERS or node.args or node.kwargs or node.dyn_args or node.dyn_kwargs:
+                self.fail(node, f"unsupported filter '{node.name}'")
+            return f"py.filters.{node.name}({self.expr(node.node)})"
+        if isinstance(node, nodes.CondExpr):
+            orelse = self.expr(node.expr2) if node.expr2 is not None else "py.UNDEF"
+            return f"({self.test(node.test)} ? {self.expr(node.expr1)} : {orelse})"
+        if isinstance(node, nodes.Compare):
+            return self.compare(node)
+        if isinstance(node, nodes.Not):
+            return f"!{self.test(node.node)}"
+        if isinstance(node, (nodes.And, nodes.Or)):
+            fn = "and" if isinstance(node, nodes.And) else "or"
+            return f"py.{fn}({self.expr(node.left)}, () => {self.expr(node.right)})"
+        if isinstance(node, (nodes.Tuple, nodes.List)):
+            return f"[{', '.join(self.expr(item) for item in node.items)}]"
+        if isinstance(node, nodes.Dict):
+            if not all(isinstance(p.key, nodes.Const) and isinstance(p.key.value, str) for p in node.items):
+                self.fail(node, "only dicts with string keys are supported")
+            pairs = (f"{json.dumps(p.key.value, ensure_ascii=False)}: {self.expr(p.value)}" for p in node.items)
+            return "{" + ", ".join(pairs) + "}"
+        if isinstance(node, nodes.Neg):
+            return f"py.neg({self.expr(node.node)})"
+        if type(node) in JINJA_BINOPS:
+            return f"py.{JINJA_BINOPS[type(node)]}({self.expr(node.left)}, {self.expr(node.right)})"
+        if isinstance(node, nodes.Concat):
+            return f"({' + '.join(f'py.str({self.expr(n)})' for n in node.nodes)})"
+        self.fail(node, f"unsupported expression {type(node).__name__}")
+
+    def call(self, node):
+        if node.dyn_args or node.dyn_kwargs:
+            self.fail(node, "*args and **kwargs are not supported")
+        args = [self.expr(a) for a in node.args]
+        kwargs = {k.key: self.expr(k.value) for k in node.kwargs}
+        callee = node.node
+        if not isinstance(callee, nodes.Getattr):
+            self.fail(node, "only gauges.<name>(...) and method calls are supported")
+        if isinstance(callee.node, nodes.Name) and callee.node.name == "gauges":
+            func = getattr(gauges, callee.attr, None)
+            if not inspect.isfunction(func) or callee.attr.startswith("_"):
+                self.fail(node, f"unknown gauge '{callee.attr}'")
+            try:
+                return f"gauges.{callee.attr}({_bind(func, args, kwargs)})"
+            except TranslationError as e:
+                self.fail(node, str(e))
+        if kwargs or callee.attr not in METHODS:
+            self.fail(node, f"unsupported method .{callee.attr}()")
+        return f"M.{callee.attr}({', '.join([self.expr(callee.node), *args])})"
+
+
+# -------------------------
+# Modules
+# -------------------------
+_template_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+
+
+def _read_runtime():
+    with open(RUNTIME_PATH, encoding="utf-8") as f:
+        return f.read()
+
+
+def _runtime_names(source):
+    return set(re.findall(r"^(?:export\s+)?(?:const|let|class|function)\s+(\w+)", source, re.M))
+
+
+def _gauge_functions():
+    return {
+        name: func for name, func in vars(gauges).items()
+        if inspect.isfunction(func) and func.__module__ == gauges.__name__ and not name.startswith("_")
+    }
+
+
+def runtime_module():
+    runtime = _read_runtime()
+    module = Module(reserved=_runtime_names(runtime))
+    exports = {name: module.function(func) for name, func in _gauge_functions().items()}
+    listing = ", ".join(name if js == name else f"{name}: {js}" for name, js in exports.items())
+    return (
+        f"{runtime}\n"
+        "// --- gauges.py (generated by clientgen.py) ---\n"
+        f"{module.source()}\n"
+        f"export const gauges = {{ {listing} }};\n"
+    )
+
+
+def tool_module(calc, runtime_url):
+    fields = []
+    for field in calc.fields:
+        if field.type not in FIELD_TYPES:
+            raise TranslationError(f"{calc.name}: field '{field.name}' needs the server ({field.type} input)")
+        fields.append(
+            f"{{ name: {json.dumps(field.name)}, type: {json.dumps(FIELD_TYPES[field.type])}, "
+            f"required: {js_value(field.required)}, default: {js_value(field.default)}, "
+            f"choices: {js_value(field.choices)} }}"
+        )
+
+    module = Module()
+    compute = module.function(calc.compute)
+    template = module.template(_template_env, RESULT_TEMPLATE.format(calc.name))
+    fields_js = "".join(f"  {field},\n" for field in fields)
+    return (
+        f"// Generated by clientgen.py from calculators.py and templates/{RESULT_TEMPLATE.format(calc.name)}; "
+        "do not edit.\n"
+        f'import {{ F, M, gauges, py, register }} from "{runtime_url}";\n\n'
+        f"{module.source()}\n"
+        f"register({json.dumps(calc.name)}, [\n{fields_js}], {compute}, {template});\n"
+    )
+
+
+def tool_modules(runtime_url):
+    # -> ({tool: module source}, {tool: why it stays server-only})
+    modules, server_only = {}, {}
+    for name, calc in calculators.TOOLS.items():
+        try:
+            modules[name] = tool_module(calc, runtime_url)
+        except TranslationError as e:
+            server_only[name] = str(e)
+    return modules, server_only
+
+
+# -------------------------
+# Parity check (`python clientgen.py [vectors per tool]`, needs node)
+# -------------------------
+_NODE_DRIVER = """\
+import { readFileSync } from "node:fs";
+import { py, render } from "./calc-runtime.js";
+
+for (const tool of process.argv.slice(2)) await import(`./calc-${tool}.js`);
+const out = [];
+for (const { tool, values } of JSON.parse(readFileSync(0, "utf8"))) {
+  try {
+    const { html, permalink, result } = render(tool, new Map(Object.entries(values)));
+    out.push({ json: py.json(result), permalink, html });
+  } catch (e) {
+    out.push({ exception: String(e && e.stack || e) });
+  }
+}
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def _sample(field, rng):
+    # form values that reach every branch: plausible numbers at several
+    # scales, blanks, and the odd malformed entry
+    roll = rng.random()
+    if field.type is calculators.TIME:
+        if roll < 0.3:
+            return ""
+        if roll < 0.35:
+            return rng.choice(["24:00", "7:30", "noon", " 07:30 "])
+        return f"{rng.randrange(24):02d}:{rng.randrange(60):02d}"
+    if field.choices:
+        if roll < 0.05:
+            return rng.choice(["", "bogus"])
+        return rng.choice(field.choices)
+    if roll < (0.3 if not field.required else 0.03):
+        return ""
+    if roll < 0.1:
+        return rng.choice(["0", "-3", "abc", " 72.5 ", "1e2", "70.005", "1_000", "nan", "0.125", "2.675"])
+    if roll < 0.45:
+        return str(rng.randint(0, 12))
+    return str(round(rng.uniform(0, 250), rng.choice([0, 1, 2, 3])))
+
+
+def vectors(count, seed=0):
+    import random
+
+    rng = random.Random(seed)
+    out = []
+    for name, calc in calculators.TOOLS.items():
+        for _ in range(count):
+            values = {field.name: _sample(field, rng) for field in calc.fields}
+            out.append({"tool": name, "values": values})
+    return out
+
+
+def _server_side(items):
+    from flask import render_template
+    from werkzeug.datastructures import MultiDict
+
+    import app as webapp
+
+    expected = []
+    with webapp.app.app_context():
+        for item in items:
+            tool, template = item["tool"], RESULT_TEMPLATE.format(item["tool"])
+            try:
+                record = webapp._parse(tool, MultiDict(item["values"]))
+            except calculators.ValidationError as e:
+                result, permalink = {"error": str(e)}, None
+                html = render_template(template, result=result)
+            else:
+                permalink = f"/{tool}/r/{calculators.encode_token(record)}"
+                _, result = webapp._evaluate(tool, record)
+                html = render_template(template, result=result, permalink=permalink)
+            expected.append({"json": json.dumps(result, ensure_ascii=False), "permalink": permalink, "html": html})
+    return expected
+
+
+def check(count=200, seed=0, out=sys.stdout):
+    import shutil
+    import subprocess
+    import tempfile
+
+    node = shutil.which("node")
+    if node is None:
+        raise SystemExit("node is needed to run the generated modules")
+    modules, server_only = tool_modules(f"./{RUNTIME_MODULE}")
+    items = [item for item in vectors(count, seed) if item["tool"] in modules]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {RUNTIME_MODULE: runtime_module(), "driver.mjs": _NODE_DRIVER}
+        files.update((TOOL_MODULE.format(name), source) for name, source in modules.items())
+        for name, source in files.items():
+            with open(os.path.join(tmp, name), "w", encoding="utf-8") as f:
+                f.write(source)
+        run = subprocess.run(
+            [node, "driver.mjs", *modules], cwd=tmp, input=json.dumps(items),
+            capture_output=True, text=True, encoding="utf-8",
+        )
+    if run.returncode:
+        raise SystemExit(run.stderr)
+    actual = json.loads(run.stdout)
+    expected = _server_side(items)
+
+    mismatches = {}
+    for item, want, got in zip(items, expected, actual):
+        for part in ("json", "permalink", "html"):
+            if got.get(part) != want[part]:
+                mismatches.setdefault(item["tool"], []).append((item["values"], part, want[part], got))
+                break
+    for name in modules:
+        failed = mismatches.get(name, [])
+        print(f"{name:16} {count} vectors, {len(failed)} mismatches", file=out)
+        for values, part, want, got in failed[:3]:
+            print(f"  input  {values}\n  {part:6} python: {want!r}\n         browser: {got.get(part, got)!r}", file=out)
+    for name, reason in server_only.items():
+        print(f"{name:16} server-only: {reason}", file=out)
+    return sum(len(failed) for failed in mismatches.values())
+
+
+if __name__ == "__main__":
+    failures = check(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,180 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import reports
+
+
+# -------------------------
+# Cohort reports (`python -m cohort people.csv reports/ [--format html]`)
+# -------------------------
+# Reads a CSV with one person per row (form field names as columns, optional
+# "id"), sends CHUNK_ROWS rows at a time to a process pool and writes one
+# report per person to OUT_DIR/people/<chunk>/<id>.json|html. A finished
+# chunk leaves its partial summary in OUT_DIR/chunks/, so running the same
+# command again after an interruption skips the chunks already done. The
+# merged summary goes to OUT_DIR/summary.json (and summary.html).
+
+CHUNK_ROWS = 500
+FORMATS = ("json", "html")
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def _write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _chunk_path(out_dir, n):
+    return os.path.join(out_dir, "chunks", f"{n:05d}.json")
+
+
+def process_chunk(out_dir, fmt, n, start, rows):
+    # runs in a worker; only the chunk's summary travels back
+    people_dir = os.path.join(out_dir, "people", f"{n:05d}")
+    os.makedirs(people_dir, exist_ok=True)
+    for name in os.listdir(people_dir):
+        if name.endswith(".tmp"):  # from an interrupted attempt at this chunk
+            os.remove(os.path.join(people_dir, name))
+    summary = reports.Summary()
+    for offset, row in enumerate(rows):
+        person_id = (row.get("id") or "").strip() or str(start + offset + 1)
+        report = reports.person_report(row, person_id)
+        summary.add(report)
+        if fmt == "html":
+            body = reports.render_person(report)
+        else:
+            body = json.dumps(report, ensure_ascii=False, separators=(",", ":"))  # compact: C encoder
+        _write(os.path.join(people_dir, f"{_UNSAFE.sub('_', person_id)}.{fmt}"), body)
+    _write(_chunk_path(out_dir, n), json.dumps(summary.state))
+    return len(rows)
+
+
+def _chunks(path, chunk_rows):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for n in itertools.count():
+            rows = list(itertools.islice(reader, chunk_rows))
+            if not rows:
+                return
+            yield n, n * chunk_rows, rows
+
+
+def _count_rows(path):
+    # progress estimate only; quoted newlines make it approximate
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return max(count - 1, 0)
+
+
+def _check_run(out_dir, args):
+    # resuming is only safe with the same input and chunking
+    stat = os.stat(args.input)
+    run = {
+        "input": os.path.abspath(args.input),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "chunk_rows": args.chunk_rows,
+        "format": args.format,
+    }
+    path = os.path.join(out_dir, "run.json")
+    if os.path.exists(path) and not args.restart:
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != run:
+            sys.exit(f"{out_dir} holds a run with different input or options; use --restart to discard it")
+    elif args.restart:
+        for name in ("chunks", "people"):
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+        os.makedirs(os.path.join(out_dir, "chunks"))
+    _write(path, json.dumps(run, indent=2))
+
+
+class Progress:
+    def __init__(self, total, out=sys.stderr):
+        self.total = total
+        self.out = out
+        self.done = 0
+        self.resumed = 0
+        self.started = time.perf_counter()
+        self._shown = 0.0
+
+    def update(self, rows, resumed=False, force=False):
+        self.done += rows
+        if resumed:
+            self.resumed += rows
+        now = time.perf_counter()
+        if not force and now - self._shown < 1:
+            return
+        self._shown = now
+        processed = self.done - self.resumed
+        rate = processed / max(now - self.started, 1e-9)
+        eta = (self.total - self.done) / rate if rate and self.total > self.done else 0
+        pct = 100 * self.done / self.total if self.total else 100
+        print(f"{self.done}/{self.total} people ({pct:.0f}%), {rate:.0f}/s, ETA {eta:.0f}s", file=self.out, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cohort", description="Per-person health reports for a CSV cohort")
+    parser.add_argument("input", help="CSV, one person per row")
+    parser.add_argument("out_dir", help="output directory (reused to resume)")
+    parser.add_argument("--format", choices=FORMATS, default="json", help="per-person report format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows sent to a worker at a time")
+    parser.add_argument("--restart", action="store_true", help="discard progress from an earlier run")
+    args = parser.parse_args(argv)
+
+    out_dir = args.out_dir
+    os.makedirs(os.path.join(out_dir, "chunks"), exist_ok=True)
+    _check_run(out_dir, args)
+
+    progress = Progress(_count_rows(args.input))
+    summary = reports.Summary()
+    pending = set()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for n, start, rows in _chunks(args.input, args.chunk_rows):
+            path = _chunk_path(out_dir, n)
+            if os.path.exists(path):
+                progress.update(len(rows), resumed=True)
+                continue
+            if len(pending) >= 2 * args.workers:  # bounded: the input is never all in memory
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    progress.update(future.result())
+            pending.add(pool.submit(process_chunk, out_dir, args.format, n, start, rows))
+        for future in wait(pending).done:
+            progress.update(future.result())
+    progress.update(0, force=True)
+
+    for name in sorted(os.listdir(os.path.join(out_dir, "chunks"))):
+        if not name.endswith(".json"):
+            continue  # a temp file left by an interrupted worker
+        with open(os.path.join(out_dir, "chunks", name), encoding="utf-8") as f:
+            summary.merge(json.load(f))
+    result = summary.to_dict()
+    _write(os.path.join(out_dir, "summary.json"), json.dumps(result, ensure_ascii=False, indent=2))
+    if args.format == "html":
+        _write(os.path.join(out_dir, "summary.html"), reports.render_summary(result))
+
+    elapsed = time.perf_counter() - progress.started
+    processed = progress.done - progress.resumed
+    print(
+        f"{progress.done} people ({progress.resumed} from an earlier run) in {elapsed:.1f}s, "
+        f"{processed / max(elapsed, 1e-9):.0f}/s -> {out_dir}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
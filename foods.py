@@ -0,0 +1,329 @@
+import csv
+import difflib
+import json
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+
+# -------------------------
+# Columnar food store (data/foods.csv -> data/foods.bin, memory-mapped)
+# -------------------------
+# data/foods.csv is the editable source: one row per food with its display
+# unit, the base quantity the values refer to (100 for "per 100g", 1 for
+# "per piece") and one column per nutrient (blank = unknown). It is compiled
+# into a compact binary file: a small JSON header (names, units, aliases)
+# followed by a float64 matrix. Workers map the matrix read-only, so the OS
+# shares its pages between gunicorn processes and nothing is parsed at import.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SOURCE_PATH = os.path.join(DATA_DIR, "foods.csv")
+STORE_PATH = os.environ.get("FOOD_STORE_PATH", os.path.join(DATA_DIR, "foods.bin"))
+
+NUTRIENTS = ("protein", "carbs", "sugar", "fat", "fibre", "kcal")
+TABLES = ("protein", "sugar")  # nutrients that back a calculator's food list
+
+_MAGIC = b"FFXFOOD1"
+_PREFIX = struct.Struct("<8sQ")  # magic, header length (padded to 8 bytes)
+
+
+def compile_store(source=SOURCE_PATH, target=STORE_PATH):
+    names, units, aliases, rows = [], [], [], []
+    with open(source, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            names.append(row["name"])
+            units.append(row["unit"])
+            aliases.append([a for a in row.get("aliases", "").split("|") if a])
+            values = [float(row[n]) if row.get(n) else np.nan for n in NUTRIENTS]
+            rows.append(values + [1.0 / float(row["base"])])
+
+    columns = list(NUTRIENTS) + ["scale"]
+    matrix = np.array(rows, dtype="<f8").reshape(len(rows), len(columns))
+    header = json.dumps(
+        {"columns": columns, "names": names, "units": units, "aliases": aliases},
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+    header += b" " * (-(_PREFIX.size + len(header)) % 8)
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, len(header)))
+        f.write(header)
+        f.write(matrix.tobytes())
+    os.replace(tmp, target)  # atomic, safe with several workers racing
+    return target
+
+
+class FoodStore:
+    def __init__(self, path=STORE_PATH):
+        with open(path, "rb") as f:
+            magic, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a food store file")
+            header = json.loads(f.read(header_len))
+        self.path = path
+        self.columns = header["columns"]
+        self.names = header["names"]
+        self.units = header["units"]
+        self.aliases = header["aliases"]
+        self.matrix = np.memmap(
+            path, dtype="<f8", mode="r", offset=_PREFIX.size + header_len,
+            shape=(len(self.names), len(self.columns)),
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, name):
+        return self.matrix[:, self.columns.index(name)]
+
+
+def _is_stale(source=SOURCE_PATH, target=STORE_PATH):
+    return not os.path.exists(target) or (
+        os.path.exists(source) and os.path.getmtime(target) < os.path.getmtime(source)
+    )
+
+
+_lock = threading.Lock()
+_store = None
+_indexes = {}
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                if _is_stale():
+                    compile_store()
+                _store = FoodStore()
+    return _store
+
+
+def index(nutrient):
+    food_index = _indexes.get(nutrient)
+    if food_index is None:
+        store = get_store()
+        with _lock:
+            food_index = _indexes.get(nutrient)
+            if food_index is None:
+                food_index = _indexes[nutrient] = FoodIndex(store, nutrient)
+    return food_index
+
+
+# -------------------------
+# Typo-tolerant food search (prefix trie + trigram index)
+# -------------------------
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_IDS = ""  # trie key holding the term ids below a node
+TRIE_NODE_CAP = 64
+TYPO_RESCORE = 8  # best trigram candidates re-scored by edit similarity
+
+
+def _normalize(text):
+    return _NON_WORD.sub(" ", str(text).lower()).strip()
+
+
+def _trigrams(norm):
+    grams = set()
+    for word in norm.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class FoodSearch:
+    def __init__(self, names, aliases=None):
+        aliases = aliases or {}
+        self.terms = []  # (food id, normalized term, alias or None)
+        self.gram_count = []
+        self.grams = defaultdict(list)
+        self.trie = {}
+
+        for food_id, name in enumerate(names):
+            for term, alias in [(name, None)] + [(a, a) for a in aliases.get(name, ())]:
+                norm = _normalize(term)
+                if not norm:
+                    continue
+                term_id = len(self.terms)
+                self.terms.append((food_id, norm, alias))
+                for key in {norm, *norm.split()}:
+                    self._insert(key, term_id)
+                grams = _trigrams(norm)
+                self.gram_count.append(len(grams))
+                for gram in grams:
+                    self.grams[gram].append(term_id)
+
+        # freeze postings into arrays so overlap counting stays in NumPy
+        self.grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in self.grams.items()}
+        self.gram_count = np.array(self.gram_count, dtype=np.float64)
+
+    def _insert(self, key, term_id):
+        node = self.trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+            ids = node.setdefault(_IDS, [])
+            if len(ids) < TRIE_NODE_CAP and (not ids or ids[-1] != term_id):
+                ids.append(term_id)
+
+    def _prefix(self, norm):
+        node = self.trie
+        for ch in norm:
+            node = node.get(ch)
+            if node is None:
+                return ()
+        return node.get(_IDS, ())
+
+    def search(self, query, limit=10, min_score=0.3):
+        norm = _normalize(query)
+        if not norm:
+            return []
+
+        best = {}  # food id -> (score, term id)
+
+        def offer(term_id, score):
+            food_id = self.terms[term_id][0]
+            if score > best.get(food_id, (0.0,))[0]:
+                best[food_id] = (score, term_id)
+
+        # exact / prefix hits rank above fuzzy ones
+        for term_id in self._prefix(norm):
+            term = self.terms[term_id][1]
+            offer(term_id, 1.0 if term == norm else 0.8 + 0.2 * len(norm) / len(term))
+
+        # trigram similarity (Dice coefficient) for typos and spelling variants
+        query_grams = _trigrams(norm)
+        postings = [self.grams[gram] for gram in query_grams if gram in self.grams]
+        if postings:
+            term_ids, shared = np.unique(np.concatenate(postings), return_counts=True)
+            scores = 0.9 * 2 * shared / (len(query_grams) + self.gram_count[term_ids])
+            # short words share few trigrams even when one letter is off
+            # ("panner" / "paneer"), so the closest candidates also get an
+            # edit-similarity score and keep whichever is higher
+            for i in np.argsort(-scores, kind="stable")[:TYPO_RESCORE].tolist():
+                similar = difflib.SequenceMatcher(None, norm, self.terms[term_ids[i]][1]).ratio()
+                scores[i] = max(scores[i], 0.9 * similar)
+            keep = scores >= min_score
+            for term_id, score in zip(term_ids[keep].tolist(), scores[keep].tolist()):
+                offer(term_id, score)
+
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], len(self.terms[kv[1][1]][1])))
+        return [
+            (food_id, round(score, 3), self.terms[term_id][2])
+            for food_id, (score, term_id) in ranked[:limit]
+        ]
+
+    def best(self, query, min_score=0.5, margin=0.0):
+        # -> (food id, score, alias) of an exact name/alias hit, else of a hit
+        # at least `margin` ahead of the runner-up; None without a clear winner
+        hits = self.search(query, limit=2, min_score=min_score - margin)
+        if not hits or hits[0][1] < min_score:
+            return None
+        if hits[0][1] < 1.0 and len(hits) > 1 and hits[0][1] - hits[1][1] < margin:
+            return None
+        return hits[0]
+
+
+# -------------------------
+# Precompiled food index
+# -------------------------
+# Each calculator's food list is the set of store rows with a known value
+# for its nutrient, compiled into parallel arrays: integer ids, a float64
+# nutrient-per-base-unit column and the per-unit scaling factor. Line items
+# then resolve in O(1) and totals come from one dot product. Names that do
+# not match exactly fall back to the fuzzy search above: an alias or the name
+# up to case and punctuation is taken as is, anything else only when it is a
+# clear winner (FUZZY_MIN_SCORE, FUZZY_MARGIN ahead of the next food). Such
+# guesses are marked in the breakdown and names that match nothing are returned.
+
+FUZZY_MIN_SCORE = 0.75
+FUZZY_MARGIN = 0.1
+
+
+class FoodIndex:
+    def __init__(self, store, nutrient):
+        values = store.column(nutrient)
+        rows = np.flatnonzero(~np.isnan(values)).tolist()
+        self.nutrient = nutrient
+        self.names = [store.names[r] for r in rows]
+        self.units = [store.units[r] for r in rows]
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.per_unit = np.asarray(values[rows], dtype=np.float64)
+        self.scale = np.asarray(store.column("scale")[rows], dtype=np.float64)
+        self.factor = self.per_unit * self.scale
+        self.search = FoodSearch(self.names, {store.names[r]: store.aliases[r] for r in rows})
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, key):
+        # an integer id or an exact food name -> id; anything else -> None
+        if isinstance(key, str):
+            return self.ids.get(key)
+        if isinstance(key, (int, np.integer)) and not isinstance(key, bool) and 0 <= key < len(self.names):
+            return int(key)
+        return None
+
+    def match(self, key):
+        # -> (food id or None, guessed): exact first, then a clear fuzzy winner
+        food_id = self.resolve(key)
+        if food_id is not None or not isinstance(key, str):
+            return food_id, False
+        hit = self.search.best(key, FUZZY_MIN_SCORE, FUZZY_MARGIN)
+        if hit is None:
+            return None, False
+        return hit[0], hit[1] < 1.0  # 1.0: same name up to case and punctuation
+
+    def evaluate(self, items):
+        # -> (total, breakdown, names that matched no food)
+        ids, qtys, guesses, unmatched = [], [], {}, []
+        for key, qty in items:
+            food_id, guessed = self.match(key)
+            if food_id is None:
+                if str(key).strip():
+                    unmatched.append(str(key))
+                continue
+            if guessed:
+                guesses[len(ids)] = str(key)
+            ids.append(food_id)
+            qtys.append(qty)
+        if not ids:
+            return 0.0, [], unmatched
+
+        ids = np.fromiter(ids, dtype=np.intp, count=len(ids))
+        qtys = np.fromiter(qtys, dtype=np.float64, count=len(ids))
+        factors = self.factor[ids]
+        total = float(factors @ qtys)
+        amounts = np.round(factors * qtys, 2).tolist()
+
+        names, units, nutrient = self.names, self.units, self.nutrient
+        breakdown = [
+            {"item": names[i], "qty": q, nutrient: a, "unit": units[i]}
+            for i, q, a in zip(ids.tolist(), qtys.tolist(), amounts)
+        ]
+        for row, key in guesses.items():
+            breakdown[row]["guessed_from"] = key
+        return total, breakdown, unmatched
+
+    def suggest(self, query, limit=10):
+        return [
+            {
+                "id": food_id,
+                "name": self.names[food_id],
+                "alias": alias,
+                self.nutrient: float(self.per_unit[food_id]),
+                "unit": self.units[food_id],
+                "score": score,
+            }
+            for food_id, score, alias in self.search.search(query, limit)
+        ]
+
+
+if __name__ == "__main__":
+    path = compile_store()
+    store = FoodStore(path)
+    print(f"Compiled {len(store)} foods x {len(store.columns)} columns into {path} ({os.path.getsize(path)} bytes)")
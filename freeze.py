@@ -0,0 +1,110 @@
+import os
+import shutil
+
+import assets
+import cache
+
+
+# -------------------------
+# Static export (`flask --app app freeze [OUT_DIR]`)
+# -------------------------
+# Every GET route without URL arguments (calculator shells, /, sitemap.xml,
+# robots.txt, favicon.ico, the PWA manifest and sw.js) renders the same bytes
+# for every visitor, so it is rendered once through the app and written to
+# OUT_DIR for a CDN. Pages go to
+# <route>/index.html, the static tree is copied with only the current
+# fingerprinted files of static/dist/, and every text file gets precompressed
+# .gz (and .br with Brotli installed) siblings. Only POST, /api/*,
+# /<tool>/fragment and /<tool>/r/<token> need to reach gunicorn.
+
+DEFAULT_OUT_DIR = "dist"
+TEXT_TYPES = (
+    "text/", "application/xml", "application/json", "application/manifest+json", "application/javascript", "image/svg+xml",
+)
+TEXT_EXTENSIONS = (".html", ".xml", ".txt", ".css", ".js", ".json", ".svg")
+SKIPPED_PREFIXES = ("/api/", "/static/", "/metrics", "/debug/")  # live, per-server data
+
+# Netlify / Cloudflare Pages header rules, mirroring what the app sends for
+# fingerprinted files and the service worker; everything else keeps the CDN's
+# default caching
+HEADERS = (
+    ("/static/dist/*", assets.IMMUTABLE),
+    ("/sw.js", "no-cache"),
+)
+
+
+def static_routes(app):
+    for rule in app.url_map.iter_rules():
+        if rule.arguments or "GET" not in rule.methods or rule.rule.startswith(SKIPPED_PREFIXES):
+            continue
+        yield rule.rule
+
+
+def _output_path(route, mimetype):
+    path = route.strip("/")
+    if mimetype == "text/html" and not path.endswith(".html"):
+        path = os.path.join(path, "index.html")
+    return path
+
+
+def _write(out_dir, path, data):
+    target = os.path.join(out_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(data)
+    return target
+
+
+def _precompress(target, data):
+    page = cache.Page(data, best=True)
+    for encoding, ext in (("gzip", ".gz"), ("br", ".br")):
+        encoded = page.encoded.get(encoding)
+        if encoded is not None and len(encoded) < len(data):
+            with open(target + ext, "wb") as f:
+                f.write(encoded)
+
+
+def _static_files():
+    # (path under static/, absolute path); stale fingerprinted builds are left out
+    current = {path for name, path in assets.manifest().items()}
+    for root, dirs, files in os.walk(assets.STATIC_DIR):
+        for name in files:
+            source = os.path.join(root, name)
+            rel = os.path.relpath(source, assets.STATIC_DIR).replace(os.sep, "/")
+            if rel.startswith("dist/") and rel not in current:
+                continue
+            yield rel, source
+
+
+def freeze(app, out_dir=DEFAULT_OUT_DIR):
+    # only a previous export (it has _headers) is replaced wholesale
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        if not os.path.exists(os.path.join(out_dir, "_headers")):
+            raise RuntimeError(f"{out_dir} is not empty and is not a previous export")
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+
+    client = app.test_client()
+    for route in static_routes(app):
+        response = client.get(route)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {route} returned {response.status_code}")
+        data = response.get_data()
+        target = _write(out_dir, _output_path(route, response.mimetype), data)
+        if response.mimetype.startswith(TEXT_TYPES):
+            _precompress(target, data)
+        written.append((route, target, len(data)))
+
+    for rel, source in _static_files():
+        target = os.path.join(out_dir, "static", rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+        if rel.endswith(TEXT_EXTENSIONS):
+            with open(source, "rb") as f:
+                _precompress(target, f.read())
+        written.append((f"/static/{rel}", target, os.path.getsize(target)))
+
+    rules = "".join(f"{pattern}\n  Cache-Control: {value}\n" for pattern, value in HEADERS)
+    _write(out_dir, "_headers", rules.encode("utf-8"))
+    return written
@@ -0,0 +1,144 @@
+import functools
+import math
+
+from markupsafe import Markup, escape
+
+
+# -------------------------
+# Server-side SVG gauges
+# -------------------------
+# Result pages draw their scales as inline SVG, so they render without
+# JavaScript or a chart library. The static part of each gauge (segment
+# layout, background track) depends only on the scale and is memoized; per
+# request only the pointer / value arc is composed onto it.
+
+COLORS = {
+    "primary": "#0d6efd",
+    "info": "#0dcaf0",
+    "success": "#198754",
+    "warning": "#ffc107",
+    "orange": "#fd7e14",
+    "danger": "#dc3545",
+    "dark-red": "#b71c1c",
+    "blue": "#2196f3",
+    "green": "#4caf50",
+    "amber": "#ffc107",
+    "red": "#f44336",
+    "track": "#e0e0e0",
+}
+
+BAR_HEIGHT = 36
+
+
+def _color(name):
+    return COLORS.get(name, name)
+
+
+def _pct(value):
+    return f"{max(0.0, min(100.0, float(value))):g}"
+
+
+# --- Linear scale: coloured segments with a pointer ---
+@functools.lru_cache(maxsize=256)
+def _bar_track(segments, colors, label):
+    rects, x = [], 0.0
+    for width, color in zip(segments, colors):
+        rects.append(f'<rect x="{_pct(x)}%" y="16" width="{_pct(width)}%" height="16" fill="{_color(color)}"/>')
+        x += width
+    return (
+        f'<svg class="gauge-bar" style="display:block" width="100%" height="{BAR_HEIGHT}" role="img" '
+        f'aria-label="{escape(label)}" overflow="visible">'
+        + "".join(rects)
+    )
+
+
+def bar(segments, colors, pointer_pct=None, label="Scale"):
+    svg = _bar_track(tuple(float(s) for s in segments), tuple(colors), label)
+    if pointer_pct is not None:
+        svg += (
+            f'<svg x="{_pct(pointer_pct)}%" y="0" overflow="visible">'
+            '<polygon points="-7,1 7,1 0,13" fill="#212529"/></svg>'
+        )
+    return Markup(svg + "</svg>")
+
+
+@functools.lru_cache(maxsize=64)
+def _threshold_segments(thresholds, maximum, minimum):
+    # [5, 14, 21] on 0..28 -> widths (in %) of 0-5, 5-14, 14-21 and 21-28
+    edges = [minimum, *thresholds, maximum]
+    span = (maximum - minimum) or 1
+    return tuple(round((b - a) / span * 100, 2) for a, b in zip(edges, edges[1:]))
+
+
+def threshold_bar(thresholds, maximum, colors, pointer_pct=None, minimum=0, label="Scale"):
+    segments = _threshold_segments(tuple(thresholds), maximum, minimum)
+    return bar(segments, colors, pointer_pct, label)
+
+
+# --- Half-circle dial (replaces the Chart.js doughnut gauges) ---
+_DIAL_R = 85
+_DIAL_WIDTH = 30
+
+
+def _arc_point(fraction):
+    angle = math.pi * (1 - fraction)
+    return f"{100 + _DIAL_R * math.cos(angle):.2f} {100 - _DIAL_R * math.sin(angle):.2f}"
+
+
+@functools.lru_cache(maxsize=16)
+def _dial_track(label):
+    return (
+        f'<svg class="gauge-dial" viewBox="0 0 200 110" width="100%" style="max-width:240px" role="img" '
+        f'aria-label="{escape(label)}">'
+        f'<path d="M {_arc_point(0)} A {_DIAL_R} {_DIAL_R} 0 0 1 {_arc_point(1)}" fill="none" '
+        f'stroke="{COLORS["track"]}" stroke-width="{_DIAL_WIDTH}"/>'
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _dial_arc(fraction, color):
+    if fraction <= 0:
+        return ""
+    return (
+        f'<path d="M {_arc_point(0)} A {_DIAL_R} {_DIAL_R} 0 0 1 {_arc_point(fraction)}" fill="none" '
+        f'stroke="{_color(color)}" stroke-width="{_DIAL_WIDTH}"/>'
+    )
+
+
+def dial(value, maximum, color, label="Gauge", text=None):
+    fraction = round(max(0.0, min(1.0, float(value) / maximum)), 3) if maximum else 0.0
+    caption = escape(text if text is not None else value)
+    return Markup(
+        _dial_track(label)
+        + _dial_arc(fraction, color)
+        + f'<text x="100" y="98" text-anchor="middle" font-size="22" font-weight="600" fill="#212529">{caption}</text>'
+        + "</svg>"
+    )
+
+
+# --- Full ring split between parts (replaces the Chart.js pie) ---
+_RING_R = 70
+_RING_C = 2 * math.pi * _RING_R
+
+
+def ring(values, colors, labels, label="Breakdown"):
+    values = [max(0, v) for v in values]
+    total = sum(values) or 1
+    parts, offset = [], 0.0
+    for value, color in zip(values, colors):
+        length = _RING_C * value / total
+        parts.append(
+            f'<circle cx="110" cy="100" r="{_RING_R}" fill="none" stroke="{_color(color)}" stroke-width="40" '
+            f'stroke-dasharray="{length:.2f} {_RING_C - length:.2f}" stroke-dashoffset="{-offset:.2f}" '
+            'transform="rotate(-90 110 100)"/>'
+        )
+        offset += length
+    legend = "".join(
+        f'<rect x="{10 + i * 100}" y="214" width="12" height="12" fill="{_color(color)}"/>'
+        f'<text x="{26 + i * 100}" y="225" font-size="12" fill="#212529">{escape(name)}</text>'
+        for i, (name, color) in enumerate(zip(labels, colors))
+    )
+    return Markup(
+        f'<svg class="gauge-ring" viewBox="0 0 220 232" width="100%" style="max-width:260px" role="img" '
+        f'aria-label="{escape(label)}">' + "".join(parts) + legend + "</svg>"
+    )
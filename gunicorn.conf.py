@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+# Loaded automatically by `gunicorn app:app` (Procfile, render.yaml). Workers
+# share their /metrics samples through METRICS_DIR; the app is imported
+# after the fork, so every worker sees the directory set here.
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "fitness-fixe-metrics"))
+
+import metrics  # noqa: E402
+
+
+def on_starting(server):
+    metrics.reset()
+
+
+def child_exit(server, worker):
+    metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,208 @@
+import functools
+import json
+import multiprocessing
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import reports
+
+
+# -------------------------
+# Background report jobs (/api/reports)
+# -------------------------
+# Rendering a printable multi-calculator report is handed to a small process
+# pool, so a web worker only enqueues and polls. Job state and results live
+# on local disk (JOB_DIR/<id>/), which lets any gunicorn worker answer a poll
+# for a job another worker accepted. Each web process admits at most
+# JOB_QUEUE_SIZE unfinished jobs and refuses more (QueueFull -> 503). A pool
+# process that dies (OOM kill, segfault) breaks the whole pool: its jobs are
+# marked failed and the next submit starts a fresh pool (PoolUnavailable ->
+# 503 if that breaks too). Jobs older than JOB_TTL seconds are swept from disk.
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 1))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 16))
+JOB_TTL = int(os.environ.get("JOB_TTL", 3600))
+JOB_DIR = os.environ.get("JOB_DIR", os.path.join(tempfile.gettempdir(), "fitness-fixe-jobs"))
+SWEEP_INTERVAL = 60
+
+# report.html sections, in order; a calculator is skipped when its required
+# fields are missing from the request
+JOB_TOOLS = reports.REPORT_TOOLS + ("stress", "sleep_debt", "alcohol")
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class PoolUnavailable(Exception):
+    pass
+
+
+class NothingToRun(ValueError):
+    pass
+
+
+def _path(job_id, name):
+    return os.path.join(JOB_DIR, job_id, name)
+
+
+def _write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _set_status(job_id, status, **extra):
+    path = _path(job_id, "status.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except OSError:
+        state = {"id": job_id, "created": time.time()}
+    state.update(extra, status=status, updated=time.time())
+    _write(path, json.dumps(state))
+    return state
+
+
+def render(job_id, row):
+    # runs in a pool process
+    _set_status(job_id, RUNNING)
+    try:
+        report = reports.person_report(row, row.get("id") or job_id, JOB_TOOLS)
+        _write(_path(job_id, "report.json"), json.dumps(report, ensure_ascii=False))
+        _write(_path(job_id, "report.html"), reports.render_person(report))
+    except Exception as e:
+        _set_status(job_id, FAILED, error=f"{type(e).__name__}: {e}")
+        return
+    _set_status(job_id, DONE)
+
+
+# --- Per web process: pool, admission and sweeping ---
+_lock = threading.Lock()
+_pool = None
+_unfinished = 0
+_swept = 0.0
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        # spawn: pool processes start clean instead of copying a threaded web worker
+        _pool = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _discard(pool):
+    # a broken pool refuses new work for good; the next _executor() starts over
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _release():
+    global _unfinished
+    with _lock:
+        _unfinished -= 1
+
+
+def _finished(job_id, pool, future):
+    _release()
+    # render() records its own errors, so an exception here means the pool
+    # process died (or the job was cancelled with a broken pool)
+    if future.cancelled() or future.exception() is not None:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            _discard(pool)
+        try:
+            _set_status(job_id, FAILED, error="Report worker stopped before the report was rendered")
+        except OSError:
+            pass
+
+
+def _submit(job_id, row):
+    for _ in range(2):  # one retry with a fresh pool
+        pool = _executor()
+        try:
+            return pool, pool.submit(render, job_id, row)
+        except BrokenProcessPool:
+            _discard(pool)
+    raise PoolUnavailable("report workers could not be started")
+
+
+def submit(row):
+    global _unfinished
+    if not reports.runnable(row, JOB_TOOLS):
+        raise NothingToRun("No calculator has all of its required fields in this request")
+    sweep()
+    with _lock:
+        if _unfinished >= JOB_QUEUE_SIZE:
+            raise QueueFull(f"{_unfinished} reports are already queued")
+        _unfinished += 1
+    job_id = secrets.token_hex(16)
+    try:
+        os.makedirs(os.path.join(JOB_DIR, job_id))
+        state = _set_status(job_id, QUEUED)
+        pool, future = _submit(job_id, row)
+    except PoolUnavailable as e:
+        _release()
+        _set_status(job_id, FAILED, error=str(e))
+        raise
+    except BaseException:
+        _release()
+        raise
+    future.add_done_callback(functools.partial(_finished, job_id, pool))
+    return state
+
+
+def status(job_id):
+    # -> state dict, or None for an unknown or expired job
+    if not _JOB_ID.match(job_id):
+        return None
+    try:
+        with open(_path(job_id, "status.json"), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - state["created"] > JOB_TTL:
+        return None
+    return state
+
+
+def result_path(job_id, fmt):
+    state = status(job_id)
+    if state is None or state["status"] != DONE:
+        return state, None
+    return state, _path(job_id, f"report.{fmt}")
+
+
+def sweep(force=False):
+    global _swept
+    now = time.time()
+    if not force and now - _swept < SWEEP_INTERVAL:
+        return
+    _swept = now
+    try:
+        names = os.listdir(JOB_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(JOB_DIR, name)
+        try:
+            expired = now - os.path.getmtime(path) > JOB_TTL
+        except OSError:
+            continue
+        if expired and _JOB_ID.match(name):
+            shutil.rmtree(path, ignore_errors=True)
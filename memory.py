@@ -0,0 +1,228 @@
+import gc
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not on Windows; peak RSS is then left out
+    resource = None
+
+import metrics
+import profiling
+
+
+# -------------------------
+# Memory instrumentation (/debug/memory)
+# -------------------------
+# Everything here describes the worker process that answers the request (its
+# pid is in every response): RSS, GC generations, the largest live object
+# types and tracemalloc. Named tracemalloc snapshots are dumped to
+# MEMORY_DIR/<pid>-<name>.tracemalloc rather than kept in the worker, at most
+# MAX_SNAPSHOTS per worker, and can be diffed against each other or against
+# "now". tracemalloc costs CPU and memory while it runs: start it, take
+# snapshots around the traffic of interest, then stop it. PYTHONTRACEMALLOC=1
+# traces from startup instead.
+
+MEMORY_DIR = os.environ.get("MEMORY_DIR", os.path.join(tempfile.gettempdir(), "fitness-fixe-memory"))
+TRACE_FRAMES = 1
+MAX_TRACE_FRAMES = 50
+MAX_SNAPSHOTS = 8
+TOP_TYPES = 20
+DIFF_LIMIT = 25
+GROUPS = ("lineno", "filename", "traceback")
+NOW = "now"  # diff against a fresh, unsaved snapshot
+
+_NAME = re.compile(r"^[\w-]{1,40}$")
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _path(name):
+    return os.path.join(MEMORY_DIR, f"{os.getpid()}-{name}.tracemalloc")
+
+
+def _check_name(name):
+    if not _NAME.match(name) or name == NOW:
+        raise ValueError("Snapshot names are 1-40 letters, digits, '_' or '-' (and not 'now')")
+
+
+# --- Process report ---
+def largest_types(limit=TOP_TYPES):
+    # gc only tracks containers, so the strings, numbers and bytes they hold
+    # directly are counted once each as well; sizes are shallow (sys.getsizeof)
+    objects = gc.get_objects()
+    totals = {}
+    seen = set()
+
+    def add(obj):
+        entry = totals.get(type(obj))
+        if entry is None:
+            entry = totals[type(obj)] = [0, 0]
+        entry[0] += 1
+        try:
+            entry[1] += sys.getsizeof(obj)
+        except TypeError:
+            pass
+
+    for obj in objects:
+        add(obj)
+    for obj in gc.get_referents(*objects):
+        if not gc.is_tracked(obj) and id(obj) not in seen:
+            seen.add(id(obj))
+            add(obj)
+    del objects
+    rows = sorted(totals.items(), key=lambda item: -item[1][1])[:limit]
+    return [{"type": f"{t.__module__}.{t.__qualname__}", "count": count, "bytes": size} for t, (count, size) in rows]
+
+
+def tracing_status():
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+    }
+
+
+def report(types=TOP_TYPES):
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource is not None else None
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": metrics.rss_bytes(),
+        "peak_rss_bytes": usage.ru_maxrss * 1024 if usage is not None else None,  # KiB on Linux
+        "gc": {
+            "enabled": gc.isenabled(),
+            "counts": gc.get_count(),
+            "thresholds": gc.get_threshold(),
+            "generations": gc.get_stats(),
+            "garbage": len(gc.garbage),
+        },
+        "tracemalloc": tracing_status(),
+        "snapshots": snapshots(),
+        "largest_types": largest_types(types) if types > 0 else None,
+    }
+
+
+# --- tracemalloc and snapshots ---
+def start(frames=TRACE_FRAMES):
+    frames = max(1, min(frames, MAX_TRACE_FRAMES))
+    if tracemalloc.is_tracing():
+        if tracemalloc.get_traceback_limit() == frames:
+            return tracing_status()
+        tracemalloc.stop()  # restarting is the only way to change the depth
+    tracemalloc.start(frames)
+    return tracing_status()
+
+
+def stop():
+    tracemalloc.stop()  # frees the traces; dumped snapshots stay
+    return tracing_status()
+
+
+def _take():
+    if not tracemalloc.is_tracing():
+        raise SnapshotError("tracemalloc is not running in this worker; start it first")
+    return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+
+def take(name):
+    _check_name(name)
+    existing = {entry["name"] for entry in snapshots()}
+    if name not in existing and len(existing) >= MAX_SNAPSHOTS:
+        raise SnapshotError(f"{MAX_SNAPSHOTS} snapshots already kept by this worker; delete one first")
+    snapshot = _take()
+    os.makedirs(MEMORY_DIR, exist_ok=True)
+    path = _path(name)
+    tmp = f"{path}.tmp"
+    snapshot.dump(tmp)
+    os.replace(tmp, path)
+    return {
+        "name": name,
+        "pid": os.getpid(),
+        "traces": len(snapshot.traces),
+        "traced_bytes": sum(trace.size for trace in snapshot.traces),
+    }
+
+
+def snapshots():
+    prefix, suffix = f"{os.getpid()}-", ".tracemalloc"
+    try:
+        names = os.listdir(MEMORY_DIR)
+    except OSError:
+        return []
+    found = []
+    for file_name in sorted(names):
+        if file_name.startswith(prefix) and file_name.endswith(suffix):
+            stat = os.stat(os.path.join(MEMORY_DIR, file_name))
+            found.append({
+                "name": file_name[len(prefix):-len(suffix)],
+                "file_bytes": stat.st_size,
+                "taken": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(stat.st_mtime)),
+            })
+    return found
+
+
+def delete(name):
+    _check_name(name)
+    try:
+        os.remove(_path(name))
+    except FileNotFoundError:
+        raise KeyError(name) from None
+
+
+def _load(name):
+    if name == NOW:
+        return _take()
+    _check_name(name)
+    try:
+        return tracemalloc.Snapshot.load(_path(name))
+    except FileNotFoundError:
+        raise KeyError(name) from None
+
+
+def _where(stat, group):
+    frames = [f"{profiling.short_path(frame.filename)}:{frame.lineno}" for frame in stat.traceback]
+    if group == "filename":
+        return profiling.short_path(stat.traceback[0].filename)
+    if group == "lineno":
+        return frames[0]
+    return frames  # oldest call first
+
+
+def diff(old, new=NOW, group="lineno", limit=DIFF_LIMIT):
+    # -> allocation growth from snapshot `old` to `new`, largest change first
+    if group not in GROUPS:
+        raise ValueError(f"group must be one of: {', '.join(GROUPS)}")
+    stats = _load(new).compare_to(_load(old), group)
+    return {
+        "pid": os.getpid(),
+        "from": old,
+        "to": new,
+        "group": group,
+        "size_diff": sum(stat.size_diff for stat in stats),
+        "count_diff": sum(stat.count_diff for stat in stats),
+        "top": [
+            {
+                "where": _where(stat, group),
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ],
+    }
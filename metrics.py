@@ -0,0 +1,334 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+
+# -------------------------
+# Prometheus metrics (/metrics)
+# -------------------------
+# A small in-process registry of counters, gauges and fixed-bucket
+# histograms; recording a sample is one dict update under the metric's own
+# (uncontended) lock. With METRICS_DIR set (gunicorn.conf.py sets it for
+# every gunicorn run) a background thread in each process writes its samples
+# to METRICS_DIR/<pid>.json within FLUSH_INTERVAL seconds of a request, and a
+# scrape on any worker merges all files: counters and histograms are summed,
+# gauges are reported per live process with a pid label. When a worker exits
+# its counters are folded into METRICS_DIR/archive.json, so totals never go
+# backwards. Without METRICS_DIR a scrape sees only the process it hits.
+
+METRICS_DIR = os.environ.get("METRICS_DIR")
+FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+ARCHIVE = "archive.json"  # counters of workers that have exited
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PHASE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+REGISTRY = {}  # name -> metric, in exposition order
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def set(self, value, *labels):
+        with self._lock:
+            self.values[labels] = value
+
+    def samples(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # value -> [count per bucket..., count above the last bucket, sum]
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[slot] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            return [[list(labels), list(counts)] for labels, counts in self.values.items()]
+
+
+class timer:
+    # with metrics.timer(COMPUTE_SECONDS, tool): ...
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, *labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+# --- Application metrics ---
+REQUESTS = Counter("http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to build the response", ("route", "method"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being handled by the worker")
+PARSE_SECONDS = Histogram("app_parse_duration_seconds", "Input validation and canonicalization", ("tool",), PHASE_BUCKETS)
+COMPUTE_SECONDS = Histogram("app_compute_duration_seconds", "Calculator compute on a result cache miss", ("tool",), PHASE_BUCKETS)
+RENDER_SECONDS = Histogram("app_render_duration_seconds", "render_template by template", ("template",), PHASE_BUCKETS)
+CACHE_HITS = Counter("app_cache_hits_total", "In-process cache hits", ("cache",))
+CACHE_MISSES = Counter("app_cache_misses_total", "In-process cache misses", ("cache",))
+CACHE_ENTRIES = Gauge("app_cache_entries", "Entries held by an in-process cache", ("cache",))
+RSS_BYTES = Gauge("process_resident_memory_bytes", "Resident set size of the worker")
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None  # not Linux
+
+
+def _collect():
+    # point-in-time values, refreshed before every flush or scrape
+    import cache  # late: cache.py does not depend on metrics
+
+    for name, stats in cache.stats().items():
+        CACHE_HITS.set(stats["hits"], name)
+        CACHE_MISSES.set(stats["misses"], name)
+        CACHE_ENTRIES.set(stats["size"], name)
+    rss = rss_bytes()
+    if rss is not None:
+        RSS_BYTES.set(rss)
+
+
+def snapshot():
+    _collect()
+    return {"pid": os.getpid(), "time": time.time(), "metrics": {name: m.samples() for name, m in REGISTRY.items()}}
+
+
+# --- Multiprocess mode (METRICS_DIR) ---
+_dirty = False
+_flusher_pid = None
+
+
+def _write(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def flush():
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), snapshot())
+
+
+def _flush_loop():
+    global _dirty
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        if _dirty:
+            _dirty = False  # before writing: samples recorded meanwhile mark it again
+            try:
+                flush()
+            except OSError:
+                pass
+
+
+def touch():
+    # after each request; a daemon thread per process writes the samples
+    # within FLUSH_INTERVAL, so an idle worker's file is never stale
+    global _dirty, _flusher_pid
+    if not METRICS_DIR:
+        return
+    _dirty = True
+    if _flusher_pid != os.getpid():  # first request, or first after a fork
+        _flusher_pid = os.getpid()
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(flush)
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # removed by mark_process_dead since listing, or never written
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _add(totals, metrics):
+    # sums counters and histograms of one snapshot into totals
+    for name, samples in metrics.items():
+        metric = REGISTRY.get(name)
+        if metric is None or metric.kind == "gauge":
+            continue
+        merged = totals.setdefault(name, {})
+        for labels, value in samples:
+            key = tuple(labels)
+            if metric.kind == "histogram":
+                current = merged.get(key)
+                merged[key] = value if current is None else [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0) + value
+
+
+def _gauges(gauges, snap):
+    for name, samples in snap["metrics"].items():
+        metric = REGISTRY.get(name)
+        if metric is not None and metric.kind == "gauge":
+            merged = gauges.setdefault(name, {})
+            for labels, value in samples:
+                merged[tuple(labels) + (str(snap["pid"]),)] = value
+
+
+def collect():
+    # -> {metric name: {label values: value}}; gauges carry a trailing pid label
+    totals, gauges = {}, {}
+    if not METRICS_DIR:
+        snap = snapshot()
+        _add(totals, snap["metrics"])
+        _gauges(gauges, snap)
+        return {**totals, **gauges}
+
+    flush()
+    try:
+        names = os.listdir(METRICS_DIR)
+    except OSError:
+        names = []
+    for name in names:
+        if name == ARCHIVE:
+            archived = _read(os.path.join(METRICS_DIR, name))
+            if archived is not None:
+                _add(totals, archived["metrics"])
+            continue
+        if not name.endswith(".json"):
+            continue
+        snap = _read(os.path.join(METRICS_DIR, name))
+        if snap is None:
+            continue
+        _add(totals, snap["metrics"])
+        if _alive(snap["pid"]):
+            _gauges(gauges, snap)
+    return {**totals, **gauges}
+
+
+def mark_process_dead(pid):
+    # gunicorn master (child_exit): keep an exited worker's counters, drop its gauges
+    if not METRICS_DIR:
+        return
+    path = os.path.join(METRICS_DIR, f"{pid}.json")
+    snap = _read(path)
+    if snap is None:
+        return
+    archive_path = os.path.join(METRICS_DIR, ARCHIVE)
+    archived = _read(archive_path) or {"metrics": {}}
+    totals = {}
+    _add(totals, archived["metrics"])
+    _add(totals, snap["metrics"])
+    _write(archive_path, {"metrics": {name: [[list(k), v] for k, v in values.items()] for name, values in totals.items()}})
+    os.remove(path)
+
+
+def reset():
+    # gunicorn master (on_starting): a new server starts its counters from zero
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(METRICS_DIR, name))
+
+
+# --- Text exposition format ---
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+def exposition(values=None):
+    values = collect() if values is None else values
+    lines = []
+    for name, metric in REGISTRY.items():
+        series = values.get(name)
+        if not series:
+            continue
+        names = metric.labels + (("pid",) if metric.kind == "gauge" else ())
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for key in sorted(series):
+            value = series[key]
+            if metric.kind != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + (float("inf"),), value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, key, [('le', _number(float(bound)))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, key)} {cumulative}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,244 @@
+import cProfile
+import itertools
+import json
+import math
+import os
+import pstats
+import re
+import sysconfig
+import tempfile
+import threading
+import time
+
+
+# -------------------------
+# Request profiling (/debug/profiles)
+# -------------------------
+# A request runs under cProfile when
+#   - it is the PROFILE_SAMPLE_RATE-th request seen by the worker (sampled),
+#   - it carries "X-Profile: <ADMIN_TOKEN>" (header), or
+#   - an earlier request to the same route took longer than PROFILE_SLOW_MS
+#     (slow): cProfile cannot look back, so a slow request arms its route and
+#     the worker's next request to it is profiled, at most once per route
+#     every PROFILE_COOLDOWN seconds.
+# Each capture is written off the request path to PROFILE_DIR as <id>.prof
+# (pstats, for snakeviz or `python -m pstats`), <id>.collapsed (folded stacks
+# for flamegraph.pl or speedscope) and <id>.json (request, timing and top
+# functions). Only the newest PROFILE_KEEP captures are kept.
+
+PROFILE_SAMPLE_RATE = int(os.environ.get("PROFILE_SAMPLE_RATE", 1000))  # 0 = off
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 500))  # 0 = off
+PROFILE_COOLDOWN = 60
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "fitness-fixe-profiles"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 200))
+TOP_FUNCTIONS = 15
+STACK_DEPTH = 100
+MIN_FRAME_SHARE = 1 / 5000  # folded stacks under this share of the request are dropped
+
+SAMPLED, HEADER, SLOW = "sampled", "header", "slow"
+KINDS = ("prof", "collapsed", "json")
+_FILE_NAME = re.compile(r"^([0-9]{8}-[0-9]{6}-[0-9]+-[0-9]+)\.(prof|collapsed|json)$")
+
+# shortened in function labels: app modules, then installed packages and the stdlib
+_PATH_PREFIXES = tuple(
+    os.path.join(path, "")
+    for path in (os.path.dirname(os.path.abspath(__file__)),) + tuple(
+        sysconfig.get_paths()[key] for key in ("purelib", "platlib", "stdlib")
+    )
+)
+
+_lock = threading.Lock()
+_active = threading.Lock()  # one cProfile at a time per process (Python 3.12+ allows a single profiler)
+_requests = itertools.count(1)
+_sequence = itertools.count(1)
+_armed = set()
+_last_armed = {}
+
+
+class Capture:
+    __slots__ = ("id", "profile", "trigger", "started", "meta")
+
+    def __init__(self, trigger):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}"
+        self.profile = cProfile.Profile()
+        self.trigger = trigger
+        self.meta = {}
+        self.started = time.perf_counter()
+
+
+def decide(route, forced=False):
+    # -> trigger for this request, or None
+    if forced:
+        return HEADER
+    if PROFILE_SAMPLE_RATE and next(_requests) % PROFILE_SAMPLE_RATE == 0:
+        return SAMPLED
+    if _armed:
+        with _lock:
+            if route in _armed:
+                _armed.discard(route)
+                return SLOW
+    return None
+
+
+def observe(route, seconds):
+    # an unprofiled request finished; arm its route when it was slow
+    if not PROFILE_SLOW_MS or seconds * 1000 < PROFILE_SLOW_MS:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _last_armed.get(route, -math.inf) >= PROFILE_COOLDOWN:
+            _last_armed[route] = now
+            _armed.add(route)
+
+
+def start(trigger):
+    if not _active.acquire(blocking=False):
+        return None  # another request in this process is being profiled
+    capture = Capture(trigger)
+    try:
+        capture.profile.enable()
+    except ValueError:  # another profiler (a debugger, coverage) is active
+        _active.release()
+        return None
+    return capture
+
+
+def finish(capture, **meta):
+    capture.profile.disable()
+    _active.release()
+    capture.meta.update(
+        meta,
+        id=capture.id,
+        trigger=capture.trigger,
+        duration_ms=round((time.perf_counter() - capture.started) * 1000, 2),
+        time=time.time(),
+        pid=os.getpid(),
+    )
+    threading.Thread(target=_save, args=(capture.profile, capture.meta), name="profile-save", daemon=True).start()
+
+
+# --- Files ---
+def short_path(filename):
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _label(func):
+    filename, line, name = func
+    label = name if filename == "~" else f"{name} ({short_path(filename)}:{line})"  # "~": built-in
+    return label.replace(";", ",")
+
+
+def collapsed(stats):
+    # cProfile keeps caller -> callee edges, not stacks: each function's own
+    # time is spread over the paths that reach it in proportion to the time
+    # each caller spent in it
+    entries = stats.stats
+    children = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    floor = max(sum(entries[func][3] for func in roots), 1e-9) * MIN_FRAME_SHARE
+    folded = {}
+
+    def walk(func, path, labels, share):
+        _, _, own, total, _ = entries[func]
+        labels = labels + (_label(func),)
+        if own * share >= floor:
+            key = ";".join(labels)
+            folded[key] = folded.get(key, 0.0) + own * share
+        if len(labels) >= STACK_DEPTH:
+            return
+        for child, edge_total in children.get(func, ()):
+            child_total = entries[child][3]
+            if child in path or child_total <= 0:
+                continue  # recursion is folded into the first frame
+            child_share = share * edge_total / child_total
+            if child_total * child_share >= floor:
+                walk(child, path | {child}, labels, child_share)
+
+    for root in roots:
+        walk(root, frozenset((root,)), (), 1.0)
+    return "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in folded.items() if seconds >= 5e-7)
+
+
+def top_functions(stats, limit=TOP_FUNCTIONS):
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:limit]
+    return [
+        {"function": _label(func), "calls": nc, "own_ms": round(tt * 1000, 3), "total_ms": round(ct * 1000, 3)}
+        for func, (_, nc, tt, ct, _) in rows
+    ]
+
+
+def _write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _save(profile, meta):
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, meta["id"])
+        stats = pstats.Stats(profile)
+        stats.dump_stats(f"{base}.prof")
+        _write(f"{base}.collapsed", collapsed(stats))
+        meta["top"] = top_functions(stats)
+        _write(f"{base}.json", json.dumps(meta))  # last: only complete captures are listed
+        _rotate()
+    except OSError:
+        pass
+
+
+def _rotate():
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except OSError:
+        return
+    ids = sorted({m.group(1) for m in map(_FILE_NAME.match, names) if m})
+    for capture_id in ids[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else ids:
+        for kind in KINDS:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, f"{capture_id}.{kind}"))
+            except FileNotFoundError:
+                pass
+
+
+def captures():
+    found = []
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except OSError:
+        return found
+    for name in names:
+        match = _FILE_NAME.match(name)
+        if not match or match.group(2) != "json":
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+                found.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # rotated away since listing
+    return found
+
+
+def slowest_by_route(limit=5):
+    # -> [(route, [capture meta, slowest first])], slowest route first
+    routes = {}
+    for meta in captures():
+        routes.setdefault(meta.get("route", "?"), []).append(meta)
+    ranked = [(route, sorted(metas, key=lambda m: -m["duration_ms"])[:limit]) for route, metas in routes.items()]
+    ranked.sort(key=lambda item: -item[1][0]["duration_ms"])
+    return ranked
+
+
+def capture_file(name):
+    # -> path of a capture file, or None for an unknown or malformed name
+    if not _FILE_NAME.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,172 @@
+import math
+import os
+
+import jinja2
+
+import cache
+import calculators
+import gauges
+
+
+# -------------------------
+# Per-person health reports (cohort.py, jobs.py)
+# -------------------------
+# A report runs every calculator in REPORT_TOOLS whose required fields are
+# present in one person's row and keeps each result exactly as /api/<tool>
+# returns it. Rows use the form field names as keys; "<tool>.<field>" (e.g.
+# "water.activity") overrides a shared column for one calculator. The BMI
+# result feeds diabetes when the row has no bmi, and height_cm stands in for
+# tdee/macro's height.
+
+REPORT_TOOLS = ("bmi", "bodyfat", "ideal_weight", "tdee", "macro", "water", "bp", "diabetes")
+FALLBACK_COLUMNS = {"height": "height_cm"}
+DERIVED = {"bmi": ("bmi", "bmi")}  # field -> (earlier tool, result key)
+CATEGORY_FIELDS = ("category", "status", "level")
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+
+def _column(row, tool, name):
+    for key in (f"{tool}.{name}", name, FALLBACK_COLUMNS.get(name)):
+        value = row.get(key) if key else None
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def _source(tool, row, results):
+    source = {}
+    for field in calculators.TOOLS[tool].fields:
+        value = _column(row, tool, field.name)
+        if value is None and field.name in DERIVED:
+            earlier, key = DERIVED[field.name]
+            value = results.get(earlier, {}).get(key)
+        if value is not None:
+            source[field.name] = value
+        elif field.required:
+            return None  # not enough data for this calculator
+    return source
+
+
+def evaluate(tool, source):
+    calc = calculators.TOOLS[tool]
+    try:
+        return calc.compute(cache.canonical_record(calc.parse(source)))
+    except calculators.ValidationError as e:
+        return {"error": str(e)}
+    except (ValueError, ArithmeticError) as e:
+        return {"error": f"Calculation failed: {e}"}
+
+
+def runnable(row, tools=REPORT_TOOLS):
+    # -> the tools whose required fields the row covers
+    return [tool for tool in tools if _source(tool, row, {}) is not None]
+
+
+def person_report(row, person_id, tools=REPORT_TOOLS):
+    results, skipped = {}, []
+    for tool in tools:
+        source = _source(tool, row, results)
+        if source is None:
+            skipped.append(tool)
+        else:
+            results[tool] = evaluate(tool, source)
+    return {"id": person_id, "results": results, "skipped": skipped}
+
+
+# -------------------------
+# Aggregate summary (mergeable, JSON-serializable state)
+# -------------------------
+# Per tool: how many people it ran for, failed or skipped, count/sum/min/max
+# of every numeric top-level result field and counts of each category label.
+# Partial summaries from workers or finished chunks merge by addition.
+
+class Summary:
+    def __init__(self, state=None):
+        self.state = state or {"people": 0, "tools": {}}
+
+    def _tool(self, tool):
+        return self.state["tools"].setdefault(
+            tool, {"evaluated": 0, "errors": 0, "skipped": 0, "metrics": {}, "categories": {}}
+        )
+
+    def add(self, report):
+        self.state["people"] += 1
+        for tool in report["skipped"]:
+            self._tool(tool)["skipped"] += 1
+        for tool, result in report["results"].items():
+            stats = self._tool(tool)
+            if "error" in result:
+                stats["errors"] += 1
+                continue
+            stats["evaluated"] += 1
+            for name, value in result.items():
+                if name in CATEGORY_FIELDS and isinstance(value, str):
+                    counts = stats["categories"].setdefault(name, {})
+                    counts[value] = counts.get(value, 0) + 1
+                elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                    metric = stats["metrics"].setdefault(name, [0, 0.0, value, value])
+                    metric[0] += 1
+                    metric[1] += value
+                    metric[2] = min(metric[2], value)
+                    metric[3] = max(metric[3], value)
+
+    def merge(self, state):
+        self.state["people"] += state["people"]
+        for tool, other in state["tools"].items():
+            stats = self._tool(tool)
+            for key in ("evaluated", "errors", "skipped"):
+                stats[key] += other[key]
+            for name, (count, total, low, high) in other["metrics"].items():
+                metric = stats["metrics"].setdefault(name, [0, 0.0, low, high])
+                metric[0] += count
+                metric[1] += total
+                metric[2] = min(metric[2], low)
+                metric[3] = max(metric[3], high)
+            for name, counts in other["categories"].items():
+                mine = stats["categories"].setdefault(name, {})
+                for label, count in counts.items():
+                    mine[label] = mine.get(label, 0) + count
+
+    def to_dict(self):
+        tools = {}
+        for tool in REPORT_TOOLS:
+            stats = self.state["tools"].get(tool)
+            if stats is None:
+                continue
+            tools[tool] = {
+                "evaluated": stats["evaluated"],
+                "errors": stats["errors"],
+                "skipped": stats["skipped"],
+                "metrics": {
+                    name: {"count": count, "mean": round(total / count, 2), "min": low, "max": high}
+                    for name, (count, total, low, high) in stats["metrics"].items()
+                },
+                "categories": {
+                    name: dict(sorted(counts.items(), key=lambda kv: -kv[1]))
+                    for name, counts in stats["categories"].items()
+                },
+            }
+        return {"people": self.state["people"], "tools": tools}
+
+
+# -------------------------
+# HTML rendering (self-contained pages, result partials of the web app)
+# -------------------------
+_env = None
+
+
+def _environment():
+    global _env
+    if _env is None:
+        _env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+        _env.globals["gauges"] = gauges
+    return _env
+
+
+def render_person(report):
+    return _environment().get_template("reports/person.html").render(report=report)
+
+
+def render_summary(summary):
+    return _environment().get_template("reports/summary.html").render(summary=summary)
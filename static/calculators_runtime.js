@@ -0,0 +1,482 @@
+// Runtime for the browser calculators generated by clientgen.py. The compute
+// functions and result partials are translated from calculators.py, gauges.py
+// and templates/partials/, and call into `py` for the Python semantics they
+// rely on: floats are tagged so they print like Python ("70.0"), round() is
+// half-even on the exact binary value, division by zero and math domain
+// errors raise, and template output is escaped like markupsafe.
+
+// --- Exceptions (same class names and messages as Python) ---
+class ValueError extends Error {}
+class ValidationError extends ValueError {}
+class ArithmeticError extends Error {}
+class ZeroDivisionError extends ArithmeticError {}
+
+// --- Numbers: ints are plain numbers, floats are PyFloat ---
+class PyFloat {
+  constructor(v) { this.v = v; }
+  valueOf() { return this.v; }
+  toString() { return floatRepr(this.v); }
+  toJSON() { return this.v; }
+}
+export const F = (v) => new PyFloat(+v);
+const isFloat = (x) => x instanceof PyFloat;
+
+const f64 = new Float64Array(1);
+const u32 = new Uint32Array(f64.buffer);
+const LOW = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1 ? 0 : 1;
+
+function isTie(v, n) {
+  // is |v| * 10^n exactly halfway between two integers? v = m * 2^e exactly,
+  // so 2 * v * 10^n = m * 5^n * 2^(e + 1 + n) is an odd integer iff the
+  // 2-adic valuation of m plus n + e + 1 is zero
+  f64[0] = v;
+  const hi = u32[1 - LOW], lo = u32[LOW];
+  const biased = (hi >>> 20) & 0x7ff;
+  let m = (hi & 0xfffff) * 4294967296 + lo;
+  let e = -1074;
+  if (biased) {
+    m += 4503599627370496;
+    e = biased - 1075;
+  }
+  let twos = 0;
+  while (m % 2 === 0) {
+    m /= 2;
+    twos += 1;
+  }
+  return twos + n + e + 1 === 0;
+}
+
+function fixed(v, n) {
+  // Python's format(v, ".nf"): correctly rounded, ties to even
+  const negative = v < 0 || Object.is(v, -0);
+  const a = Math.abs(v);
+  let s = a.toFixed(n); // ties away from zero
+  if (a && a < 1e21 && isTie(a, n)) {
+    let digits = BigInt(s.replace(".", ""));
+    if (digits % 2n) digits -= 1n;
+    s = digits.toString().padStart(n + 1, "0");
+    if (n) s = s.slice(0, -n) + "." + s.slice(-n);
+  }
+  return (negative ? "-" : "") + s;
+}
+
+function roundHalfEven(v, n) {
+  if (!Number.isFinite(v) || Math.abs(v) >= 1e21) return v;
+  return Number(fixed(v, n));
+}
+
+function intStr(v) {
+  return Math.abs(v) < 1e21 ? String(v) : BigInt(v).toString();
+}
+
+function floatRepr(v) {
+  if (!Number.isFinite(v)) return Number.isNaN(v) ? "nan" : v > 0 ? "inf" : "-inf";
+  if (v === 0) return Object.is(v, -0) ? "-0.0" : "0.0";
+  const [mantissa, exponent] = v.toExponential().split("e"); // shortest round-trip digits
+  const sign = v < 0 ? "-" : "";
+  const digits = mantissa.replace("-", "").replace(".", "");
+  const exp = Number(exponent);
+  if (exp < -4 || exp >= 16) {
+    const rest = digits.length > 1 ? "." + digits.slice(1) : "";
+    return `${sign}${digits[0]}${rest}e${exp < 0 ? "-" : "+"}${String(Math.abs(exp)).padStart(2, "0")}`;
+  }
+  if (exp < 0) return `${sign}0.${"0".repeat(-exp - 1)}${digits}`;
+  return `${sign}${digits.slice(0, exp + 1).padEnd(exp + 1, "0")}.${digits.slice(exp + 1) || "0"}`;
+}
+
+function formatG(v, precision) {
+  if (!Number.isFinite(v)) return floatRepr(v);
+  if (v === 0) return Object.is(v, -0) ? "-0" : "0";
+  const exp = Number(Math.abs(v).toExponential(precision - 1).split("e")[1]);
+  if (exp < -4 || exp >= precision) {
+    let [mantissa, e] = v.toExponential(precision - 1).split("e");
+    if (mantissa.includes(".")) mantissa = mantissa.replace(/\.?0+$/, "");
+    return `${mantissa}e${e[0] === "-" ? "-" : "+"}${e.replace(/^[+-]/, "").padStart(2, "0")}`;
+  }
+  let s = fixed(v, precision - 1 - exp);
+  if (s.includes(".")) s = s.replace(/\.?0+$/, "");
+  return s;
+}
+
+// --- Dates: minutes since 1900-01-01 00:00, like datetime.strptime's base ---
+class DateTime {
+  constructor(minutes) { this.minutes = minutes; }
+  valueOf() { return this.minutes; }
+}
+class TimeDelta {
+  constructor(minutes) { this.minutes = minutes; }
+  valueOf() { return this.minutes; }
+}
+
+// --- Markup (autoescaping) ---
+class Markup {
+  constructor(html) { this.html = html; }
+  toString() { return this.html; }
+}
+const ESCAPES = { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&#34;", "'": "&#39;" };
+function escape(value) {
+  if (value instanceof Markup) return value;
+  return new Markup(str(value).replace(/[&<>"']/g, (c) => ESCAPES[c]));
+}
+
+// Jinja's Undefined: renders empty, is falsy, iterates as empty
+const UNDEF = Object.freeze({ undefined: true });
+
+function isDict(x) {
+  return x !== null && typeof x === "object" && Object.getPrototypeOf(x) === Object.prototype && x !== UNDEF;
+}
+
+function str(x) {
+  if (typeof x === "string") return x;
+  if (x === null || x === undefined) return "None";
+  if (x === true) return "True";
+  if (x === false) return "False";
+  if (typeof x === "number") return intStr(x);
+  if (x === UNDEF) return "";
+  if (x instanceof Markup || isFloat(x)) return x.toString();
+  return repr(x);
+}
+
+function repr(x) {
+  if (typeof x === "string") {
+    const quote = x.includes("'") && !x.includes('"') ? '"' : "'";
+    const body = x.replace(/\\/g, "\\\\").replace(/\n/g, "\\n").replace(/\r/g, "\\r").replace(/\t/g, "\\t");
+    return quote + (quote === "'" ? body.replace(/'/g, "\\'") : body) + quote;
+  }
+  if (Array.isArray(x)) return `[${x.map(repr).join(", ")}]`;
+  if (isDict(x)) return `{${Object.entries(x).map(([k, v]) => `${repr(k)}: ${repr(v)}`).join(", ")}}`;
+  return str(x);
+}
+
+function json(x, compact = false) {
+  // json.dumps(x, ensure_ascii=False), with separators=(",", ":") when compact
+  const [comma, colon] = compact ? [",", ":"] : [", ", ": "];
+  if (x === null || x === undefined) return "null";
+  if (x === true || x === false) return String(x);
+  if (typeof x === "number") return intStr(x);
+  if (isFloat(x)) {
+    if (Number.isFinite(x.v)) return floatRepr(x.v);
+    return Number.isNaN(x.v) ? "NaN" : x.v > 0 ? "Infinity" : "-Infinity";
+  }
+  if (typeof x === "string") return JSON.stringify(x);
+  if (Array.isArray(x)) return `[${x.map((v) => json(v, compact)).join(comma)}]`;
+  return `{${Object.entries(x).map(([k, v]) => JSON.stringify(k) + colon + json(v, compact)).join(comma)}}`;
+}
+
+// --- Operators and builtins used by translated code ---
+function numeric(a, b, op) {
+  const r = op(+a, +b);
+  return isFloat(a) || isFloat(b) ? F(r) : r;
+}
+
+function truth(x) {
+  if (x === null || x === undefined || x === UNDEF) return false;
+  if (typeof x === "boolean") return x;
+  if (typeof x === "number") return x !== 0;
+  if (isFloat(x)) return x.v !== 0;
+  if (typeof x === "string" || Array.isArray(x)) return x.length > 0;
+  if (x instanceof Markup) return x.html.length > 0;
+  if (isDict(x)) return Object.keys(x).length > 0;
+  return true;
+}
+
+function eq(a, b) {
+  const numberLike = (x) => typeof x === "number" || typeof x === "boolean" || isFloat(x);
+  if (numberLike(a) && numberLike(b)) return +a === +b;
+  if (Array.isArray(a) && Array.isArray(b)) return a.length === b.length && a.every((v, i) => eq(v, b[i]));
+  if (a === UNDEF || b === UNDEF) return false;
+  return a === b || (a instanceof Markup && b instanceof Markup && a.html === b.html);
+}
+
+function iter(x) {
+  if (Array.isArray(x)) return x;
+  if (x === UNDEF) return [];
+  if (typeof x === "string") return [...x];
+  if (isDict(x)) return Object.keys(x);
+  throw new TypeError(`'${typeof x}' object is not iterable`);
+}
+
+function minmax(args, better) {
+  const items = args.length === 1 ? iter(args[0]) : args;
+  let best = items[0];
+  for (const item of items.slice(1)) if (better(+item, +best)) best = item;
+  return best;
+}
+
+export const py = {
+  ValueError, ValidationError, ArithmeticError, ZeroDivisionError, Markup, UNDEF,
+  F, str, repr, json, escape, fixed, truth, eq, iter,
+  markup: (value) => (value instanceof Markup ? value : new Markup(str(value))),
+
+  add(a, b) {
+    if (a instanceof DateTime && b instanceof TimeDelta) return new DateTime(a.minutes + b.minutes);
+    if (a instanceof Markup) return new Markup(a.html + escape(b).html);
+    if (b instanceof Markup) return new Markup(escape(a).html + b.html);
+    if (typeof a === "string" && typeof b === "string") return a + b;
+    if (Array.isArray(a) && Array.isArray(b)) return [...a, ...b];
+    return numeric(a, b, (x, y) => x + y);
+  },
+  sub(a, b) {
+    if (a instanceof DateTime && b instanceof DateTime) return new TimeDelta(a.minutes - b.minutes);
+    if (a instanceof DateTime && b instanceof TimeDelta) return new DateTime(a.minutes - b.minutes);
+    return numeric(a, b, (x, y) => x - y);
+  },
+  mul: (a, b) => numeric(a, b, (x, y) => x * y),
+  div(a, b) {
+    if (+b === 0) throw new ZeroDivisionError(isFloat(a) || isFloat(b) ? "float division by zero" : "division by zero");
+    return F(+a / +b);
+  },
+  floordiv(a, b) {
+    if (+b === 0) throw new ZeroDivisionError(isFloat(a) || isFloat(b) ? "float divmod()" : "integer division or modulo by zero");
+    return numeric(a, b, (x, y) => Math.floor(x / y));
+  },
+  mod(a, b) {
+    if (+b === 0) throw new ZeroDivisionError(isFloat(a) || isFloat(b) ? "float modulo" : "integer division or modulo by zero");
+    return numeric(a, b, (x, y) => x - y * Math.floor(x / y));
+  },
+  pow(a, b) {
+    if (!isFloat(a) && !isFloat(b) && b >= 0) return (+a) ** (+b);
+    if (+a === 0 && b < 0) throw new ZeroDivisionError("0.0 cannot be raised to a negative power");
+    return F((+a) ** (+b));
+  },
+  neg: (a) => (isFloat(a) ? F(-a.v) : -a),
+  and: (a, b) => (truth(a) ? b() : a),
+  or: (a, b) => (truth(a) ? a : b()),
+  contains(container, item) {
+    if (typeof container === "string") return container.includes(str(item));
+    if (isDict(container)) return Object.hasOwn(container, item);
+    return iter(container).some((v) => eq(v, item));
+  },
+  getitem(obj, key) {
+    if (Array.isArray(obj) || typeof obj === "string") {
+      const i = key < 0 ? obj.length + +key : +key;
+      if (i < 0 || i >= obj.length) throw new RangeError("index out of range");
+      return obj[i];
+    }
+    if (isDict(obj) && Object.hasOwn(obj, key)) return obj[key];
+    throw new RangeError(`KeyError: ${repr(key)}`);
+  },
+  setitem(obj, key, value) {
+    obj[key] = value;
+  },
+  slice: (obj, start, stop) => obj.slice(start === null ? undefined : +start, stop === null ? undefined : +stop),
+  unpack(value, n) {
+    const items = [...iter(value)];
+    if (items.length !== n) throw new ValueError(`expected ${n} values to unpack, got ${items.length}`);
+    return items;
+  },
+  format(value, spec) {
+    const m = /^\.(\d+)f$/.exec(spec);
+    if (m) return fixed(+value, Number(m[1]));
+    if (spec === "g") return formatG(+value, 6);
+    if (spec === "") return str(value);
+    throw new ValueError(`unsupported format spec '${spec}'`);
+  },
+
+  // builtins
+  round(x, n = null) {
+    if (n === null) return roundHalfEven(+x, 0) + 0; // an int: no negative zero
+    return isFloat(x) ? F(roundHalfEven(x.v, n)) : x;
+  },
+  max: (...args) => minmax(args, (a, b) => a > b),
+  min: (...args) => minmax(args, (a, b) => a < b),
+  sum: (items) => iter(items).reduce((total, v) => py.add(total, v), 0),
+  int: (x) => (typeof x === "string" ? parseInt(x, 10) : Math.trunc(+x)),
+  float: (x) => F(+x),
+  len: (x) => (isDict(x) ? Object.keys(x).length : iter(x).length),
+  list: (x) => [...iter(x)],
+  tuple: (x) => [...iter(x)],
+  abs: (x) => (isFloat(x) ? F(Math.abs(x.v)) : Math.abs(x)),
+  range(start, stop = null, step = 1) {
+    if (stop === null) [start, stop] = [0, start];
+    const out = [];
+    for (let i = start; step > 0 ? i < stop : i > stop; i += step) out.push(i);
+    return out;
+  },
+  zip: (...lists) => {
+    const arrays = lists.map(iter);
+    return arrays[0].slice(0, Math.min(...arrays.map((a) => a.length))).map((_, i) => arrays.map((a) => a[i]));
+  },
+  enumerate: (items, start = 0) => iter(items).map((v, i) => [i + start, v]),
+
+  math: {
+    pi: F(Math.PI),
+    e: F(Math.E),
+    log10(x) {
+      if (!(x > 0)) throw new ValueError("math domain error");
+      return F(Math.log10(+x));
+    },
+    log(x) {
+      if (!(x > 0)) throw new ValueError("math domain error");
+      return F(Math.log(+x));
+    },
+    sqrt(x) {
+      if (x < 0) throw new ValueError("math domain error");
+      return F(Math.sqrt(+x));
+    },
+    cos: (x) => F(Math.cos(+x)),
+    sin: (x) => F(Math.sin(+x)),
+  },
+  datetime: {
+    strptime(value, format) {
+      const m = format === "%H:%M" && /^(\d\d):(\d\d)$/.exec(value);
+      if (!m || +m[1] > 23 || +m[2] > 59) throw new ValueError(`time data '${value}' does not match format '${format}'`);
+      return new DateTime(+m[1] * 60 + +m[2]);
+    },
+  },
+  timedelta: ({ days = 0, hours = 0, minutes = 0 } = {}) => new TimeDelta(+days * 1440 + +hours * 60 + +minutes),
+
+  // Jinja
+  lookup: (ctx, name) => (Object.hasOwn(ctx, name) ? ctx[name] : UNDEF),
+  getattr(obj, name) {
+    if (isDict(obj) && Object.hasOwn(obj, name)) return obj[name];
+    return UNDEF;
+  },
+  item(obj, key) {
+    if (Array.isArray(obj) && Number.isInteger(+key)) return obj.at(+key) ?? UNDEF;
+    return py.getattr(obj, key);
+  },
+  html: (value) => (value === UNDEF ? "" : escape(value).html),
+  filters: {
+    capitalize: (s) => {
+      s = str(s);
+      return s.slice(0, 1).toUpperCase() + s.slice(1).toLowerCase();
+    },
+    title: (s) => M.title(str(s)),
+  },
+};
+
+// --- Methods, by name: M.get(d, key, default) is d.get(key, default) ---
+export const M = {
+  get: (d, key, fallback = null) => (Object.hasOwn(d, key) ? d[key] : fallback),
+  items: (d) => Object.entries(d),
+  keys: (d) => Object.keys(d),
+  values: (d) => Object.values(d),
+  append(list, value) {
+    list.push(value);
+    return null;
+  },
+  insert(list, index, value) {
+    list.splice(index, 0, value);
+    return null;
+  },
+  index(list, value) {
+    const i = list.findIndex((v) => eq(v, value));
+    if (i < 0) throw new ValueError(`${repr(value)} is not in list`);
+    return i;
+  },
+  join: (sep, items) => iter(items).map(str).join(sep),
+  replace: (s, old, repl) => s.split(old).join(repl),
+  title: (s) => s.replace(/\p{L}+/gu, (w) => w[0].toUpperCase() + w.slice(1).toLowerCase()),
+  capitalize: (s) => py.filters.capitalize(s),
+  upper: (s) => s.toUpperCase(),
+  lower: (s) => s.toLowerCase(),
+  strip: (s) => s.trim(),
+  strftime(dt, format) {
+    const minutes = ((dt.minutes % 1440) + 1440) % 1440;
+    const h = Math.floor(minutes / 60), m = minutes % 60;
+    const pad = (n) => String(n).padStart(2, "0");
+    const codes = { H: pad(h), I: pad(h % 12 || 12), M: pad(m), p: h < 12 ? "AM" : "PM", "%": "%" };
+    return format.replace(/%(.)/g, (_, c) => codes[c]);
+  },
+  total_seconds: (td) => F(td.minutes * 60),
+};
+
+// -------------------------
+// Calculators: parse a form like calculators.compile_schema, canonicalize
+// like cache.canonical_record, compute, and render the result partial
+// -------------------------
+export const tools = {};
+
+export function register(name, fields, compute, template) {
+  tools[name] = { name, fields, compute, template };
+}
+
+const TIME_RE = /^([01]\d|2[0-3]):[0-5]\d$/;
+const FLOAT_RE = /^[+-]?(?:\d(?:_?\d)*(?:\.(?:\d(?:_?\d)*)?)?|\.\d(?:_?\d)*)(?:[eE][+-]?\d(?:_?\d)*)?$/;
+
+function coerceNumber(name, kind, value) {
+  const text = String(value).trim();
+  if (!FLOAT_RE.test(text)) throw new ValidationError(`'${name}' must be a number`);
+  const number = Number(text.replace(/_/g, ""));
+  if (!Number.isFinite(number)) throw new ValidationError(`'${name}' must be a number`);
+  return kind === "int" ? Math.trunc(number) + 0 : F(number);
+}
+
+function parse(tool, source) {
+  // source: anything with get(name), e.g. FormData or URLSearchParams
+  const record = {};
+  for (const field of tool.fields) {
+    let value = source.get(field.name);
+    if (value === null || value === undefined || value === "") {
+      if (field.required) throw new ValidationError(`'${field.name}' is required`);
+      record[field.name] = field.default;
+      continue;
+    }
+    if (field.type === "float" || field.type === "int") {
+      record[field.name] = coerceNumber(field.name, field.type, value);
+      continue;
+    }
+    value = String(value).trim();
+    if (field.type === "time" && !TIME_RE.test(value)) {
+      throw new ValidationError(`'${field.name}' must be a time in HH:MM format`);
+    }
+    if (field.choices && !field.choices.includes(value)) {
+      throw new ValidationError(`'${field.name}' must be one of: ${field.choices.join(", ")}`);
+    }
+    record[field.name] = value;
+  }
+  return record;
+}
+
+function canonical(record) {
+  const out = {};
+  for (const [name, value] of Object.entries(record)) {
+    if (isFloat(value)) out[name] = F(roundHalfEven(value.v, 2) + 0);
+    else if (typeof value === "string") out[name] = value.trim();
+    else out[name] = value;
+  }
+  return out;
+}
+
+function encodeToken(tool, record) {
+  const values = tool.fields.map(({ name }) => {
+    const value = record[name];
+    return isFloat(value) && Number.isInteger(value.v) ? value.v : value;
+  });
+  while (values.length && values[values.length - 1] === null) values.pop();
+  const bytes = new TextEncoder().encode(json(values, true));
+  let binary = "";
+  for (const b of bytes) binary += String.fromCharCode(b);
+  return btoa(binary).replace(/\+/g, "-").replace(/\//g, "_").replace(/=+$/, "");
+}
+
+function evaluate(tool, record) {
+  try {
+    return tool.compute(record);
+  } catch (e) {
+    if (e instanceof ValidationError) return { error: e.message };
+    if (e instanceof ValueError || e instanceof ArithmeticError) return { error: `Calculation failed: ${e.message}` };
+    throw e;
+  }
+}
+
+// -> {html, permalink, result} like GET /<tool>/fragment, or null when the
+// tool has no client module (the caller then asks the server)
+export function render(name, source) {
+  const tool = tools[name];
+  if (!tool) return null;
+  let record;
+  try {
+    record = canonical(parse(tool, source));
+  } catch (e) {
+    if (!(e instanceof ValidationError)) throw e;
+    const result = { error: e.message };
+    return { html: tool.template({ result }), permalink: null, result };
+  }
+  const permalink = `/${name}/r/${encodeToken(tool, record)}`;
+  const result = evaluate(tool, record);
+  return { html: tool.template({ result, permalink }), permalink, result };
+}
+
+globalThis.calculators = { tools, render };
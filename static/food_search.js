@@ -0,0 +1,31 @@
+// Food autocomplete: fills the <datalist> of any <input data-food-search="protein|sugar">
+// with ranked suggestions from /api/foods/search as the user types.
+(function () {
+  const cache = {};
+  let timer = null;
+
+  async function suggest(input) {
+    const db = input.dataset.foodSearch;
+    const q = input.value.trim();
+    const list = document.getElementById(input.getAttribute("list"));
+    if (!list || q.length < 2) return;
+
+    const key = db + ":" + q.toLowerCase();
+    if (!cache[key]) {
+      const res = await fetch("/api/foods/search?db=" + db + "&q=" + encodeURIComponent(q));
+      cache[key] = res.ok ? (await res.json()).results : [];
+    }
+    list.replaceChildren(...cache[key].map((food) => {
+      const option = document.createElement("option");
+      option.value = food.name;
+      option.label = (food.alias ? food.alias + " — " : "") + food[db] + " g " + food.unit;
+      return option;
+    }));
+  }
+
+  document.addEventListener("input", (e) => {
+    if (!e.target.dataset || !e.target.dataset.foodSearch) return;
+    clearTimeout(timer);
+    timer = setTimeout(() => suggest(e.target), 120);
+  });
+})();
@@ -0,0 +1,52 @@
+// In-place results: a <form data-fragment="/<tool>/fragment"> is evaluated in
+// the browser when the page loaded the tool's generated module (clientgen.py),
+// otherwise submitted with fetch as a GET query; either way the result partial
+// replaces #result and the address bar is updated to the result's permalink.
+// Falls back to a normal submit.
+(function () {
+  function runScripts(container) {
+    container.querySelectorAll("script").forEach((old) => {
+      const script = document.createElement("script");
+      script.textContent = old.textContent;
+      old.replaceWith(script);
+    });
+  }
+
+  function show(target, html, permalink) {
+    target.innerHTML = html;
+    runScripts(target);
+    if (permalink) history.replaceState(null, "", permalink);
+    target.scrollIntoView({ behavior: "smooth", block: "nearest" });
+  }
+
+  function renderLocally(form) {
+    const tool = form.dataset.fragment.split("/")[1];
+    try {
+      return window.calculators ? window.calculators.render(tool, new FormData(form)) : null;
+    } catch (err) {
+      return null; // let the server answer
+    }
+  }
+
+  document.addEventListener("submit", async (e) => {
+    const form = e.target;
+    const target = document.getElementById("result");
+    if (!form.dataset || !form.dataset.fragment || !target || !window.fetch) return;
+    e.preventDefault();
+
+    const local = renderLocally(form);
+    if (local) {
+      show(target, local.html, local.permalink);
+      return;
+    }
+
+    const query = new URLSearchParams(new FormData(form)).toString();
+    try {
+      const res = await fetch(form.dataset.fragment + "?" + query, { headers: { Accept: "text/html" } });
+      if (!res.ok && res.status !== 400) throw new Error(res.statusText);
+      show(target, await res.text(), res.headers.get("X-Permalink"));
+    } catch (err) {
+      form.submit();
+    }
+  });
+})();
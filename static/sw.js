@@ -0,0 +1,97 @@
+// Service worker, served at /sw.js with VERSION, PRECACHE and FOODS prepended by
+// app.py. VERSION changes with the asset manifest and the templates, so a
+// deploy installs a fresh cache and drops the old one on activate.
+// - the calculator shells and fingerprinted /static/dist/ files: cache first
+// - other page loads (result permalinks): network first, cached copy offline;
+//   at most MAX_PAGES are kept (oldest dropped), never no-store responses and
+//   never /api/, /debug/ or /metrics
+// - /api/foods/search offline: matched against the versioned food JSON
+// Everything else (/api/*, fragments) is left to the browser's HTTP cache.
+const CACHE = "fitness-fixe-" + VERSION;
+const PAGES = "fitness-fixe-pages-" + VERSION;
+const MAX_PAGES = 50;
+const NO_PAGE_CACHE = ["/api/", "/debug/", "/metrics"];
+
+self.addEventListener("install", (e) => {
+  e.waitUntil(caches.open(CACHE).then((cache) => cache.addAll(PRECACHE)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener("activate", (e) => {
+  e.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(keys.filter((key) => key.startsWith("fitness-fixe-") && key !== CACHE && key !== PAGES).map((key) => caches.delete(key))))
+      .then(() => self.clients.claim())
+  );
+});
+
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) (await caches.open(CACHE)).put(request, response.clone());
+  return response;
+}
+
+function storable(response) {
+  return response.ok && !/no-store/i.test(response.headers.get("Cache-Control") || "");
+}
+
+async function putPage(request, response) {
+  const cache = await caches.open(PAGES);
+  await cache.put(request, response);
+  const keys = await cache.keys();  // insertion order: oldest first
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - MAX_PAGES)).map((key) => cache.delete(key)));
+}
+
+async function networkFirst(request) {
+  try {
+    const response = await fetch(request);
+    if (storable(response)) putPage(request, response.clone());
+    return response;
+  } catch (err) {
+    const cached = await caches.match(request);
+    if (cached) return cached;
+    throw err;
+  }
+}
+
+function normalize(text) {
+  return text.toLowerCase().replace(/[^a-z0-9]+/g, " ").trim();
+}
+
+async function searchOffline(url) {
+  const q = normalize(url.searchParams.get("q") || "");
+  const db = url.searchParams.get("db");
+  const limit = Math.min(parseInt(url.searchParams.get("limit"), 10) || 10, 50);
+  const results = [];
+  for (const [table, path] of Object.entries(FOODS)) {
+    if (db && db !== table) continue;
+    const response = await caches.match(path);
+    if (!response) continue;
+    for (const food of (await response.json()).foods) {
+      const names = [food.name, ...food.aliases];
+      const hit = names.findIndex((name) => normalize(name).includes(q));
+      if (hit < 0) continue;
+      const score = normalize(names[hit]).startsWith(q) ? 1 : 0.5;
+      results.push({ id: food.id, name: food.name, alias: hit ? names[hit] : null, [table]: food[table], unit: food.unit, score, db: table });
+    }
+  }
+  results.sort((a, b) => b.score - a.score);
+  return new Response(JSON.stringify({ query: url.searchParams.get("q") || "", results: results.slice(0, limit) }), {
+    headers: { "Content-Type": "application/json" },
+  });
+}
+
+self.addEventListener("fetch", (e) => {
+  const request = e.request;
+  const url = new URL(request.url);
+  if (request.method !== "GET" || url.origin !== location.origin) return;
+
+  if (url.pathname === "/api/foods/search") {
+    e.respondWith(fetch(request).catch(() => searchOffline(url)));
+  } else if (url.pathname.startsWith("/static/dist/") || (PRECACHE.includes(url.pathname) && !url.search)) {
+    e.respondWith(cacheFirst(request));
+  } else if (request.mode === "navigate" && !NO_PAGE_CACHE.some((prefix) => url.pathname.startsWith(prefix))) {
+    e.respondWith(networkFirst(request));
+  }
+});
@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from werkzeug.datastructures import MultiDict  # noqa: E402
+
+import calculators  # noqa: E402
+import foods  # noqa: E402
+
+
+def _match(table, query):
+    index = foods.index(table)
+    food_id, guessed = index.match(query)
+    return (index.names[food_id] if food_id is not None else None), guessed
+
+
+@pytest.mark.parametrize("table, query, name", [
+    ("protein", "Panner", "Paneer"),
+    ("protein", "moong daal", "Moong Dal"),
+    ("protein", "eggs", "Egg"),
+    ("sugar", "hony", "Honey"),
+])
+def test_typos_resolve_as_guesses(table, query, name):
+    assert _match(table, query) == (name, True)
+
+
+@pytest.mark.parametrize("table, query, name", [
+    ("protein", "chana", "Chole"),  # alias; "Chana Dal" scores close behind
+    ("protein", "dahi", "Curd"),
+    ("protein", "paneer", "Paneer"),
+    ("sugar", "Honey", "Honey"),
+])
+def test_exact_names_and_aliases_are_not_guesses(table, query, name):
+    assert _match(table, query) == (name, False)
+
+
+@pytest.mark.parametrize("query", ["chicken", "dal", "pasta", "beer", "banana"])
+def test_ambiguous_or_unrelated_names_stay_unmatched(query):
+    assert _match("protein", query) == (None, False)
+
+
+def test_integer_item_is_a_food_id():
+    record = calculators.TOOLS["protein"].parse({"weight": 70, "items": [{"item": 0, "quantity": 100}]})
+    assert record.items == ((0, 100.0),)
+    result = calculators.TOOLS["protein"].compute(record)
+    assert result["breakdown"][0]["item"] == foods.index("protein").names[0]
+    assert result["unmatched"] == []
+
+    token = calculators.encode_token(record)
+    assert calculators.decode_token("protein", token) == record
+
+
+def test_booleans_and_form_digits_are_names():
+    parse = calculators.TOOLS["protein"].parse
+    record = parse({"weight": 70, "items": [{"item": True, "quantity": 1}]})
+    assert record.items == (("True", 1.0),)
+    record = parse(MultiDict([("weight", "70"), ("item", "0"), ("quantity", "1")]))
+    assert record.items == (("0", 1.0),)
+
+
+@pytest.mark.parametrize("quantity", ["nan", "inf", -50, "abc", True])
+def test_bad_quantities_are_rejected(quantity):
+    with pytest.raises(calculators.ValidationError):
+        calculators.TOOLS["protein"].parse({"weight": 70, "items": [{"item": "Paneer", "quantity": quantity}]})